@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Analysis Delta
+Compares this run's categorized students with a previous saved analysis,
+matched through a hashed email index, so only students who are new, changed
+category or whose scores moved noticeably need to be emailed again.
+"""
+
+import json
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from analysis_snapshot import load_snapshot, read_ndjson, snapshot_format
+from student_results import StudentResults
+
+# A student whose percentage moved by at least this many points is re-emailed
+DEFAULT_SCORE_THRESHOLD = 5.0
+
+# Why a student is (or isn't) emailed, in the order the checks are applied
+NEW = "new"
+CATEGORY_CHANGED = "category changed"
+SCORE_CHANGED = "score changed"
+UNCHANGED = "unchanged"
+REASONS = [NEW, CATEGORY_CHANGED, SCORE_CHANGED, UNCHANGED]
+
+PERCENTAGE_SUFFIX = "_percentage"
+
+
+def load_results(filename: str) -> StudentResults:
+    """Read any file written by save_analysis (.json, .npz or .ndjson)."""
+    format = snapshot_format(filename)
+    if format == "snapshot":
+        return load_snapshot(filename)[1]
+    with open(filename) as f:
+        if format == "ndjson":
+            return read_ndjson(f)[1]
+        return StudentResults.from_dict(json.load(f))
+
+
+def _email_keys(results: StudentResults) -> pd.Index:
+    """Every student's email, trimmed and lowercased for matching."""
+    return pd.Index([email.strip().lower() for email in results.field_values("email")])
+
+
+def match_rows(current: StudentResults, previous: StudentResults) -> np.ndarray:
+    """Each current student's row in `previous` (by email), or -1 if not there."""
+    # A hash index over the previous emails, probed with this run's emails
+    previous_index = pd.Series(np.arange(len(previous)), index=_email_keys(previous))
+    previous_index = previous_index[~previous_index.index.duplicated(keep="last")]
+    positions = previous_index.index.get_indexer(_email_keys(current))
+    return np.where(positions >= 0, previous_index.to_numpy()[positions], -1)
+
+
+class AnalysisDelta:
+    """Per-student reasons for emailing, relative to a previous analysis.
+
+    Scores are compared on the percentage fields both analyses share (a
+    regrade) and on each one's most recent assessment (a new quiz).
+    """
+
+    def __init__(
+        self,
+        current: StudentResults,
+        previous: StudentResults,
+        score_threshold: float = DEFAULT_SCORE_THRESHOLD,
+    ):
+        self.current = current
+        self.previous = previous
+        self.score_threshold = score_threshold
+
+        previous_rows = match_rows(current, previous)
+        found = previous_rows >= 0
+        matched = previous_rows[found]
+
+        # Previous category codes translated into this run's category order
+        remap = np.array(
+            [
+                current.categories.index(category) if category in current.categories else -1
+                for category in previous.categories
+            ],
+            dtype=np.int16,
+        )
+        category_changed = np.zeros(len(current), dtype=bool)
+        category_changed[found] = remap[previous.codes[matched]] != current.codes[found]
+
+        score_changed = np.zeros(len(current), dtype=bool)
+        score_changed[found] = self._score_movement(matched, found) >= score_threshold
+
+        self.reasons = np.full(len(current), REASONS.index(UNCHANGED), dtype=np.int8)
+        self.reasons[score_changed] = REASONS.index(SCORE_CHANGED)
+        self.reasons[category_changed] = REASONS.index(CATEGORY_CHANGED)
+        self.reasons[~found] = REASONS.index(NEW)
+        self.changed = self.reasons != REASONS.index(UNCHANGED)
+
+    def _score_movement(self, matched: np.ndarray, found: np.ndarray) -> np.ndarray:
+        """Largest absolute percentage-point change per matched student."""
+        current_fields = [f for f in self.current.fields if f.endswith(PERCENTAGE_SUFFIX)]
+        previous_fields = [f for f in self.previous.fields if f.endswith(PERCENTAGE_SUFFIX)]
+        pairs = [(f, f) for f in current_fields if f in previous_fields]
+        if current_fields and previous_fields:
+            pairs.append((current_fields[-1], previous_fields[-1]))
+
+        movement = np.zeros(len(matched))
+        for current_field, previous_field in pairs:
+            now = self.current.columns[current_field][found].astype(np.float64)
+            before = self.previous.columns[previous_field][matched].astype(np.float64)
+            np.fmax(movement, np.abs(now - before), out=movement)
+        return movement
+
+    def reason(self, row: int) -> str:
+        return REASONS[self.reasons[row]]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of students for each reason."""
+        counts = np.bincount(self.reasons, minlength=len(REASONS))
+        return dict(zip(REASONS, counts.tolist()))
+
+    def unchanged_rows(self) -> List[int]:
+        return np.flatnonzero(~self.changed).tolist()
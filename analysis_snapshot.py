@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Analysis Snapshots
+Saves categorized student results in a compact columnar .npz file, or as
+newline-delimited JSON for streaming, and loads either back without
+re-reading the Gradescope exports.
+"""
+
+import json
+import math
+import os
+from typing import Dict, List, TextIO, Tuple
+
+import numpy as np
+
+from student_results import StudentResults
+
+# Bump whenever the snapshot layout or the student fields change:
+#   1: scores, percentages and trend fields
+#   2: int8 category codes, trimmed emails and per-assessment submission
+#      timing fields (quiz2_hours_late, hours_before_deadline, late_count, ...)
+SNAPSHOT_VERSION = 2
+
+SNAPSHOT_SUFFIX = ".npz"
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+
+
+def snapshot_format(filename: str) -> str:
+    """Pick 'snapshot', 'ndjson' or 'json' from a file name's extension."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == SNAPSHOT_SUFFIX:
+        return "snapshot"
+    if extension in NDJSON_SUFFIXES:
+        return "ndjson"
+    return "json"
+
+
+def check_version(version, source: str) -> int:
+    """Reject snapshots from a newer (or unknown) layout than this one reads.
+
+    Older versions load as they are; fields they lack are simply absent.
+    """
+    if not isinstance(version, int) or not 1 <= version <= SNAPSHOT_VERSION:
+        raise ValueError(
+            f"{source} is snapshot version {version}; this version reads "
+            f"snapshots up to version {SNAPSHOT_VERSION}"
+        )
+    return version
+
+
+def save_snapshot(filename: str, results: StudentResults, assessments: List[str]):
+    """Write one compressed column per student field plus a category code per row."""
+    arrays = {
+        "version": np.array(SNAPSHOT_VERSION),
+        "assessments": np.array(assessments, dtype=str),
+        "categories": np.array(results.categories, dtype=str),
+        "fields": np.array(results.fields, dtype=str),
+        "codes": results.codes,
+    }
+    for i, field in enumerate(results.fields):
+        values = results.columns[field]
+        if values.dtype.kind in "biuf":
+            arrays[f"f{i}"] = values
+        else:
+            arrays[f"f{i}"] = values.astype(str)
+
+    with open(filename, "wb") as f:
+        np.savez_compressed(f, **arrays)
+
+
+def load_snapshot(filename: str) -> Tuple[List[str], StudentResults]:
+    """Read a snapshot back into (assessments, student results)."""
+    with np.load(filename, allow_pickle=False) as data:
+        check_version(int(data["version"]), filename)
+        assessments = data["assessments"].tolist()
+        categories = data["categories"].tolist()
+        fields = data["fields"].tolist()
+        columns = {field: data[f"f{i}"] for i, field in enumerate(fields)}
+        codes = data["codes"]
+    return assessments, StudentResults(categories, codes, columns)
+
+
+def nonfinite_fields(results: StudentResults) -> List[str]:
+    """Float fields holding NaN or infinity (e.g. an unknown deadline)."""
+    return [
+        field
+        for field, values in results.columns.items()
+        if values.dtype.kind == "f" and not np.isfinite(values).all()
+    ]
+
+
+def null_nonfinite(record: Dict, fields: List[str]) -> Dict:
+    """Replace NaN and infinite values of `fields` in place with None.
+
+    JSON has no NaN, so they are written as null, which loads back as NaN.
+    """
+    for field in fields:
+        if not math.isfinite(record[field]):
+            record[field] = None
+    return record
+
+
+def write_ndjson(sink: TextIO, results: StudentResults, assessments: List[str]):
+    """Write a header line, then one JSON object per student with its category."""
+    header = {
+        "snapshot": SNAPSHOT_VERSION,
+        "assessments": assessments,
+        "categories": results.categories,
+    }
+    sink.write(json.dumps(header) + "\n")
+    fields = nonfinite_fields(results)
+    for category, student in results.iter_students():
+        record = null_nonfinite({"category": category, **student}, fields)
+        sink.write(json.dumps(record, allow_nan=False) + "\n")
+
+
+def read_ndjson(source: TextIO) -> Tuple[List[str], StudentResults]:
+    """Read newline-delimited JSON written by write_ndjson."""
+    header = json.loads(next(source))
+    check_version(header.get("snapshot"), "NDJSON snapshot")
+
+    student_analysis = {category: [] for category in header["categories"]}
+    for line in source:
+        if line.strip():
+            student = json.loads(line)
+            student_analysis[student.pop("category")].append(student)
+    return header["assessments"], StudentResults.from_dict(student_analysis)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Categorization Benchmark
+Compares the original iterrows categorization loop with the vectorized
+GradescopeAnalyzer.categorize_students on synthetic rosters, and a
+threshold sweep against categorizing once per threshold combination.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from category_rules import DEFAULT_RULES, DEFAULT_SPEC, RuleSet
+from gradescope_analyzer import CATEGORIES, GradescopeAnalyzer, category_features
+
+# A what-if grid of 11 x 5 x 4 x 3 = 660 threshold combinations
+SWEEP_GRID = {
+    "high": list(range(80, 91)),
+    "jump": [10, 12.5, 15, 17.5, 20],
+    "low": [50, 55, 60, 65],
+    "recovered": [70, 75, 80],
+}
+
+
+def make_merged_data(num_students: int, seed: int = 311) -> pd.DataFrame:
+    """Build a synthetic merged score table like analyze_student_performance does."""
+    rng = np.random.default_rng(seed)
+    quiz2_pct = rng.uniform(0, 110, num_students).round(1)
+    quiz3_pct = rng.uniform(0, 110, num_students).round(1)
+
+    # Some students miss a quiz (or both) and get filled with 0
+    quiz2_pct[rng.random(num_students) < 0.05] = 0
+    quiz3_pct[rng.random(num_students) < 0.05] = 0
+
+    return pd.DataFrame(
+        {
+            "Name": [f"Student {i}" for i in range(num_students)],
+            "Email": [f"student{i}@unc.edu" for i in range(num_students)],
+            "Quiz3_Score": quiz3_pct / 4,
+            "Quiz3_Percentage": quiz3_pct,
+            "Quiz2_Score": quiz2_pct / 4,
+            "Quiz2_Percentage": quiz2_pct,
+        }
+    )
+
+
+def categorize_with_iterrows(merged_data: pd.DataFrame):
+    """The original row-by-row categorization, kept as a reference."""
+    categories = {category: [] for category in CATEGORIES}
+
+    for _, student in merged_data.iterrows():
+        quiz2_pct = student["Quiz2_Percentage"]
+        quiz3_pct = student["Quiz3_Percentage"]
+
+        if quiz2_pct == 0 and quiz3_pct == 0:
+            continue
+
+        student_data = {
+            "name": student["Name"],
+            "email": student["Email"],
+            "quiz2_score": student["Quiz2_Score"],
+            "quiz2_percentage": quiz2_pct,
+            "quiz3_score": student["Quiz3_Score"],
+            "quiz3_percentage": quiz3_pct,
+            "improvement": quiz3_pct - quiz2_pct if quiz2_pct > 0 else 0,
+        }
+
+        improvement = quiz3_pct - quiz2_pct if quiz2_pct > 0 else quiz3_pct
+
+        if quiz2_pct >= 85 and quiz3_pct >= 85:
+            categories["excelling"].append(student_data)
+        elif improvement >= 15 or (quiz2_pct < 70 and quiz3_pct >= 75):
+            categories["improving"].append(student_data)
+        elif quiz2_pct < 60 and quiz3_pct < 60:
+            categories["struggling"].append(student_data)
+        elif quiz2_pct >= 75 and quiz3_pct < 60:
+            categories["declining"].append(student_data)
+        else:
+            categories["consistent"].append(student_data)
+
+    return categories
+
+
+def time_call(func, *args) -> float:
+    """Return the wall-clock time of a single call in seconds."""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    print("Categorization Benchmark")
+    print("=" * 60)
+    print(f"{'Students':>10} {'iterrows (s)':>15} {'vectorized (s)':>16} {'Speedup':>10}")
+    print("-" * 60)
+
+    for num_students in (1_000, 10_000, 100_000):
+        merged_data = make_merged_data(num_students)
+
+        # Both implementations must agree before their timings mean anything
+        expected = categorize_with_iterrows(merged_data)
+        actual = GradescopeAnalyzer.categorize_students(merged_data).to_dict()
+        for category in CATEGORIES:
+            assert [s["email"] for s in expected[category]] == [
+                s["email"] for s in actual[category]
+            ], f"Category mismatch in {category}"
+
+        loop_time = time_call(categorize_with_iterrows, merged_data)
+        vector_time = time_call(GradescopeAnalyzer.categorize_students, merged_data)
+        print(
+            f"{num_students:>10,} {loop_time:>15.4f} {vector_time:>16.4f} "
+            f"{loop_time / vector_time:>9.1f}x"
+        )
+
+    print()
+    print(f"Threshold sweep ({np.prod([len(v) for v in SWEEP_GRID.values()])} combinations)")
+    print("=" * 60)
+    print(f"{'Students':>10} {'one run each (s)':>17} {'sweep (s)':>12} {'Speedup':>10}")
+    print("-" * 60)
+    assessments = ["Quiz 2", "Quiz 3"]
+    for num_students in (1_000, 10_000, 100_000):
+        merged_data = make_merged_data(num_students)
+        percentages = merged_data[["Quiz2_Percentage", "Quiz3_Percentage"]].to_numpy()
+        features, valid = category_features(percentages)
+        features = {name: values[valid] for name, values in features.items()}
+
+        start = time.perf_counter()
+        sweep = DEFAULT_RULES.sweep(features, SWEEP_GRID)
+        sweep_time = time.perf_counter() - start
+
+        # Spot-check a few combinations against a full categorization, and
+        # time that to estimate running it once per combination
+        run_times = []
+        for row in sweep.sample(5, random_state=0).itertuples(index=False):
+            thresholds = {name: getattr(row, name) for name in SWEEP_GRID}
+            spec = {**DEFAULT_SPEC, "thresholds": {**DEFAULT_SPEC["thresholds"], **thresholds}}
+            start = time.perf_counter()
+            counts = GradescopeAnalyzer.categorize_students(
+                merged_data, assessments, RuleSet(spec)
+            ).counts()
+            run_times.append(time.perf_counter() - start)
+            assert counts == {c: getattr(row, c) for c in CATEGORIES}, "Sweep mismatch"
+        runs_time = np.mean(run_times) * len(sweep)
+        print(
+            f"{num_students:>10,} {runs_time:>17.3f} {sweep_time:>12.3f} "
+            f"{runs_time / sweep_time:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+CLI Cold-Start Benchmark
+Times fresh interpreter runs of each gradescope_cli.py subcommand, including
+--help, against the bundled exports and a local SMTP sink.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from smtp_sink import SMTPSink
+
+RUNS = 5
+HERE = os.path.dirname(os.path.abspath(__file__))
+CLI = os.path.join(HERE, "gradescope_cli.py")
+
+
+def cold_start(args, env) -> float:
+    """Median wall-clock seconds for a new interpreter to run the command."""
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, CLI] + args,
+            cwd=HERE,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    with SMTPSink() as sink:
+        smtp = ["--smtp-server", sink.host, "--smtp-port", str(sink.port), "--no-tls"]
+        env = dict(os.environ, GRADESCOPE_SMTP_USER="instructor@unc.edu")
+        commands = [
+            ("--help", ["--help"]),
+            ("smtp-test --help", ["smtp-test", "--help"]),
+            ("smtp-test", ["smtp-test"] + smtp),
+            ("analyze", ["analyze", "--no-cache"]),
+            ("analyze (cached)", ["analyze"]),
+            ("report", ["report"]),
+            ("preview", ["preview"]),
+            ("send --dry-run", ["send", "--dry-run"]),
+            ("send", ["send", "--no-journal", "--workers", "4"] + smtp),
+        ]
+
+        baseline = [sys.executable, "-c", "pass"]
+        start = time.perf_counter()
+        for _ in range(RUNS):
+            subprocess.run(baseline, check=True)
+        interpreter = (time.perf_counter() - start) / RUNS
+
+        print("CLI Cold-Start Benchmark")
+        print("=" * 50)
+        print(f"Median of {RUNS} runs; bare interpreter start {interpreter * 1000:.0f} ms")
+        print("-" * 50)
+        for name, args in commands:
+            print(f"{name:<20} {cold_start(args, env) * 1000:>8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Delivery Benchmark
+Sends the bundled roster to a local SMTP sink that adds artificial latency,
+and shows how wall-clock time scales with the number of delivery workers.
+A second run sends to a sink that throttles with 451 replies, with and
+without a DeliveryScheduler pacing and retrying the sends.
+"""
+
+import contextlib
+import io
+import os
+import time
+
+from delivery_scheduler import URGENT_FIRST, DeliveryScheduler
+from gradescope_analyzer import GradescopeAnalyzer
+from smtp_sink import SMTPSink
+
+LATENCY = 0.02  # Seconds the sink waits before acknowledging each message
+SINK_RATE = 100  # Messages per second the throttling sink accepts
+SINK_BURST = 10
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    print("Delivery Benchmark")
+    print("=" * 60)
+    print(f"Sink latency: {LATENCY * 1000:.0f} ms per message")
+    print(f"{'Workers':>8} {'Time (s)':>10} {'Sent':>6} {'Failed':>7} {'Connections':>12}")
+    print("-" * 60)
+
+    analyzer = GradescopeAnalyzer(
+        os.path.join(HERE, "three-scores.csv"), os.path.join(HERE, "two-scores.csv")
+    )
+    analyzer.analyze_student_performance()
+    baseline = None
+
+    for workers in (1, 2, 4, 8, 16):
+        with SMTPSink(latency=LATENCY) as sink:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = analyzer.send_emails(
+                    sink.host,
+                    sink.port,
+                    "instructor@unc.edu",
+                    "",
+                    dry_run=False,
+                    use_tls=False,
+                    workers=workers,
+                )
+            elapsed = time.perf_counter() - start
+
+        # Concurrency must not change what was sent or the order it is reported in
+        if baseline is None:
+            baseline = results
+        assert results == baseline, "Results differ from the single-worker run"
+
+        print(
+            f"{workers:>8} {elapsed:>10.3f} {len(results['sent']):>6} "
+            f"{len(results['failed']):>7} {sink.connections:>12}"
+        )
+
+    throttled(analyzer)
+
+
+def throttled(analyzer: GradescopeAnalyzer):
+    """Send to a rate-limited sink with and without a scheduler."""
+    print()
+    print(f"Throttling sink: {SINK_RATE} messages/s after a burst of {SINK_BURST}")
+    print(f"{'Scheduler':<24} {'Time (s)':>10} {'Sent':>6} {'Failed':>7} {'451s':>6}")
+    print("-" * 60)
+
+    schedulers = [
+        ("none", None),
+        ("backoff only", DeliveryScheduler(base_backoff=0.02, max_attempts=8)),
+        (
+            f"{SINK_RATE * 0.9:.0f}/s + backoff",
+            DeliveryScheduler(
+                rate=SINK_RATE * 0.9, base_backoff=0.02, priority=URGENT_FIRST
+            ),
+        ),
+    ]
+    for name, scheduler in schedulers:
+        with SMTPSink(max_rate=SINK_RATE, burst=SINK_BURST) as sink:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = analyzer.send_emails(
+                    sink.host,
+                    sink.port,
+                    "instructor@unc.edu",
+                    "",
+                    dry_run=False,
+                    use_tls=False,
+                    workers=4,
+                    scheduler=scheduler,
+                )
+            elapsed = time.perf_counter() - start
+
+        print(
+            f"{name:<24} {elapsed:>10.3f} {len(results['sent']):>6} "
+            f"{len(results['failed']):>7} {sink.throttled:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Ingestion Benchmark
+Compares a plain pd.read_csv of a wide Gradescope export with the
+column-pruned, typed read_export (whole-file and chunked).
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from gradescope_ingest import read_export
+from synthetic_exports import generate_export
+
+NUM_QUESTIONS = 30
+
+
+def measure(func):
+    """Return (seconds, peak traced bytes, resulting frame size in bytes)."""
+    # Time an untraced call first since tracemalloc slows allocation down
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    frame = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, frame.memory_usage(deep=True).sum()
+
+
+def main():
+    print("Ingestion Benchmark")
+    print("=" * 72)
+    print(
+        f"{'Students':>9} {'Reader':<22} {'Time (s)':>9} "
+        f"{'Peak (MB)':>10} {'Frame (MB)':>11}"
+    )
+    print("-" * 72)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for num_students in (10_000, 100_000, 500_000):
+            path = os.path.join(directory, f"export_{num_students}.csv")
+            generate_export(num_students, NUM_QUESTIONS).to_csv(path, index=False)
+
+            readers = [
+                ("pd.read_csv (all)", lambda: pd.read_csv(path)),
+                ("read_export", lambda: read_export(path)),
+                ("read_export chunked", lambda: read_export(path, chunksize=50_000)),
+            ]
+            for name, reader in readers:
+                elapsed, peak, size = measure(reader)
+                print(
+                    f"{num_students:>9,} {name:<22} {elapsed:>9.3f} "
+                    f"{peak / 1e6:>10.1f} {size / 1e6:>11.1f}"
+                )
+            print()
+
+
+if __name__ == "__main__":
+    main()
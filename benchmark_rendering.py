@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Rendering Benchmark
+Compares per-student str.format + MIMEMultipart serialization with the
+compiled TemplateSet batch renderer, in messages per second.
+"""
+
+import os
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from gradescope_analyzer import GradescopeAnalyzer
+
+ROSTER_SIZE = 20_000
+SENDER = "instructor@unc.edu"
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def render_per_student(analyzer: GradescopeAnalyzer, jobs):
+    """The original path: rebuild templates, format, re-parse and serialize each message."""
+    messages = []
+    templates = analyzer.get_email_templates()
+    for category, student in jobs:
+        email_content = templates[category].format(**analyzer.template_fields(student))
+        lines = email_content.strip().split("\n")
+        subject = lines[0].replace("Subject: ", "")
+        body = "\n".join(lines[1:]).strip()
+
+        message = MIMEMultipart()
+        message["From"] = SENDER
+        message["To"] = student["email"]
+        message["Subject"] = subject
+        message.attach(MIMEText(body, "plain"))
+        messages.append(message.as_string())
+    return messages
+
+
+def render_batch(analyzer: GradescopeAnalyzer, jobs):
+    """The compiled path used by send_emails."""
+    return analyzer.templates.render_all(
+        SENDER,
+        (
+            (category, student["email"], analyzer.template_fields(student))
+            for category, student in jobs
+        ),
+    )
+
+
+def main():
+    analyzer = GradescopeAnalyzer(
+        os.path.join(HERE, "three-scores.csv"), os.path.join(HERE, "two-scores.csv")
+    )
+    analyzer.analyze_student_performance()
+
+    # Repeat the bundled roster until it reaches the target size
+    roster = [
+        (category, student)
+        for category, students in analyzer.student_analysis.items()
+        for student in students
+    ]
+    jobs = (roster * (ROSTER_SIZE // len(roster) + 1))[:ROSTER_SIZE]
+
+    print("Rendering Benchmark")
+    print("=" * 50)
+    print(f"Roster size: {len(jobs):,} messages")
+    print("-" * 50)
+
+    for name, renderer in [
+        ("Per-student MIME", render_per_student),
+        ("Compiled batch", render_batch),
+    ]:
+        start = time.perf_counter()
+        renderer(analyzer, jobs)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<18} {elapsed:>8.3f} s {len(jobs) / elapsed:>12,.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+Times every phase of the pipeline on synthetic Gradescope exports and writes
+the results to JSON so runs can be compared between commits.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from gradescope_analyzer import GradescopeAnalyzer
+from smtp_sink import SMTPSink
+from synthetic_exports import write_exports
+
+PHASES = [
+    "ingest",
+    "clean",
+    "merge",
+    "categorize",
+    "report",
+    "json_save",
+    "render",
+    "send",
+]
+
+# Phases this much slower than the comparison baseline are flagged
+REGRESSION_THRESHOLD = 1.10
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            [
+                "git",
+                "-C",
+                os.path.dirname(os.path.abspath(__file__)),
+                "rev-parse",
+                "--short",
+                "HEAD",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_pipeline(
+    exports, directory: str, workers: int, skip_send: bool
+) -> Dict[str, float]:
+    """Run each phase once and return its wall-clock time in seconds."""
+    timings = {}
+
+    def timed(phase, func, *args, **kwargs):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func(*args, **kwargs)
+        timings[phase] = time.perf_counter() - start
+        return result
+
+    analyzer = timed("ingest", GradescopeAnalyzer.from_exports, exports)
+    timed("clean", analyzer.clean_data)
+    matrix = timed("merge", analyzer.build_score_matrix)
+    analyzer.student_results = timed(
+        "categorize", analyzer.categorize_students, matrix, analyzer.assessments
+    )
+    timed("report", analyzer.generate_analysis_report)
+    timed(
+        "json_save", analyzer.save_analysis, os.path.join(directory, "analysis.json")
+    )
+
+    jobs = (
+        (category, student["email"], analyzer.template_fields(student))
+        for category, student in analyzer.student_results.iter_students()
+    )
+    timed("render", analyzer.templates.render_all, "instructor@unc.edu", jobs)
+
+    if not skip_send:
+        with SMTPSink() as sink:
+            timed(
+                "send",
+                analyzer.send_emails,
+                sink.host,
+                sink.port,
+                "instructor@unc.edu",
+                "",
+                dry_run=False,
+                use_tls=False,
+                workers=workers,
+            )
+    return timings
+
+
+def compare(results: Dict, baseline_file: str):
+    """Print each phase against a previous results file."""
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+
+    print(f"\nComparison with {baseline_file} ({baseline['meta']['commit']}):")
+    print(f"{'Phase':<12} {'Baseline (s)':>13} {'Current (s)':>12} {'Ratio':>7}")
+    for phase in PHASES:
+        old = baseline["phases"].get(phase)
+        new = results["phases"].get(phase)
+        if old is None or new is None:
+            continue
+        ratio = new / old if old else float("inf")
+        flag = "  REGRESSION" if ratio > REGRESSION_THRESHOLD else ""
+        print(f"{phase:<12} {old:>13.4f} {new:>12.4f} {ratio:>6.2f}x{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline.")
+    parser.add_argument("--students", type=int, default=10_000)
+    parser.add_argument("--quizzes", type=int, default=2)
+    parser.add_argument("--questions", type=int, default=25)
+    parser.add_argument("--workers", type=int, default=4, help="Delivery workers")
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per phase; the fastest is kept"
+    )
+    parser.add_argument("--skip-send", action="store_true", help="Skip the SMTP phase")
+    parser.add_argument("--output", default=None, help="Results file (JSON)")
+    parser.add_argument(
+        "--compare", default=None, help="Earlier results file to compare against"
+    )
+    args = parser.parse_args()
+
+    print("Benchmark Suite")
+    print("=" * 50)
+    print(
+        f"{args.students:,} students, {args.quizzes} quizzes, "
+        f"{args.questions} questions, best of {args.repeat}"
+    )
+    print("-" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        exports = write_exports(directory, args.students, args.quizzes, args.questions)
+        runs = [
+            run_pipeline(exports, directory, args.workers, args.skip_send)
+            for _ in range(args.repeat)
+        ]
+
+    phases = {
+        phase: min(run[phase] for run in runs) for phase in PHASES if phase in runs[0]
+    }
+    for phase, seconds in phases.items():
+        print(f"{phase:<12} {seconds:>10.4f} s")
+    print(f"{'total':<12} {sum(phases.values()):>10.4f} s")
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "params": {
+            "students": args.students,
+            "quizzes": args.quizzes,
+            "questions": args.questions,
+            "workers": args.workers,
+            "repeat": args.repeat,
+        },
+        "phases": phases,
+    }
+
+    output = args.output or f"benchmark_{results['meta']['commit']}.json"
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Submission Timing Benchmark
+Compares ways of parsing Gradescope's Submission Time and Lateness (H:M:S)
+columns with pandas: inferring the time format, giving it the full format
+including %z, and submission_timing's fixed local-time format with the
+UTC offsets and durations parsed once per distinct value.
+"""
+
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from submission_timing import parse_durations, parse_submission_times
+from synthetic_exports import generate_export
+
+NUM_EXPORTS = 5
+
+
+def best_of(func, repeats: int = 2) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def pandas_inferred(times: pd.Series, lateness: pd.Series):
+    with warnings.catch_warnings():
+        # pandas warns that it can't infer one format for the blank rows
+        warnings.simplefilter("ignore")
+        parsed = pd.to_datetime(times.replace("", None), utc=True)
+    durations = pd.to_timedelta(lateness.replace("", None))
+    return parsed, durations
+
+
+def pandas_offset_format(times: pd.Series, lateness: pd.Series):
+    parsed = pd.to_datetime(
+        times.replace("", None), format="%Y-%m-%d %H:%M:%S %z", utc=True
+    )
+    durations = pd.to_timedelta(lateness.replace("", None))
+    return parsed, durations
+
+
+def submission_timing(times: pd.Series, lateness: pd.Series):
+    return parse_submission_times(times), parse_durations(lateness)
+
+
+def main():
+    print("Submission Timing Benchmark")
+    print("=" * 64)
+    print(f"{'Students':>9} {'Parser':<28} {'Time (s)':>9} {'Rows/s':>14}")
+    print("-" * 64)
+
+    for num_students in (10_000, 50_000, 200_000):
+        # Several exports, as a term's worth of quizzes would be
+        frames = [
+            generate_export(num_students, 1, quiz).astype(str).replace("nan", "")
+            for quiz in range(NUM_EXPORTS)
+        ]
+        columns = [(frame["Submission Time"], frame["Lateness (H:M:S)"]) for frame in frames]
+        rows = num_students * NUM_EXPORTS
+
+        def run(parser):
+            return lambda: [parser(times, lateness) for times, lateness in columns]
+
+        # Check submission_timing against pandas' %z path before timing it
+        for times, lateness in columns[:1]:
+            expected, expected_lateness = pandas_offset_format(times, lateness)
+            seconds, durations = submission_timing(times, lateness)
+            expected_seconds = (expected - pd.Timestamp(0, tz="UTC")).dt.total_seconds()
+            assert np.allclose(seconds, expected_seconds, equal_nan=True)
+            assert np.allclose(durations, expected_lateness.dt.total_seconds(), equal_nan=True)
+
+        for name, parser in [
+            ("inferred format", pandas_inferred),
+            ("format with %z", pandas_offset_format),
+            ("submission_timing", submission_timing),
+        ]:
+            elapsed = best_of(run(parser))
+            print(f"{num_students:>9,} {name:<28} {elapsed:>9.3f} {rows / elapsed:>14,.0f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
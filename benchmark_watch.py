@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Watch Mode Benchmark
+Times how long the export watcher takes from a CSV landing in the watched
+directory to the report of affected students being written, for a regrade
+of one quiz and for a new quiz, against a full re-analysis from scratch.
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from export_watcher import ExportWatcher
+from gradescope_analyzer import GradescopeAnalyzer
+from report_writer import TextReportWriter
+from synthetic_exports import generate_export, write_exports
+
+NUM_QUIZZES = 3
+REGRADED_SHARE = 0.01  # Share of students whose score a regrade changes
+
+
+def regrade(path: str, seed: int = 0):
+    """Rewrite an export with a few students' scores bumped, like a regrade."""
+    import pandas as pd
+
+    frame = pd.read_csv(path)
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(frame), max(1, int(len(frame) * REGRADED_SHARE)), replace=False)
+    frame.loc[rows, "Total Score"] = frame.loc[rows, "Max Points"]
+    drop(frame, path)
+
+
+def drop(frame, path: str):
+    """Write next to the target and rename, as a finished download appears."""
+    temp_path = path + ".part"
+    frame.to_csv(temp_path, index=False)
+    os.replace(temp_path, path)
+
+
+def full_run(directory: str) -> float:
+    """Seconds to analyze every export and write the whole report from scratch."""
+    start = time.perf_counter()
+    exports = ExportWatcher.exports(ExportWatcher(directory).scan())
+    analyzer = GradescopeAnalyzer.from_exports(exports)
+    analyzer.analyze_student_performance()
+    with open(os.devnull, "w") as sink:
+        analyzer.write_report(TextReportWriter(sink))
+    return time.perf_counter() - start
+
+
+def main():
+    print("Watch Mode Benchmark")
+    print("=" * 72)
+    print(f"{'Students':>9} {'Change':<12} {'Affected':>9} {'Update (ms)':>12} "
+          f"{'Drop->report (ms)':>18} {'Full run (ms)':>14}")
+    print("-" * 72)
+
+    for num_students in (10_000, 100_000):
+        with tempfile.TemporaryDirectory() as directory:
+            write_exports(directory, num_students, NUM_QUIZZES)
+            report_path = os.path.join(directory, "changes.txt")
+            reported = threading.Event()
+            affected = []
+
+            def on_update(analyzer, delta):
+                with open(report_path, "w") as f:
+                    analyzer.write_report(TextReportWriter(f), only=delta.changed)
+                affected.append(int(delta.changed.sum()))
+                reported.set()
+
+            watcher = ExportWatcher(directory, on_update=on_update)
+            stop = threading.Event()
+            with contextlib.redirect_stdout(io.StringIO()):
+                watcher.check()
+                thread = threading.Thread(target=watcher.run, args=(stop,))
+                thread.start()
+
+                changes = [
+                    ("regrade", lambda: regrade(
+                        os.path.join(directory, f"quiz{NUM_QUIZZES}-scores.csv")
+                    )),
+                    ("new quiz", lambda: drop(
+                        generate_export(num_students, quiz_index=NUM_QUIZZES),
+                        os.path.join(directory, f"quiz{NUM_QUIZZES + 1}-scores.csv"),
+                    )),
+                ]
+                rows = []
+                for name, change in changes:
+                    reported.clear()
+                    change()
+                    dropped = time.perf_counter()
+                    reported.wait()
+                    latency = time.perf_counter() - dropped
+                    # Let the watcher finish its bookkeeping for this update
+                    time.sleep(watcher.poll_interval)
+                    rows.append((name, affected[-1], watcher.last_update_seconds, latency))
+
+                stop.set()
+                thread.join()
+                full = full_run(directory)
+
+            for name, count, update, latency in rows:
+                print(
+                    f"{num_students:>9,} {name:<12} {count:>9,} {update * 1000:>12.0f} "
+                    f"{latency * 1000:>18.0f} {full * 1000:>14.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
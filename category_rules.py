@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Category Rules
+Declarative categorization rules: an ordered list of categories, each with
+conditions on per-student features and named thresholds, compiled into
+boolean column masks. A sweep evaluates many threshold combinations in one
+vectorized pass and returns the category counts for each, so cutoffs can be
+tuned without rerunning the analysis.
+"""
+
+import itertools
+import json
+import re
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# The cutoffs the analyzer has always used
+DEFAULT_SPEC = {
+    "thresholds": {
+        "high": 85,  # Excelling on both assessments
+        "jump": 15,  # Points gained that count as improving
+        "was_low": 70,  # Previous score that counts as low when recovering...
+        "recovered": 75,  # ...and the latest score that counts as recovered
+        "low": 60,  # Struggling on both; also a declining student's latest
+        "was_good": 75,  # Previous score a declining student fell from
+    },
+    # Checked in order; the first rule that matches wins. Each rule matches
+    # when any of its "when" groups has all of its conditions true.
+    "rules": [
+        {"category": "excelling", "when": [["previous >= high", "latest >= high"]]},
+        {
+            "category": "improving",
+            "when": [["trend >= jump"], ["previous < was_low", "latest >= recovered"]],
+        },
+        {"category": "struggling", "when": [["previous < low", "latest < low"]]},
+        {"category": "declining", "when": [["previous >= was_good", "latest < low"]]},
+    ],
+    "default": "consistent",
+}
+
+_OPERATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+_CONDITION = re.compile(r"^\s*(\w+)\s*(<=|>=|==|!=|<|>)\s*(\S+)\s*$")
+
+# Threshold combinations compared against every student at once; larger
+# batches are faster but hold batch x students booleans per condition
+SWEEP_BATCH_CELLS = 1 << 22
+
+
+class Condition:
+    """One comparison, like 'latest >= high', of a feature with a threshold or number."""
+
+    __slots__ = ("feature", "operator", "threshold", "value")
+
+    def __init__(self, text: str, thresholds: Mapping[str, float]):
+        match = _CONDITION.match(text)
+        if match is None:
+            raise ValueError(f"Cannot parse condition: {text!r}")
+        self.feature, self.operator, operand = match.groups()
+        try:
+            self.value = float(operand)
+            self.threshold = None
+        except ValueError:
+            if operand not in thresholds:
+                raise ValueError(f"Unknown threshold {operand!r} in {text!r}")
+            self.threshold = operand
+            self.value = None
+
+    def evaluate(self, features: Mapping[str, np.ndarray], thresholds) -> np.ndarray:
+        """Mask over students; a threshold given as a column gives one row per combination."""
+        if self.feature not in features:
+            raise ValueError(f"Unknown feature {self.feature!r}")
+        value = self.value if self.threshold is None else thresholds[self.threshold]
+        return _OPERATORS[self.operator](features[self.feature], value)
+
+
+class RuleSet:
+    """A compiled rule spec (see DEFAULT_SPEC for the format)."""
+
+    def __init__(self, spec: Mapping):
+        self.thresholds = {
+            name: float(value) for name, value in spec.get("thresholds", {}).items()
+        }
+        self.default = spec.get("default", "consistent")
+        self.rules = [
+            (
+                rule["category"],
+                [[Condition(text, self.thresholds) for text in group] for group in rule["when"]],
+            )
+            for rule in spec["rules"]
+        ]
+        self.categories = [category for category, _ in self.rules] + [self.default]
+        if len(set(self.categories)) != len(self.categories):
+            raise ValueError(f"Categories must be unique: {self.categories}")
+
+    @classmethod
+    def load(cls, filename: str) -> "RuleSet":
+        """Read a spec from a JSON file."""
+        with open(filename) as f:
+            return cls(json.load(f))
+
+    def with_thresholds(self, **thresholds: float) -> Dict[str, float]:
+        unknown = set(thresholds) - set(self.thresholds)
+        if unknown:
+            raise ValueError(f"Unknown thresholds: {sorted(unknown)}")
+        return {**self.thresholds, **thresholds}
+
+    def masks(
+        self, features: Mapping[str, np.ndarray], thresholds: Optional[Mapping] = None
+    ) -> List[np.ndarray]:
+        """One boolean mask per rule, in rule order."""
+        thresholds = self.with_thresholds(**(thresholds or {}))
+        masks = []
+        for _, groups in self.rules:
+            matched = None
+            for group in groups:
+                group_mask = None
+                for condition in group:
+                    mask = condition.evaluate(features, thresholds)
+                    group_mask = mask if group_mask is None else group_mask & mask
+                matched = group_mask if matched is None else matched | group_mask
+            masks.append(matched)
+        return masks
+
+    def codes(
+        self, features: Mapping[str, np.ndarray], thresholds: Optional[Mapping] = None
+    ) -> np.ndarray:
+        """Category code per student; the first matching rule wins."""
+        masks = self.masks(features, thresholds)
+        shape = np.broadcast_shapes(*(mask.shape for mask in masks))
+        codes = np.full(shape, len(self.rules), dtype=np.int8)
+        # Apply the rules last to first so earlier rules overwrite later ones
+        for code in range(len(masks) - 1, -1, -1):
+            np.copyto(codes, code, where=masks[code])
+        return codes
+
+    def features_used(self) -> List[str]:
+        return sorted(
+            {
+                condition.feature
+                for _, groups in self.rules
+                for group in groups
+                for condition in group
+            }
+        )
+
+    def sweep(
+        self, features: Mapping[str, np.ndarray], grid: Mapping[str, Sequence[float]]
+    ) -> pd.DataFrame:
+        """Category counts for every combination of the threshold values in `grid`.
+
+        Thresholds not in the grid keep their spec values. Combinations are
+        evaluated in batches, each as a combinations x distinct students
+        matrix, so the whole sweep is a handful of vectorized comparisons.
+        """
+        names = list(grid)
+        self.with_thresholds(**{name: 0.0 for name in names})
+        missing = set(self.features_used()) - set(features)
+        if missing:
+            raise ValueError(f"Unknown features: {sorted(missing)}")
+        product = list(itertools.product(*grid.values()))
+        combinations = np.array(product, dtype=float).reshape(len(product), len(names))
+
+        # Students with identical features always land in the same category,
+        # so evaluate each distinct feature vector once, weighted by its count
+        used = self.features_used()
+        unique, weights = np.unique(
+            np.column_stack([features[name] for name in used]), axis=0, return_counts=True
+        )
+        row_features = {name: unique[np.newaxis, :, i] for i, name in enumerate(used)}
+        batch = max(1, SWEEP_BATCH_CELLS // max(1, len(unique)))
+
+        counts = np.zeros((len(combinations), len(self.categories)), dtype=np.int64)
+        num_categories = len(self.categories)
+        for start in range(0, len(combinations), batch):
+            chunk = combinations[start : start + batch]
+            thresholds = {name: chunk[:, [i]] for i, name in enumerate(names)}
+            codes = self.codes(row_features, thresholds)
+            offsets = np.arange(len(chunk))[:, np.newaxis] * num_categories
+            counts[start : start + len(chunk)] = np.bincount(
+                (codes + offsets).ravel(),
+                weights=np.broadcast_to(weights, codes.shape).ravel(),
+                minlength=len(chunk) * num_categories,
+            ).reshape(len(chunk), num_categories)
+
+        result = pd.DataFrame(combinations, columns=names)
+        for code, category in enumerate(self.categories):
+            result[category] = counts[:, code]
+        return result
+
+
+DEFAULT_RULES = RuleSet(DEFAULT_SPEC)
+
+
+def parse_values(text: str) -> List[float]:
+    """Grid values from '80,85,90' or an inclusive range 'start:stop:step'."""
+    if ":" in text:
+        start, stop, step = (float(part) for part in text.split(":"))
+        return np.round(np.arange(start, stop + step / 2, step), 10).tolist()
+    return [float(value) for value in text.split(",")]
+
+
+def main():
+    """Print the default rule spec, as a starting point for a rules file."""
+    print(json.dumps(DEFAULT_SPEC, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Cohort Statistics
+Per-assessment mean, variance, percentiles and histograms of the class's
+percentages, and each student's z-score and percentile rank. Built in one
+vectorized pass over the analyzed students; when exports change, only the
+scores that were added, changed or removed are folded in or out.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analysis_delta import match_rows
+from student_results import StudentResults
+
+# Percentiles listed in the report
+REPORT_PERCENTILES = [10, 25, 50, 75, 90]
+
+# Histogram bins are 10 points wide; extra credit above 100% joins the top bin
+BIN_WIDTH = 10
+NUM_BINS = 10
+BIN_LABELS = [f"{i * BIN_WIDTH}-{(i + 1) * BIN_WIDTH}%" for i in range(NUM_BINS - 1)]
+BIN_LABELS.append(f"{(NUM_BINS - 1) * BIN_WIDTH}%+")
+
+
+def _bins(values: np.ndarray) -> np.ndarray:
+    return np.clip((values // BIN_WIDTH).astype(np.int64), 0, NUM_BINS - 1)
+
+
+class AssessmentStats:
+    """Streaming summary of one assessment's percentages.
+
+    The mean and variance are kept as Welford/Chan running moments, the
+    histogram as bin counts and the scores as one sorted array, so a batch
+    of m scores is added or removed in O(m log m + n) without re-sorting.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.histogram = np.zeros(NUM_BINS, dtype=np.int64)
+        self.sorted_values = np.empty(0)
+        # (percentage -> (percentile rank, z-score), median), built on first use
+        self._lookup: Optional[Tuple[Dict[float, Tuple[float, float]], float]] = None
+
+    @classmethod
+    def from_sorted(cls, sorted_values: np.ndarray) -> "AssessmentStats":
+        stats = cls()
+        stats.count = len(sorted_values)
+        if stats.count:
+            stats.mean = float(sorted_values.mean())
+            stats._m2 = float(((sorted_values - stats.mean) ** 2).sum())
+        stats.histogram = np.bincount(_bins(sorted_values), minlength=NUM_BINS)
+        stats.sorted_values = sorted_values
+        return stats
+
+    @property
+    def variance(self) -> float:
+        """Population variance (the cohort is the whole population)."""
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return self.variance**0.5
+
+    def add(self, values: np.ndarray):
+        """Fold a batch of scores in (Chan et al.'s parallel update)."""
+        values = np.sort(np.asarray(values, dtype=float))
+        if not len(values):
+            return
+        count = self.count + len(values)
+        batch_mean = float(values.mean())
+        delta = batch_mean - self.mean
+        self._m2 += float(((values - batch_mean) ** 2).sum()) + delta**2 * self.count * len(
+            values
+        ) / count
+        self.mean += delta * len(values) / count
+        self.count = count
+        self.histogram += np.bincount(_bins(values), minlength=NUM_BINS)
+        self._lookup = None
+        self.sorted_values = np.insert(
+            self.sorted_values, np.searchsorted(self.sorted_values, values), values
+        )
+
+    def remove(self, values: np.ndarray):
+        """Take a batch of previously added scores back out."""
+        values = np.sort(np.asarray(values, dtype=float))
+        if not len(values):
+            return
+        count = self.count - len(values)
+        if count <= 0:
+            self.__init__()
+            return
+        batch_mean = float(values.mean())
+        mean = (self.mean * self.count - batch_mean * len(values)) / count
+        delta = batch_mean - mean
+        self._m2 -= float(((values - batch_mean) ** 2).sum()) + delta**2 * count * len(
+            values
+        ) / self.count
+        self._m2 = max(self._m2, 0.0)
+        self.mean = mean
+        self.count = count
+        self.histogram -= np.bincount(_bins(values), minlength=NUM_BINS)
+        self._lookup = None
+
+        # Drop one stored copy per removed value; equal values sit side by side
+        unique, repeats = np.unique(values, return_counts=True)
+        starts = np.searchsorted(self.sorted_values, unique)
+        offsets = np.arange(len(values)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        self.sorted_values = np.delete(self.sorted_values, np.repeat(starts, repeats) + offsets)
+
+    def percentiles(self, qs: Sequence[float] = REPORT_PERCENTILES) -> np.ndarray:
+        """Linearly interpolated percentiles, read straight off the sorted scores."""
+        if not self.count:
+            return np.zeros(len(qs))
+        positions = np.asarray(qs, dtype=float) / 100 * (self.count - 1)
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.minimum(lower + 1, self.count - 1)
+        fraction = positions - lower
+        return self.sorted_values[lower] * (1 - fraction) + self.sorted_values[upper] * fraction
+
+    def percentile_rank(self, values) -> np.ndarray:
+        """Percent of the cohort scoring below each value, counting ties as half."""
+        values = np.asarray(values, dtype=float)
+        if not self.count:
+            return np.zeros(values.shape)
+        below = np.searchsorted(self.sorted_values, values, side="left")
+        not_above = np.searchsorted(self.sorted_values, values, side="right")
+        return (below + not_above) / 2 / self.count * 100
+
+    def z_scores(self, values) -> np.ndarray:
+        values = np.asarray(values, dtype=float)
+        std = self.std
+        if not std:
+            return np.zeros(values.shape)
+        return (values - self.mean) / std
+
+    def _standings(self) -> Tuple[Dict[float, Tuple[float, float]], float]:
+        if self._lookup is None:
+            # Scores repeat a lot, so rank each distinct score once
+            unique = np.unique(self.sorted_values)
+            standings = dict(
+                zip(
+                    unique.tolist(),
+                    zip(self.percentile_rank(unique).tolist(), self.z_scores(unique).tolist()),
+                )
+            )
+            self._lookup = (standings, float(self.percentiles([50])[0]))
+        return self._lookup
+
+    def standing_of(self, value: float) -> Tuple[float, float]:
+        """(percentile rank, z-score) of one score, for per-student callers."""
+        standing = self._standings()[0].get(value)
+        if standing is None:
+            standing = (float(self.percentile_rank(value)), float(self.z_scores(value)))
+        return standing
+
+    @property
+    def median(self) -> float:
+        return self._standings()[1]
+
+
+class CohortStats:
+    """AssessmentStats for each assessment, over the students who took it.
+
+    As elsewhere in the analyzer, a percentage of 0 means the assessment
+    wasn't taken, so those students are left out of its statistics.
+    """
+
+    def __init__(self, assessments: List[str], stats: Dict[str, AssessmentStats]):
+        self.assessments = list(assessments)
+        self.stats = stats
+
+    @staticmethod
+    def _percentages(store: StudentResults, fields: List[str]) -> np.ndarray:
+        if not fields:
+            return np.empty((len(store), 0))
+        return np.column_stack([store.columns[field] for field in fields]).astype(float)
+
+    @classmethod
+    def from_results(
+        cls, store: StudentResults, assessments: List[str], fields: List[str]
+    ) -> "CohortStats":
+        """Statistics for every assessment at once; fields[i] holds assessments[i]'s percentages."""
+        percentages = cls._percentages(store, fields)
+        # Untaken (0) and negative scores sort first; the taken ones are the top `count`
+        counts = (percentages > 0).sum(axis=0)
+        ordered = np.sort(np.where(percentages > 0, percentages, -np.inf), axis=0)
+        stats = {
+            label: AssessmentStats.from_sorted(ordered[len(ordered) - count :, i].copy())
+            for i, (label, count) in enumerate(zip(assessments, counts.tolist()))
+        }
+        return cls(assessments, stats)
+
+    def update(
+        self,
+        previous: StudentResults,
+        current: StudentResults,
+        assessments: List[str],
+        fields: Dict[str, str],
+    ):
+        """Bring the statistics from `previous` to `current` incrementally.
+
+        `fields` maps each label to its percentage field. For assessments
+        both analyses share, only the scores of students who were added,
+        removed or whose percentage changed are folded in or out; a new
+        assessment is computed from scratch.
+        """
+        previous_rows = match_rows(current, previous)
+        found = previous_rows >= 0
+        still_present = np.zeros(len(previous), dtype=bool)
+        still_present[previous_rows[found]] = True
+
+        stats = {}
+        for label in assessments:
+            field = fields[label]
+            now = current.columns[field].astype(float)
+            if label not in self.stats or field not in previous.columns:
+                stats[label] = CohortStats.from_results(current, [label], [field]).stats[label]
+                continue
+            before_all = previous.columns[field].astype(float)
+            before = np.where(found, before_all[np.maximum(previous_rows, 0)], 0.0)
+            changed = ~found | (before != now)
+
+            label_stats = self.stats[label]
+            gone = before_all[~still_present]
+            old = np.concatenate([before[changed & found], gone])
+            label_stats.remove(old[old > 0])
+            new = now[changed]
+            label_stats.add(new[new > 0])
+            stats[label] = label_stats
+
+        self.assessments = list(assessments)
+        self.stats = stats
+
+    def summary(self, qs: Sequence[float] = REPORT_PERCENTILES) -> pd.DataFrame:
+        """One row per assessment: students, mean, std and percentiles."""
+        rows = []
+        for label in self.assessments:
+            stats = self.stats[label]
+            row = {"assessment": label, "students": stats.count, "mean": stats.mean, "std": stats.std}
+            row.update(zip([f"p{q:g}" for q in qs], stats.percentiles(qs).tolist()))
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def histograms(self) -> pd.DataFrame:
+        """Student counts per 10-point bin, one row per assessment."""
+        return pd.DataFrame(
+            [self.stats[label].histogram for label in self.assessments],
+            index=self.assessments,
+            columns=BIN_LABELS,
+        )
+
+    def standing(self, label: str, values) -> Dict[str, np.ndarray]:
+        """Percentile rank and z-score of each value within an assessment."""
+        stats = self.stats[label]
+        return {
+            "percentile_rank": stats.percentile_rank(values),
+            "z_score": stats.z_scores(values),
+        }
+
+
+def ordinal(rank: float) -> str:
+    """'72nd', '1st', '13th' for a percentile rank."""
+    value = int(round(rank))
+    suffix = "th" if 10 <= value % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(value % 10, "th")
+    return f"{value}{suffix}"
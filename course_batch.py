@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Multi-Course Batch Mode
+Analyzes every course listed in a manifest in parallel worker processes and
+feeds all of their emails into one shared delivery queue, so sending for
+the first course finished overlaps with analysis of the rest.
+
+Manifest format (JSON); paths are relative to the manifest's directory:
+
+    {
+      "courses": [
+        {"name": "COMP 311-001", "directory": "comp311-001",
+         "exports": [["Quiz 2", "two-scores.csv"], ["Quiz 3", "three-scores.csv"]]},
+        {"name": "COMP 311-002", "directory": "comp311-002"}
+      ]
+    }
+
+When "exports" is omitted, every *.csv in the course directory is used,
+oldest first by file name. A course may also name a "templates" directory.
+Course names must be unique; a course without one is named after its
+directory.
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from delivery_scheduler import URGENT_FIRST, DeliveryScheduler, QuotaExceeded
+from email_templates import RenderedMessage
+from export_cache import DEFAULT_CACHE_DIR, ExportCache
+from gradescope_analyzer import (
+    GMAIL_DAILY_QUOTA,
+    SEND_JOURNAL_FILE,
+    SEND_QUOTA_FILE,
+    GradescopeAnalyzer,
+)
+from gradescope_cli import add_pacing_arguments, build_scheduler
+from send_journal import FAILED, PENDING, SENT, SendJournal
+from smtp_credentials import add_smtp_arguments, smtp_password
+from smtp_pool import SMTPConnectionPool
+
+
+class CourseResult:
+    """What a worker process sends back for one course."""
+
+    def __init__(
+        self,
+        name: str,
+        directory: str,
+        assessments: List[str],
+        counts: Dict[str, int],
+        report: str,
+        messages: List[RenderedMessage],
+        errors: List[str],
+    ):
+        self.name = name
+        self.directory = directory
+        self.assessments = assessments
+        self.counts = counts
+        self.report = report
+        self.messages = messages
+        self.errors = errors
+
+
+def load_manifest(path: str) -> List[Dict]:
+    """Read a manifest and resolve each course's directory and exports."""
+    with open(path) as f:
+        manifest = json.load(f)
+
+    base = os.path.dirname(os.path.abspath(path))
+    courses = []
+    names = set()
+    for course in manifest["courses"]:
+        directory = os.path.join(base, course["directory"])
+        exports = course.get("exports")
+        if exports:
+            exports = [
+                (export[0], os.path.join(directory, export[1]))
+                if isinstance(export, list)
+                else os.path.join(directory, export)
+                for export in exports
+            ]
+        else:
+            exports = sorted(glob.glob(os.path.join(directory, "*.csv")))
+        templates = course.get("templates")
+        name = course.get("name", os.path.basename(directory))
+        # Results, delivery outcomes and journals are all keyed by name
+        if name in names:
+            raise ValueError(f"Duplicate course name in {path}: {name!r}")
+        names.add(name)
+        courses.append(
+            {
+                "name": name,
+                "directory": directory,
+                "exports": exports,
+                "templates": os.path.join(directory, templates) if templates else None,
+            }
+        )
+    return courses
+
+
+def analyze_course(course: Dict, sender_email: str) -> CourseResult:
+    """Analyze one course and render its emails; runs in a worker process."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = GradescopeAnalyzer.from_exports(
+            course["exports"],
+            cache=ExportCache(os.path.join(course["directory"], DEFAULT_CACHE_DIR)),
+        )
+        if course["templates"]:
+            analyzer.load_templates(course["templates"])
+        store = analyzer.analyze_student_performance()
+        report = analyzer.generate_analysis_report()
+
+    analyzer.warn_unknown_deadlines(analyzer.templates.fields_used())
+    messages, errors = [], []
+    rendered = analyzer.templates.render_batch(
+        sender_email,
+        (
+            (category, student["email"], analyzer.template_fields(student))
+            for category, student in store.iter_students()
+        ),
+    )
+    names, emails = store.field_values("name"), store.field_values("email")
+    for (_, row), (message, error) in zip(store.iter_rows(), rendered):
+        if error is None:
+            messages.append(message)
+        else:
+            errors.append(f"{names[row]} ({emails[row]}) - Error: {error}")
+
+    return CourseResult(
+        course["name"],
+        course["directory"],
+        analyzer.assessments,
+        store.counts(),
+        report,
+        messages,
+        errors,
+    )
+
+
+def deliver(
+    pool: SMTPConnectionPool,
+    message: RenderedMessage,
+    journal: Optional[SendJournal],
+    scheduler: Optional[DeliveryScheduler] = None,
+) -> Optional[Exception]:
+    """Send one message, recording the attempt in the course's journal.
+
+    With a scheduler the send is paced and transient failures are retried;
+    past its daily quota the message is not attempted (QuotaExceeded).
+    """
+    if scheduler is not None and not scheduler.reserve():
+        return QuotaExceeded("daily quota reached")
+    if journal is not None:
+        journal.record(message.recipient, message.template_hash, PENDING)
+    try:
+        if scheduler is None:
+            pool.send(message.recipient, message.data)
+        else:
+            scheduler.run(lambda: pool.send(message.recipient, message.data))
+    except Exception as e:
+        if journal is not None:
+            journal.record(message.recipient, message.template_hash, FAILED, str(e))
+        return e
+    if journal is not None:
+        journal.record(message.recipient, message.template_hash, SENT)
+    return None
+
+
+def merged_report(results: List[CourseResult]) -> str:
+    """A summary table across courses followed by each course's own report."""
+    categories = []
+    for result in results:
+        categories.extend(c for c in result.counts if c not in categories)
+
+    lines = [
+        "=" * 60,
+        "MULTI-COURSE ANALYSIS REPORT",
+        "=" * 60,
+        f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        "",
+        f"{'Course':<24}"
+        + "".join(f"{c[:10]:>11}" for c in categories)
+        + f"{'Total':>8}",
+    ]
+    totals = dict.fromkeys(categories, 0)
+    for result in results:
+        row = f"{result.name[:23]:<24}"
+        for category in categories:
+            count = result.counts.get(category, 0)
+            totals[category] += count
+            row += f"{count:>11}"
+        lines.append(row + f"{sum(result.counts.values()):>8}")
+    lines.append(
+        f"{'All courses':<24}"
+        + "".join(f"{totals[c]:>11}" for c in categories)
+        + f"{sum(totals.values()):>8}"
+    )
+    lines.append("")
+
+    for result in results:
+        lines.append("")
+        lines.append(f"##### {result.name} ({', '.join(result.assessments)}) #####")
+        lines.append(result.report)
+    return "\n".join(lines)
+
+
+def run_batch(
+    courses: List[Dict],
+    sender_email: str = "",
+    processes: Optional[int] = None,
+    send: bool = False,
+    smtp_server: str = "smtp.gmail.com",
+    smtp_port: int = 587,
+    sender_password: str = "",
+    workers: int = 4,
+    use_tls: bool = True,
+    scheduler: Optional[DeliveryScheduler] = None,
+) -> Dict:
+    """Analyze courses in parallel and deliver their emails through one queue.
+
+    Each course is analyzed and rendered in a worker process. As soon as a
+    course finishes, its messages are queued on a shared thread pool that
+    sends over one set of pooled SMTP sessions, while other courses are
+    still being analyzed. Returns per-course results and delivery outcomes
+    in manifest order.
+
+    One scheduler paces every course's sends, as in send_emails: its rate
+    limit and daily quota are shared across courses, and each course's
+    priority categories are queued first. Messages past the quota are
+    listed under "deferred" and not journaled, so a later run sends them.
+    """
+    pool = None
+    senders = None
+    if send:
+        pool = SMTPConnectionPool(
+            smtp_server,
+            smtp_port,
+            sender_email,
+            sender_password,
+            size=workers,
+            use_tls=use_tls,
+        )
+        senders = ThreadPoolExecutor(max_workers=workers)
+
+    run_id = datetime.now().strftime("%G-W%V")
+    journals: Dict[str, SendJournal] = {}
+    results: Dict[str, CourseResult] = {}
+    outcomes: Dict[str, Dict[str, List[str]]] = {}
+    deliveries = []
+
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as analyzers:
+            futures = {
+                analyzers.submit(analyze_course, course, sender_email): course
+                for course in courses
+            }
+            for future in as_completed(futures):
+                course = futures[future]
+                name = course["name"]
+                outcome = outcomes[name] = {
+                    "sent": [],
+                    "failed": [],
+                    "skipped": [],
+                    "deferred": [],
+                }
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"❌ {name}: analysis failed: {e}")
+                    outcome["failed"].append(f"analysis failed: {e}")
+                    continue
+
+                results[name] = result
+                outcome["failed"].extend(result.errors)
+                print(
+                    f"✅ {name}: {sum(result.counts.values())} students, "
+                    f"{len(result.messages)} emails queued"
+                )
+                if not send:
+                    outcome["sent"].extend(
+                        f"{m.recipient} - DRY RUN" for m in result.messages
+                    )
+                    continue
+
+                journal = journals[name] = SendJournal(
+                    os.path.join(result.directory, SEND_JOURNAL_FILE), run_id
+                )
+                pending = []
+                for message in result.messages:
+                    if journal.is_delivered(message.recipient, message.template_hash):
+                        outcome["skipped"].append(
+                            f"{message.recipient} - already sent"
+                        )
+                    else:
+                        pending.append(message)
+
+                # Priority categories are queued first; outcomes stay in roster order
+                if scheduler is None:
+                    order = range(len(pending))
+                else:
+                    order = scheduler.order([message.category for message in pending])
+                queued = [None] * len(pending)
+                for i in order:
+                    queued[i] = senders.submit(
+                        deliver, pool, pending[i], journal, scheduler
+                    )
+                deliveries.extend(
+                    (name, message, future) for message, future in zip(pending, queued)
+                )
+
+        for name, message, future in deliveries:
+            error = future.result()
+            if error is None:
+                outcomes[name]["sent"].append(message.recipient)
+            elif isinstance(error, QuotaExceeded):
+                outcomes[name]["deferred"].append(f"{message.recipient} - {error}")
+            else:
+                outcomes[name]["failed"].append(f"{message.recipient} - Error: {error}")
+    finally:
+        if senders is not None:
+            senders.shutdown()
+        if pool is not None:
+            pool.close()
+        for journal in journals.values():
+            journal.close()
+
+    ordered = [results[c["name"]] for c in courses if c["name"] in results]
+    return {
+        "results": ordered,
+        "report": merged_report(ordered),
+        "outcomes": {c["name"]: outcomes[c["name"]] for c in courses},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Analyze many courses in parallel and email their students."
+    )
+    parser.add_argument("manifest", help="JSON manifest listing course directories")
+    parser.add_argument(
+        "--processes", type=int, default=None, help="Analysis processes (default: CPUs)"
+    )
+    parser.add_argument("--workers", type=int, default=4, help="SMTP sessions")
+    parser.add_argument("--report", default=None, help="Write the merged report here")
+    parser.add_argument(
+        "--send", action="store_true", help="Actually send (default is a dry run)"
+    )
+    add_smtp_arguments(parser)
+    add_pacing_arguments(parser)
+    # Like gradescope_analyzer.main(): stay under Gmail's daily limit, urgent first
+    parser.set_defaults(
+        daily_quota=GMAIL_DAILY_QUOTA,
+        quota_file=SEND_QUOTA_FILE,
+        priority=",".join(URGENT_FIRST),
+    )
+    args = parser.parse_args()
+
+    password = smtp_password(args.password_file)
+    if args.send and not args.sender:
+        parser.error("--send requires --sender")
+
+    courses = load_manifest(args.manifest)
+    print(f"Analyzing {len(courses)} courses...")
+    batch = run_batch(
+        courses,
+        sender_email=args.sender,
+        processes=args.processes,
+        send=args.send,
+        smtp_server=args.smtp_server,
+        smtp_port=args.smtp_port,
+        sender_password=password,
+        workers=args.workers,
+        use_tls=not args.no_tls,
+        scheduler=build_scheduler(args) if args.send else None,
+    )
+
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(batch["report"])
+        print(f"Merged report saved to {args.report}")
+    else:
+        print("\n" + batch["report"])
+
+    mode = "Sent" if args.send else "Would send"
+    print("\n" + "=" * 60)
+    for name, outcome in batch["outcomes"].items():
+        print(
+            f"{name}: {mode} {len(outcome['sent'])}, "
+            f"failed {len(outcome['failed'])}, skipped {len(outcome['skipped'])}, "
+            f"deferred {len(outcome['deferred'])}"
+        )
+        for failure in outcome["failed"]:
+            print(f"  - {failure}")
+    if any(outcome["deferred"] for outcome in batch["outcomes"].values()):
+        print("Deferred messages hit the daily quota - run again tomorrow to send them")
+
+
+if __name__ == "__main__":
+    main()
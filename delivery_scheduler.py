@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Delivery Scheduler
+Paces outbound mail with an adaptive token-bucket rate limit and a daily
+quota, retries transient SMTP failures (421/45x) with exponential backoff
+and jitter, and orders messages so the most important go out first.
+"""
+
+import json
+import os
+import random
+import smtplib
+import tempfile
+import threading
+import time
+from datetime import date
+from typing import Callable, List, Optional, Sequence
+
+from metrics import DISABLED, Metrics
+from smtp_pool import CONNECTION_ERRORS
+
+# Students who most need to hear from the instructor, most urgent first
+URGENT_FIRST = ["struggling", "declining"]
+
+
+class QuotaExceeded(Exception):
+    """The daily sending quota is used up; the message was not attempted."""
+
+
+def is_transient(error: Exception) -> bool:
+    """True for failures worth retrying later: 4xx replies and dropped connections."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, CONNECTION_ERRORS)
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose rate adapts to server pushback.
+
+    The rate is halved (down to min_rate) whenever the server throttles us
+    and creeps back up towards max rate after each success (AIMD).
+    """
+
+    def __init__(self, rate: float, burst: int = 1, min_rate: float = 0.1):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available; returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def slow_down(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def speed_up(self):
+        with self._lock:
+            # Regain the full rate after roughly 20 successful sends
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class DailyQuota:
+    """Caps messages per calendar day, optionally remembered across runs.
+
+    With a state file, the day's count is saved after every change so a
+    second run on the same day continues from where the first left off.
+    """
+
+    def __init__(self, limit: int, state_file: Optional[str] = None):
+        self.limit = limit
+        self.state_file = state_file
+        self.day = date.today().isoformat()
+        self.used = 0
+        self._lock = threading.Lock()
+
+        if state_file and os.path.exists(state_file):
+            with open(state_file) as f:
+                state = json.load(f)
+            if state.get("day") == self.day:
+                self.used = state.get("used", 0)
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.limit - self.used)
+
+    def reserve(self) -> bool:
+        """Claim one message from today's quota, if any is left."""
+        with self._lock:
+            today = date.today().isoformat()
+            if today != self.day:
+                self.day, self.used = today, 0
+            if self.used >= self.limit:
+                return False
+            self.used += 1
+            self._save()
+            return True
+
+    def release(self):
+        """Return a claimed message that was never delivered."""
+        with self._lock:
+            self.used = max(0, self.used - 1)
+            self._save()
+
+    def _save(self):
+        if not self.state_file:
+            return
+        directory = os.path.dirname(os.path.abspath(self.state_file))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"day": self.day, "used": self.used}, f)
+        os.replace(temp_path, self.state_file)
+
+
+class DeliveryScheduler:
+    """Decides when, in what order and how persistently each message is sent."""
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: int = 1,
+        daily_quota: Optional[DailyQuota] = None,
+        priority: Optional[Sequence[str]] = None,
+        max_attempts: int = 5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        metrics: Optional[Metrics] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """Configure pacing and retries.
+
+        rate is messages per second (None for unlimited) and burst how many
+        may go out back to back. priority lists categories to send first, in
+        order; the rest follow in roster order. Transient failures are
+        retried up to max_attempts times in total, waiting about
+        base_backoff * 2**n seconds (with jitter, capped at max_backoff).
+        """
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.daily_quota = daily_quota
+        self.priority = list(priority or [])
+        self.max_attempts = max(1, max_attempts)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.metrics = metrics or DISABLED
+        self._sleep = sleep
+
+    def order(self, categories: List[str]) -> List[int]:
+        """Indices of the messages in the order they should be sent."""
+        if not self.priority:
+            return list(range(len(categories)))
+        rank = {category: i for i, category in enumerate(self.priority)}
+        last = len(self.priority)
+        return sorted(range(len(categories)), key=lambda i: rank.get(categories[i], last))
+
+    def reserve(self) -> bool:
+        """Claim quota for one message; False means it must wait for another day."""
+        if self.daily_quota is None or self.daily_quota.reserve():
+            return True
+        self.metrics.increment("emails_deferred")
+        return False
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1-based), with equal jitter."""
+        delay = min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def run(self, send: Callable[[], None]):
+        """Call send() within the rate limit, retrying transient failures.
+
+        The quota claimed by reserve() is given back if the message
+        ultimately fails.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.bucket is not None:
+                waited = self.bucket.acquire()
+                if waited:
+                    self.metrics.observe("rate_limit_wait", waited)
+            try:
+                send()
+            except Exception as e:
+                if not is_transient(e) or attempt >= self.max_attempts:
+                    if self.daily_quota is not None:
+                        self.daily_quota.release()
+                    raise
+                if self.bucket is not None:
+                    self.bucket.slow_down()
+                self.metrics.increment("smtp_transient_retries")
+                self._sleep(self.backoff(attempt))
+                continue
+            if self.bucket is not None:
+                self.bucket.speed_up()
+            return
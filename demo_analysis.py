@@ -4,7 +4,8 @@ Demo script to run the Gradescope analysis without sending emails.
 This is a safe way to test the analysis functionality.
 """
 
-from gradescope_analyzer import GradescopeAnalyzer
+from export_cache import ExportCache
+from gradescope_analyzer import GradescopeAnalyzer, student_key
 import json
 
 
@@ -13,30 +14,34 @@ def main():
     print("=" * 30)
 
     try:
-        # Initialize analyzer
-        analyzer = GradescopeAnalyzer("three-scores.csv", "two-scores.csv")
+        # Initialize analyzer, reusing cleaned exports from earlier runs
+        analyzer = GradescopeAnalyzer(
+            "three-scores.csv", "two-scores.csv", cache=ExportCache()
+        )
 
         # Run analysis
         print("Analyzing student performance...")
-        categories = analyzer.analyze_student_performance()
+        results = analyzer.analyze_student_performance()
 
         # Display results
         print("\nAnalysis Results:")
         print("-" * 20)
 
-        total_students = sum(len(students) for students in categories.values())
-        print(f"Total students analyzed: {total_students}")
+        print(f"Total students analyzed: {len(results)}")
         print()
 
-        for category, students in categories.items():
-            if students:
-                print(f"{category.upper()} ({len(students)} students):")
-                for student in students[:3]:  # Show first 3 students
-                    print(
-                        f"  • {student['name']} - Quiz 2: {student['quiz2_percentage']:.1f}%, Quiz 3: {student['quiz3_percentage']:.1f}%"
+        for category, count in results.counts().items():
+            if count:
+                print(f"{category.upper()} ({count} students):")
+                for row in results.rows(category)[:3]:  # Show first 3 students
+                    student = results.student(row)
+                    scores = ", ".join(
+                        f"{label}: {student[student_key(label) + '_percentage']:.1f}%"
+                        for label in analyzer.assessments
                     )
-                if len(students) > 3:
-                    print(f"  ... and {len(students) - 3} more")
+                    print(f"  • {student['name']} - {scores}")
+                if count > 3:
+                    print(f"  ... and {count - 3} more")
                 print()
 
         # Generate full report
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Email Templates
+Parses email templates once into compiled subject/body formatters and renders
+a whole roster into ready-to-send messages in one batch.
+"""
+
+import hashlib
+import os
+import re
+from email import base64mime
+from email.header import Header
+from string import Formatter
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+TEMPLATE_SUFFIX = ".txt"
+
+# Content headers match what MIMEText produces for ASCII and non-ASCII bodies
+_ASCII_HEADERS = (
+    'Content-Type: text/plain; charset="us-ascii"\n'
+    "MIME-Version: 1.0\n"
+    "Content-Transfer-Encoding: 7bit\n"
+)
+_UTF8_HEADERS = (
+    'Content-Type: text/plain; charset="utf-8"\n'
+    "MIME-Version: 1.0\n"
+    "Content-Transfer-Encoding: base64\n"
+)
+
+
+def encode_header(value: str) -> str:
+    """Encode a header value the way the email package does for plain ASCII or UTF-8 text."""
+    if value.isascii():
+        return value
+    return Header(value, "utf-8").encode()
+
+
+class CompiledTemplate:
+    """A template split into subject and body formatters at load time."""
+
+    def __init__(self, text: str):
+        """Parse template text whose first non-blank line is 'Subject: ...'."""
+        lines = text.strip().split("\n")
+        if not lines[0].startswith("Subject: "):
+            raise ValueError("Email templates must start with a 'Subject: ' line.")
+
+        self.text = text
+        self.digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        subject = lines[0].replace("Subject: ", "")
+        body = "\n".join(lines[1:]).strip()
+
+        self._format_subject = subject.format
+        self._format_body = body.format
+
+        # Most subjects have no placeholders, so encode those once up front
+        subject_fields = [field for _, field, _, _ in Formatter().parse(subject) if field]
+        body_fields = [field for _, field, _, _ in Formatter().parse(body) if field]
+        # Student fields the template refers to, e.g. 'name' for {name:>10}
+        self.fields = frozenset(
+            re.split(r"[.\[]", field, maxsplit=1)[0] for field in subject_fields + body_fields
+        )
+        self._static_subject = None if subject_fields else subject.format()
+        self._static_subject_header = (
+            None if subject_fields else encode_header(self._static_subject)
+        )
+
+    def render(self, fields: Dict) -> Tuple[str, str, str]:
+        """Return (subject, encoded subject header, body) for one student."""
+        if self._static_subject is not None:
+            subject, header = self._static_subject, self._static_subject_header
+        else:
+            subject = self._format_subject(**fields)
+            header = encode_header(subject)
+        return subject, header, self._format_body(**fields)
+
+
+class RenderedMessage:
+    """A fully serialized message ready to hand to SMTP."""
+
+    __slots__ = ("category", "template_hash", "recipient", "subject", "body", "data")
+
+    def __init__(
+        self,
+        category: str,
+        template_hash: str,
+        recipient: str,
+        subject: str,
+        body: str,
+        data: str,
+    ):
+        self.category = category
+        self.template_hash = template_hash
+        self.recipient = recipient
+        self.subject = subject
+        self.body = body
+        self.data = data
+
+
+def _serialize(from_line: str, recipient: str, subject_header: str, body: str) -> str:
+    """Build a text/plain MIME message without going through the email package."""
+    if body.isascii():
+        headers, payload = _ASCII_HEADERS, body
+    else:
+        headers = _UTF8_HEADERS
+        payload = base64mime.body_encode(body.encode("utf-8"))
+    return f"{headers}{from_line}To: {recipient}\nSubject: {subject_header}\n\n{payload}"
+
+
+class TemplateSet:
+    """Compiled templates per category, optionally overridden by files on disk.
+
+    A template directory holds one '<category>.txt' file per category to
+    override; missing categories use the built-in templates. Edited files
+    are picked up by reload_if_changed without restarting the program.
+    """
+
+    def __init__(self, templates: Dict[str, str], directory: Optional[str] = None):
+        self.defaults = templates
+        self.directory = directory
+        self._mtimes: Dict[str, float] = {}
+        self.compiled: Dict[str, CompiledTemplate] = {
+            category: CompiledTemplate(text) for category, text in templates.items()
+        }
+        self.reload_if_changed()
+
+    def _template_files(self) -> Dict[str, str]:
+        if not self.directory or not os.path.isdir(self.directory):
+            return {}
+        return {
+            name[: -len(TEMPLATE_SUFFIX)]: os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(TEMPLATE_SUFFIX)
+        }
+
+    def reload_if_changed(self) -> bool:
+        """Recompile any template file that was added, edited or removed."""
+        files = self._template_files()
+        mtimes = {category: os.stat(path).st_mtime_ns for category, path in files.items()}
+        if mtimes == self._mtimes:
+            return False
+
+        for category in set(self._mtimes) - set(mtimes):
+            # Override removed: fall back to the built-in template
+            if category in self.defaults:
+                self.compiled[category] = CompiledTemplate(self.defaults[category])
+            else:
+                self.compiled.pop(category, None)
+        for category, mtime in mtimes.items():
+            if self._mtimes.get(category) != mtime:
+                with open(files[category], encoding="utf-8") as f:
+                    self.compiled[category] = CompiledTemplate(f.read())
+
+        self._mtimes = mtimes
+        return True
+
+    def __getitem__(self, category: str) -> CompiledTemplate:
+        return self.compiled[category]
+
+    def fields_used(self) -> Set[str]:
+        """Student fields referred to by any of the templates."""
+        return set().union(*(template.fields for template in self.compiled.values()))
+
+    def render_batch(
+        self, sender_email: str, jobs: Iterable[Tuple[str, str, Dict]]
+    ) -> Iterator[Tuple[Optional[RenderedMessage], Optional[Exception]]]:
+        """Render (category, recipient, fields) jobs into messages.
+
+        Yields (message, None) for each rendered message, or (None, error)
+        when a template could not be filled in for that student.
+        """
+        from_line = f"From: {encode_header(sender_email)}\n"
+        for category, recipient, fields in jobs:
+            try:
+                template = self.compiled[category]
+                subject, subject_header, body = template.render(fields)
+            except Exception as e:
+                yield None, e
+                continue
+            yield RenderedMessage(
+                category,
+                template.digest,
+                recipient,
+                subject,
+                body,
+                _serialize(from_line, recipient, subject_header, body),
+            ), None
+
+    def render_all(
+        self, sender_email: str, jobs: Iterable[Tuple[str, str, Dict]]
+    ) -> List[Tuple[Optional[RenderedMessage], Optional[Exception]]]:
+        """Render a whole roster at once; see render_batch."""
+        return list(self.render_batch(sender_email, jobs))
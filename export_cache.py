@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Export Cache
+Stores cleaned Gradescope exports on disk, keyed by a hash of the CSV's
+contents, so unchanged exports skip CSV parsing and cleaning entirely.
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from gradescope_ingest import CORE_COLUMNS, ID_COLUMNS, TIMING_COLUMNS
+
+# Bump whenever the cleaned frame layout or cleaning rules change
+CACHE_SCHEMA_VERSION = 4
+
+DEFAULT_CACHE_DIR = ".gradescope_cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE_DAYS = 30
+
+_COLUMNS_KEY = "__columns__"
+_INDEX_KEY = "__index__"
+
+
+class ExportCache:
+    """Content-addressed cache of cleaned export frames in NumPy .npz files."""
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+
+    def key(self, csv_path: str) -> str:
+        """Hash the export's contents together with the cache schema."""
+        digest = hashlib.sha256()
+        digest.update(
+            f"v{CACHE_SCHEMA_VERSION}:"
+            f"{','.join(CORE_COLUMNS + ID_COLUMNS + TIMING_COLUMNS)}".encode()
+        )
+        with open(csv_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def load(self, key: str) -> Optional[pd.DataFrame]:
+        """Return the cached frame for a key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                columns = data[_COLUMNS_KEY].tolist()
+                frame = pd.DataFrame(
+                    {column: data[f"c{i}"] for i, column in enumerate(columns)},
+                    index=data[_INDEX_KEY],
+                )
+        except (OSError, KeyError, ValueError):
+            return None
+
+        # Refresh the timestamp so eviction drops the least recently used entries
+        os.utime(path)
+        return frame
+
+    def store(self, key: str, frame: pd.DataFrame):
+        """Write a cleaned frame to the cache, then enforce the size and age limits."""
+        os.makedirs(self.directory, exist_ok=True)
+        arrays = {
+            _COLUMNS_KEY: np.array(frame.columns, dtype=str),
+            _INDEX_KEY: frame.index.to_numpy(),
+        }
+        for i, column in enumerate(frame.columns):
+            values = frame[column]
+            if values.dtype.kind in "biuf":
+                arrays[f"c{i}"] = values.to_numpy()
+            else:
+                arrays[f"c{i}"] = values.to_numpy(dtype=str)
+
+        # Write to a temporary file first so readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temp_path, self._path(key))
+
+        self.evict()
+
+    def _entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def evict(self) -> int:
+        """Remove entries older than max_age_days, then the oldest until under max_bytes."""
+        removed = 0
+        cutoff = time.time() - self.max_age_days * 86400
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+
+        for mtime, size, path in entries:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def invalidate(self, csv_path: str) -> bool:
+        """Drop the cached entry for one export, if present."""
+        path = self._path(self.key(csv_path))
+        if os.path.exists(path):
+            os.remove(path)
+            return True
+        return False
+
+    def clear(self) -> int:
+        """Remove every cached entry."""
+        entries = self._entries()
+        for _, _, path in entries:
+            os.remove(path)
+        return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the cleaned export cache.")
+    parser.add_argument("--dir", default=DEFAULT_CACHE_DIR, help="Cache directory")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("clear", help="Remove every cached export")
+    subcommands.add_parser("evict", help="Apply the size and age limits now")
+    invalidate = subcommands.add_parser("invalidate", help="Drop specific exports")
+    invalidate.add_argument("csv_files", nargs="+")
+    args = parser.parse_args()
+
+    cache = ExportCache(args.dir)
+    if args.command == "clear":
+        print(f"Removed {cache.clear()} cached exports.")
+    elif args.command == "evict":
+        print(f"Evicted {cache.evict()} cached exports.")
+    else:
+        for csv_file in args.csv_files:
+            status = "invalidated" if cache.invalidate(csv_file) else "not cached"
+            print(f"{csv_file}: {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Export Watcher
+Polls a directory of Gradescope exports and, whenever a CSV is added,
+rewritten or removed, re-reads only that file and re-analyzes, handing
+the students it affected to a callback (report, spool, snapshot, ...).
+"""
+
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from analysis_delta import (
+    CATEGORY_CHANGED,
+    DEFAULT_SCORE_THRESHOLD,
+    NEW,
+    SCORE_CHANGED,
+    AnalysisDelta,
+)
+from export_cache import ExportCache
+from gradescope_analyzer import GradescopeAnalyzer
+from metrics import Metrics
+
+EXPORT_SUFFIX = ".csv"
+
+
+def natural_key(name: str) -> List:
+    """Sort 'quiz10.csv' after 'quiz9.csv'."""
+    return [
+        int(part) if part.isdigit() else part.lower()
+        for part in re.split(r"(\d+)", name)
+    ]
+
+
+class ExportWatcher:
+    """Keeps a GradescopeAnalyzer in step with the CSVs in one directory.
+
+    Exports are ordered oldest to newest by natural sort of their file
+    names and labelled by file name, as from_exports does. Files are only
+    read once their size and modification time stop changing, so a
+    download in progress is not picked up half-written.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        on_update: Optional[Callable[[GradescopeAnalyzer, AnalysisDelta], None]] = None,
+        cache: Optional[ExportCache] = None,
+        metrics: Optional[Metrics] = None,
+        score_threshold: float = DEFAULT_SCORE_THRESHOLD,
+        poll_interval: float = 0.2,
+        settle_time: float = 0.1,
+    ):
+        self.directory = directory
+        self.on_update = on_update
+        self.cache = cache
+        self.metrics = metrics
+        self.score_threshold = score_threshold
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+
+        self.analyzer: Optional[GradescopeAnalyzer] = None
+        self.last_changed: List[str] = []
+        self.last_update_seconds = 0.0
+        self._seen: Dict[str, Tuple[int, int]] = {}
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        """(mtime, size) of every export in the directory, by path."""
+        files = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(EXPORT_SUFFIX) and entry.is_file():
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def _settled_scan(self, files: Dict[str, Tuple[int, int]]) -> Dict[str, Tuple[int, int]]:
+        """Rescan until nothing changes between two looks."""
+        while True:
+            time.sleep(self.settle_time)
+            again = self.scan()
+            if again == files:
+                return files
+            files = again
+
+    @staticmethod
+    def exports(paths) -> List[Tuple[str, str]]:
+        """(label, path) pairs in assessment order."""
+        ordered = sorted(paths, key=lambda path: natural_key(os.path.basename(path)))
+        return [(os.path.splitext(os.path.basename(path))[0], path) for path in ordered]
+
+    def check(self) -> Optional[AnalysisDelta]:
+        """Look for changed exports once and bring the analysis up to date.
+
+        Returns the delta against the previous analysis, or None when
+        nothing changed or on the first load.
+        """
+        files = self.scan()
+        if files == self._seen:
+            return None
+        files = self._settled_scan(files)
+        start = time.perf_counter()
+        self.last_changed = sorted(
+            (path for path, stat in files.items() if self._seen.get(path) != stat),
+            key=lambda path: natural_key(os.path.basename(path)),
+        )
+        self.last_changed += sorted(set(self._seen) - set(files))
+        self._seen = files
+        if not files:
+            print(f"No {EXPORT_SUFFIX} exports in {self.directory}")
+            return None
+
+        exports = self.exports(files)
+        if self.analyzer is None:
+            self.analyzer = GradescopeAnalyzer.from_exports(
+                exports, cache=self.cache, metrics=self.metrics
+            )
+            store = self.analyzer.analyze_student_performance()
+            self.last_update_seconds = time.perf_counter() - start
+            print(
+                f"Loaded {len(store)} students from "
+                f"{', '.join(self.analyzer.assessments)} "
+                f"in {self.last_update_seconds * 1000:.0f} ms"
+            )
+            return None
+
+        labels = {path: label for label, path in exports}
+        previous = self.analyzer.update_exports(
+            exports, changed=[labels[path] for path in self.last_changed if path in labels]
+        )
+        delta = AnalysisDelta(
+            self.analyzer.student_results, previous, self.score_threshold
+        )
+        if self.on_update is not None:
+            self.on_update(self.analyzer, delta)
+        self.last_update_seconds = time.perf_counter() - start
+
+        counts = delta.counts()
+        print(
+            f"[{datetime.now():%H:%M:%S}] "
+            f"{', '.join(os.path.basename(path) for path in self.last_changed)}: "
+            f"{int(delta.changed.sum())} students affected ({counts[NEW]} new, "
+            f"{counts[CATEGORY_CHANGED]} changed category, "
+            f"{counts[SCORE_CHANGED]} score moves) "
+            f"in {self.last_update_seconds * 1000:.0f} ms"
+        )
+        return delta
+
+    def run(self, stop: Optional[threading.Event] = None):
+        """Poll until `stop` is set (or forever); errors are reported and skipped."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                # Leave the previous analysis in place; the next change retries
+                print(f"Could not update the analysis: {e}")
+            stop.wait(self.poll_interval)
@@ -4,13 +4,17 @@ Gmail Email Test Script
 Tests email sending using Gmail SMTP with app password.
 """
 
+import argparse
+import os
 import smtplib
 import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+from smtp_credentials import PASSWORD_FILE_ENV_VAR, USER_ENV_VAR, smtp_password
 
-def send_gmail_test():
+
+def send_gmail_test(password_file=None):
     """Send a test email using Gmail SMTP."""
 
     # Gmail SMTP configuration
@@ -32,8 +36,12 @@ def send_gmail_test():
     print("   - Copy the 16-character password (like: abcd efgh ijkl mnop)")
     print()
 
-    sender_email = input("Your Gmail address: ").strip()
-    app_password = input("Gmail app password (16 characters): ").strip()
+    # Credentials from the environment skip the prompts (see smtp_credentials.py);
+    # `python gradescope_cli.py smtp-test` is the non-interactive equivalent
+    sender_email = os.environ.get(USER_ENV_VAR) or input("Your Gmail address: ").strip()
+    app_password = (
+        smtp_password(password_file) or input("Gmail app password (16 characters): ").strip()
+    )
 
     if not sender_email or not app_password:
         print("❌ Gmail address and app password are required.")
@@ -99,4 +107,10 @@ Gradescope Analyzer Test System
 
 
 if __name__ == "__main__":
-    send_gmail_test()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--password-file",
+        default=os.environ.get(PASSWORD_FILE_ENV_VAR),
+        help=f"File holding the app password (env {PASSWORD_FILE_ENV_VAR})",
+    )
+    send_gmail_test(parser.parse_args().password_file)
@@ -6,153 +6,901 @@ Analyzes student performance and sends encouraging emails via Gmail based on per
 
 import pandas as pd
 import numpy as np
-import smtplib
-import ssl
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+import io
 import json
+import re
 from datetime import datetime
+from functools import lru_cache
 import os
+import sys
+
+from analysis_delta import (
+    CATEGORY_CHANGED,
+    DEFAULT_SCORE_THRESHOLD,
+    NEW,
+    SCORE_CHANGED,
+    UNCHANGED,
+    AnalysisDelta,
+)
+from analysis_snapshot import (
+    load_snapshot,
+    nonfinite_fields,
+    null_nonfinite,
+    read_ndjson,
+    save_snapshot,
+    snapshot_format,
+    write_ndjson,
+)
+from delivery_scheduler import (
+    URGENT_FIRST,
+    DailyQuota,
+    DeliveryScheduler,
+    QuotaExceeded,
+)
+from category_rules import DEFAULT_RULES, RuleSet
+from cohort_stats import CohortStats, ordinal
+from email_templates import RenderedMessage, TemplateSet
+from export_cache import ExportCache
+from gradescope_ingest import CORE_COLUMNS, question_columns, read_export
+from item_analysis import WEAK_THRESHOLD, ItemAnalysis
+from mail_spool import MailSpool
+from metrics import DISABLED, Metrics
+from report_writer import ReportWriter, TextReportWriter
+from send_journal import FAILED, PENDING, SENT, SendJournal
+from smtp_pool import SMTPConnectionPool
+from student_identity import (
+    CONFLICT,
+    DUPLICATE,
+    NAME_MATCH,
+    IdentityKeys,
+    IdentityResolver,
+    export_keys,
+)
+from student_results import StudentResults
+from submission_timing import (
+    infer_deadline,
+    parse_deadline,
+    parse_durations,
+    parse_submission_times,
+    timing_features,
+    timing_summary,
+)
+
+
+# Performance categories, in the order they are checked and reported
+CATEGORIES = [
+    "excelling",  # High scores on the last two assessments
+    "improving",  # Low on the previous assessment, high on the latest
+    "struggling",  # Low scores on the last two assessments
+    "declining",  # High on the previous assessment, low on the latest
+    "consistent",  # Similar performance on the last two assessments
+]
+
+# Features compute_trend_features adds to every student record
+TREND_FEATURES = ["slope", "last_delta", "rolling_mean"]
+
+# Score matrix columns per export, e.g. Quiz3_Percentage
+MATRIX_SUFFIXES = [
+    "Score",
+    "Percentage",
+    "HoursLate",
+    "HoursBeforeDeadline",
+    "Views",
+    "Submissions",
+]
+
+# Per-assessment submission fields (e.g. quiz3_hours_late) with their score
+# matrix columns (e.g. Quiz3_HoursLate), and the timing summary fields
+SUBMISSION_FIELDS = {
+    "hours_late": "HoursLate",
+    "hours_before_deadline": "HoursBeforeDeadline",
+    "views": "Views",
+    "submissions": "Submissions",
+}
+TIMING_FEATURES = ["hours_late", "hours_before_deadline", "late_count", "last_minute_count"]
+# Timing fields that are unknown (NaN) when an assessment's deadline is unknown
+DEADLINE_FIELDS = {"hours_before_deadline", "last_minute_count"}
+
+# Labels used by the original two-quiz constructor, oldest first
+DEFAULT_ASSESSMENTS = ["Quiz 2", "Quiz 3"]
+
+# Gradescope exports scores with at most this many decimal places
+SCORE_DECIMALS = 4
+
+# Outbox journal used by main() so interrupted sends can be resumed
+SEND_JOURNAL_FILE = "send_journal.jsonl"
+
+# Gmail accounts may send to about 500 recipients a day; main() stays under it
+GMAIL_DAILY_QUOTA = 500
+SEND_QUOTA_FILE = "send_quota.json"
+
+# Set to a file prefix to have main() write <prefix>.json and <prefix>.prom
+METRICS_ENV_VAR = "GRADESCOPE_METRICS"
+
+# Students converted to Python values at a time while streaming the report
+REPORT_BATCH_SIZE = 4096
+
+
+def column_prefix(label: str) -> str:
+    """Score matrix column prefix for an assessment label ("Quiz 2" -> "Quiz2")."""
+    return re.sub(r"\W+", "", label)
+
+
+@lru_cache(maxsize=None)
+def student_key(label: str) -> str:
+    """Student record key prefix for an assessment label ("Quiz 2" -> "quiz2")."""
+    return column_prefix(label).lower()
+
+
+def compute_trend_features(
+    percentages: np.ndarray, window: int = 3
+) -> Dict[str, np.ndarray]:
+    """Compute per-student trend features over a students x assessments matrix.
+
+    Returns the least-squares slope across all assessments, the change between
+    the last two assessments and the mean of the last `window` assessments.
+    """
+    num_students, num_assessments = percentages.shape
+
+    if num_assessments > 1:
+        x = np.arange(num_assessments, dtype=float)
+        x -= x.mean()
+        slope = (percentages @ x) / (x @ x)
+        last_delta = percentages[:, -1] - percentages[:, -2]
+    else:
+        slope = np.zeros(num_students)
+        last_delta = np.zeros(num_students)
 
+    rolling_mean = percentages[:, -max(1, window) :].mean(axis=1)
 
-class GradescopeAnalyzer:
-    def __init__(self, three_scores_file: str, two_scores_file: str):
-        """Initialize the analyzer with CSV files."""
-        self.three_scores = pd.read_csv(three_scores_file)
-        self.two_scores = pd.read_csv(two_scores_file)
-        self.student_analysis = {}
+    return {"slope": slope, "last_delta": last_delta, "rolling_mean": rolling_mean}
 
-    def clean_data(self):
-        """Clean and prepare the data for analysis."""
-        # Remove rows with missing names or emails
-        self.three_scores = self.three_scores.dropna(subset=["Name", "Email"])
-        self.two_scores = self.two_scores.dropna(subset=["Name", "Email"])
 
-        # Convert scores to numeric, handling any non-numeric values
-        self.three_scores["Total Score"] = pd.to_numeric(
-            self.three_scores["Total Score"], errors="coerce"
-        )
-        self.two_scores["Total Score"] = pd.to_numeric(
-            self.two_scores["Total Score"], errors="coerce"
-        )
+def category_features(
+    percentages: np.ndarray, timing: Optional[Dict[str, np.ndarray]] = None
+) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Per-student features the category rules can refer to, and who has any score.
 
-        # Calculate percentages
-        self.three_scores["Percentage"] = (
-            self.three_scores["Total Score"] / self.three_scores["Max Points"]
-        ) * 100
-        self.two_scores["Percentage"] = (
-            self.two_scores["Total Score"] / self.two_scores["Max Points"]
-        ) * 100
+    previous and latest are the last two percentages; trend is the change
+    between them, or the latest score when the previous one wasn't taken;
+    improvement is the same change but 0 in that case. The trend features
+    are included too, and the timing features when given.
+    """
+    latest_pct = percentages[:, -1]
+    if percentages.shape[1] > 1:
+        previous_pct = percentages[:, -2]
+    else:
+        previous_pct = np.zeros(len(percentages))
+
+    # Skip students with no valid scores
+    valid = ~((previous_pct == 0) & (latest_pct == 0))
+
+    # Reported improvement is only meaningful when the previous assessment
+    # was taken, but categorization treats a missing one as a jump from zero
+    took_previous = previous_pct > 0
+    delta = latest_pct - previous_pct
+    features = {
+        "previous": previous_pct,
+        "latest": latest_pct,
+        "trend": np.where(took_previous, delta, latest_pct),
+        "improvement": np.where(took_previous, delta, 0.0),
+    }
+    features.update(compute_trend_features(percentages))
+    features.update(timing or {})
+    return features, valid
+
+
+def has_submission_fields(columns: Mapping[str, np.ndarray], assessments: List[str]) -> bool:
+    """Whether results include submission timing (older snapshots don't)."""
+    return all(
+        f"{student_key(label)}_{field}" in columns
+        for label in assessments
+        for field in SUBMISSION_FIELDS
+    )
+
+
+def student_timing_features(
+    columns: Mapping[str, np.ndarray], assessments: List[str]
+) -> Dict[str, np.ndarray]:
+    """Timing features (see submission_timing.timing_features) from per-assessment fields."""
+    if not has_submission_fields(columns, assessments):
+        return {}
+    keys = [student_key(label) for label in assessments]
+    return timing_features(
+        *(
+            np.column_stack([columns[f"{key}_{field}"] for key in keys]).astype(float)
+            for field in SUBMISSION_FIELDS
+        )
+    )
 
-    def analyze_student_performance(self):
-        """Analyze individual student performance and categorize them."""
-        self.clean_data()
 
-        # Merge the two datasets on Name and Email
-        merged_data = pd.merge(
-            self.three_scores[["Name", "Email", "Total Score", "Percentage"]].rename(
-                columns={"Total Score": "Quiz3_Score", "Percentage": "Quiz3_Percentage"}
-            ),
-            self.two_scores[["Name", "Email", "Total Score", "Percentage"]].rename(
-                columns={"Total Score": "Quiz2_Score", "Percentage": "Quiz2_Percentage"}
-            ),
-            on=["Name", "Email"],
-            how="outer",
+class GradescopeAnalyzer:
+    def __init__(
+        self,
+        three_scores_file: str,
+        two_scores_file: str,
+        chunksize: Optional[int] = None,
+        cache: Optional[ExportCache] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        """Initialize the analyzer with the Quiz 3 and Quiz 2 CSV files."""
+        self._load_exports(
+            [("Quiz 2", two_scores_file), ("Quiz 3", three_scores_file)],
+            chunksize,
+            cache,
+            metrics,
         )
 
-        # Fill missing values with 0 for students who didn't take a quiz
-        merged_data = merged_data.fillna(0)
+    @classmethod
+    def from_exports(
+        cls,
+        exports: List[Union[str, Tuple[str, str]]],
+        chunksize: Optional[int] = None,
+        cache: Optional[ExportCache] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> "GradescopeAnalyzer":
+        """Create an analyzer from any number of exports, ordered oldest to newest.
+
+        Each export is either a CSV path (labelled by its file name) or a
+        (label, csv_path) pair. Set `chunksize` to parse very large exports
+        in pieces, and pass an ExportCache to reuse previously cleaned exports.
+        Pass a Metrics instance to record phase timings and SMTP latencies.
+        """
+        analyzer = cls.__new__(cls)
+        analyzer._load_exports(
+            [
+                export
+                if isinstance(export, tuple)
+                else (os.path.splitext(os.path.basename(export))[0], export)
+                for export in exports
+            ],
+            chunksize,
+            cache,
+            metrics,
+        )
+        return analyzer
 
-        # Categorize students
-        categories = {
-            "excelling": [],  # High scores on both quizzes
-            "improving": [],  # Low on quiz 2, high on quiz 3
-            "struggling": [],  # Low scores on both quizzes
-            "declining": [],  # High on quiz 2, low on quiz 3
-            "consistent": [],  # Similar performance on both quizzes
+    def _load_exports(
+        self,
+        exports: List[Tuple[str, str]],
+        chunksize: Optional[int] = None,
+        cache: Optional[ExportCache] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        if not exports:
+            raise ValueError("At least one Gradescope export is required.")
+
+        self.assessments = [label for label, _ in exports]
+        if len(set(map(column_prefix, self.assessments))) != len(self.assessments):
+            raise ValueError(f"Assessment labels must be unique: {self.assessments}")
+
+        self.cache = cache
+        self.metrics = metrics or DISABLED
+        self.export_paths = dict(exports)
+        self.exports = {}
+        self._cache_keys = {}
+        self._cleaned = set()
+        self._identity_keys = {}
+        self._name_ranks = {}
+        with self.metrics.span("ingest"):
+            for label, path in exports:
+                self._read_export(label, path, chunksize)
+
+        self.score_matrix = None
+        self.identity_issues = []
+        self.unknown_deadlines = []
+        self._warned_deadlines = set()
+        self.item_analysis = None
+        self.student_results = None
+        self._cohort_stats = None
+        self.rules = DEFAULT_RULES
+        self.deadlines = {}
+        self.templates = TemplateSet(self.get_email_templates())
+
+    def _read_export(self, label: str, path: str, chunksize: Optional[int] = None):
+        self._cleaned.discard(label)
+        if self.cache is not None:
+            key = self._cache_keys[label] = self.cache.key(path)
+            cached = self.cache.load(key)
+            if cached is not None:
+                # Cached exports are stored already cleaned
+                self.exports[label] = cached
+                self._cleaned.add(label)
+                return
+        self.exports[label] = read_export(path, chunksize=chunksize)
+
+    def update_exports(
+        self,
+        exports: List[Tuple[str, str]],
+        changed: Iterable[str] = (),
+        chunksize: Optional[int] = None,
+    ) -> Optional[StudentResults]:
+        """Re-analyze after exports were added, removed or rewritten.
+
+        `exports` is the full new (label, path) list, oldest first. Only the
+        labels in `changed` and exports not loaded before are read and
+        cleaned again; the rest are reused as they are. The join and
+        categorization then run over everything, which is far cheaper than
+        parsing the unchanged CSVs again. Returns the results from before
+        the update, e.g. for an AnalysisDelta.
+        """
+        labels = [label for label, _ in exports]
+        if not labels:
+            raise ValueError("At least one Gradescope export is required.")
+        if len(set(map(column_prefix, labels))) != len(labels):
+            raise ValueError(f"Assessment labels must be unique: {labels}")
+
+        changed = set(changed)
+        with self.metrics.span("ingest"):
+            for label, path in exports:
+                if label in changed or label not in self.exports:
+                    self._read_export(label, path, chunksize)
+
+        self.exports = {label: self.exports[label] for label in labels}
+        self._cleaned &= set(labels)
+        self._cache_keys = {
+            label: key for label, key in self._cache_keys.items() if label in self.exports
+        }
+        self._identity_keys = {
+            label: keys
+            for label, keys in self._identity_keys.items()
+            if label in self.exports
+        }
+        self._name_ranks = {
+            label: ranks for label, ranks in self._name_ranks.items() if label in self.exports
         }
+        self.assessments = labels
+        self.export_paths = dict(exports)
+        self.score_matrix = None
+        self.item_analysis = None
+
+        previous = self.student_results
+        cohort_stats = self._cohort_stats
+        self.analyze_student_performance()
+        if previous is not None and cohort_stats is not None:
+            # Fold in just the scores that were added, changed or removed
+            with self.metrics.span("cohort"):
+                cohort_stats.update(
+                    previous,
+                    self.student_results,
+                    self.assessments,
+                    {label: f"{student_key(label)}_percentage" for label in self.assessments},
+                )
+            self._cohort_stats = cohort_stats
+        return previous
+
+    def load_templates(self, directory: str) -> TemplateSet:
+        """Override templates with '<category>.txt' files from a directory.
+
+        The files are re-read whenever they change, so edits apply to the
+        next send without restarting.
+        """
+        self.templates = TemplateSet(self.get_email_templates(), directory)
+        return self.templates
 
-        for _, student in merged_data.iterrows():
-            name = student["Name"]
-            email = student["Email"]
-            quiz2_pct = student["Quiz2_Percentage"]
-            quiz3_pct = student["Quiz3_Percentage"]
+    def clean_data(self):
+        """Clean and prepare the data for analysis."""
+        with self.metrics.span("clean"):
+            self._clean_exports()
 
-            # Skip students with no valid scores
-            if quiz2_pct == 0 and quiz3_pct == 0:
+    def _clean_exports(self):
+        for label, scores in self.exports.items():
+            if label in self._cleaned:
                 continue
 
-            student_data = {
-                "name": name,
-                "email": email,
-                "quiz2_score": student["Quiz2_Score"],
-                "quiz2_percentage": quiz2_pct,
-                "quiz3_score": student["Quiz3_Score"],
-                "quiz3_percentage": quiz3_pct,
-                "improvement": quiz3_pct - quiz2_pct if quiz2_pct > 0 else 0,
+            # Remove rows with missing names or emails
+            scores = scores.dropna(subset=["Name", "Email"])
+            # Emails are matched trimmed, so show and send to them trimmed too
+            scores["Email"] = scores["Email"].str.strip()
+            if "SID" in scores:
+                scores["SID"] = scores["SID"].fillna("")
+
+            # Convert scores to numeric, handling any non-numeric values.
+            # Scores are stored as float32, so round them back to the exported
+            # precision before doing double precision arithmetic on them.
+            for column in ["Total Score", "Max Points"]:
+                scores[column] = (
+                    pd.to_numeric(scores[column], errors="coerce")
+                    .astype("float64")
+                    .round(SCORE_DECIMALS)
+                )
+
+            # Calculate percentages
+            scores["Percentage"] = (scores["Total Score"] / scores["Max Points"]) * 100
+
+            # Submission times become epoch seconds and lateness becomes
+            # seconds; the text is dropped once parsed
+            for column, parse, name in [
+                ("Submission Time", parse_submission_times, "Submitted"),
+                ("Lateness (H:M:S)", parse_durations, "Lateness"),
+            ]:
+                scores[name] = parse(scores[column]) if column in scores else np.nan
+            scores = scores.drop(
+                columns=[
+                    column
+                    for column in ["Submission Time", "Lateness (H:M:S)"]
+                    if column in scores
+                ]
+            )
+            for column in ["View Count", "Submission Count"]:
+                scores[column] = scores[column].astype("float64") if column in scores else np.nan
+
+            self.exports[label] = scores
+            self._cleaned.add(label)
+            if self.cache is not None:
+                self.cache.store(self._cache_keys[label], scores)
+
+    def build_score_matrix(self) -> pd.DataFrame:
+        """Join every export into one wide students x assessments score matrix."""
+        with self.metrics.span("merge"):
+            return self._join_exports()
+
+    def _join_exports(self) -> pd.DataFrame:
+        # Resolve every export's rows to student ids through indexes of hashed
+        # SIDs, emails and names, then scatter each export's scores into columns
+        resolver = IdentityResolver()
+        resolved = []
+        for label, scores in self.exports.items():
+            ids = resolver.resolve(
+                label,
+                scores["Name"].array,
+                scores["Email"].array,
+                keys=self._export_keys(label, scores),
+            )
+            # A student should appear once per export; keep their latest row
+            keep = np.flatnonzero(~pd.Series(ids).duplicated(keep="last").to_numpy())
+            resolved.append((label, scores, ids[keep], keep))
+        # Free the hash indexes before the score columns are allocated
+        count, issues, counts = resolver.count, resolver.issues, resolver.issue_counts()
+        del resolver
+
+        # A student's name and email are shown as in the latest export they appear in
+        latest_export = np.zeros(count, dtype=np.intp)
+        latest_row = np.zeros(count, dtype=np.intp)
+        for position, (_, _, ids, rows) in enumerate(resolved):
+            latest_export[ids] = position
+            latest_row[ids] = rows
+        students = [
+            np.flatnonzero(latest_export == position) for position in range(len(resolved))
+        ]
+        del latest_export
+        names, emails = (
+            pd.concat(
+                [
+                    scores[key].take(latest_row[students[position]])
+                    for position, (_, scores, _, _) in enumerate(resolved)
+                ],
+                ignore_index=True,
+            ).array
+            for key in ["Name", "Email"]
+        )
+
+        # Rows sort alphabetically by name, then email; `where` maps a student
+        # id to its row. When every student was last seen in the same export
+        # (the usual case) its cached ranks avoid sorting the strings again.
+        latest = [position for position, rows in enumerate(students) if len(rows)]
+        if len(latest) == 1:
+            label, scores, _, _ = resolved[latest[0]]
+            ranks = self._name_rank(label, scores)[latest_row[students[latest[0]]]]
+            order = np.argsort(ranks, kind="stable")
+        else:
+            order = np.lexsort((emails.to_numpy(dtype=object), names.to_numpy(dtype=object)))
+        where = np.empty(count, dtype=np.intp)
+        where[np.concatenate(students)[order]] = np.arange(count)
+        names, emails = names.take(order), emails.take(order)
+        del students, latest_row, order
+
+        # Every score column is written straight into one float block
+        columns = [
+            f"{column_prefix(label)}_{suffix}"
+            for label, _, _, _ in resolved
+            for suffix in MATRIX_SUFFIXES
+        ]
+        block = np.empty((count, len(columns)), order="F")
+        unknown_deadlines = []
+        for position, (label, scores, export_ids, rows) in enumerate(resolved):
+            submitted = scores["Submitted"].to_numpy(dtype=np.float64)
+            lateness = scores["Lateness"].to_numpy(dtype=np.float64)
+            deadline = self.deadlines.get(label, infer_deadline(submitted, lateness))
+            if np.isnan(deadline) and not np.isnan(submitted).all():
+                unknown_deadlines.append(label)
+            export_rows = where[export_ids]
+            sources = {
+                "Score": (scores["Total Score"].to_numpy(dtype=np.float64), 0.0),
+                "Percentage": (scores["Percentage"].to_numpy(dtype=np.float64), 0.0),
+                "HoursLate": (lateness / 3600, 0.0),
+                "HoursBeforeDeadline": ((deadline - submitted) / 3600, np.nan),
+                "Views": (scores["View Count"].to_numpy(dtype=np.float64), 0.0),
+                "Submissions": (scores["Submission Count"].to_numpy(dtype=np.float64), 0.0),
             }
+            export_columns = block[:, position * len(MATRIX_SUFFIXES) :].T
+            for suffix, values in zip(MATRIX_SUFFIXES, export_columns):
+                # Fill with 0 (or NaN for unknown times) for students who didn't take a quiz
+                export_values, fill = sources[suffix]
+                values.fill(fill)
+                values[export_rows] = export_values[rows]
+                if not np.isnan(fill):
+                    values[np.isnan(values)] = fill
+        matrix = pd.DataFrame(block, columns=columns, copy=False)
+        matrix.insert(0, "Email", emails)
+        matrix.insert(0, "Name", names)
+
+        self.unknown_deadlines = unknown_deadlines
+        self.identity_issues = issues
+        if issues:
+            # On stderr, so a report written to stdout stays intact
+            print(
+                f"Identity check: {counts[DUPLICATE]} duplicate rows, "
+                f"{counts[CONFLICT]} SID/email conflicts, "
+                f"{counts[NAME_MATCH]} name-only matches",
+                file=sys.stderr,
+            )
 
-            # Categorize based on performance patterns
-            # Calculate improvement for better categorization
-            improvement = quiz3_pct - quiz2_pct if quiz2_pct > 0 else quiz3_pct
-
-            if quiz2_pct >= 85 and quiz3_pct >= 85:
-                categories["excelling"].append(student_data)
-            elif improvement >= 15 or (quiz2_pct < 70 and quiz3_pct >= 75):
-                # Significant improvement: 15+ point improvement OR low quiz2 but good quiz3
-                categories["improving"].append(student_data)
-            elif quiz2_pct < 60 and quiz3_pct < 60:
-                # Both scores are low
-                categories["struggling"].append(student_data)
-            elif quiz2_pct >= 75 and quiz3_pct < 60:
-                # High quiz2 but low quiz3
-                categories["declining"].append(student_data)
-            else:
-                # Similar performance or moderate changes
-                categories["consistent"].append(student_data)
-
-        self.student_analysis = categories
-        return categories
+        self.score_matrix = matrix
+        return matrix
 
-    def generate_analysis_report(self) -> str:
-        """Generate a comprehensive analysis report."""
-        if not self.student_analysis:
-            self.analyze_student_performance()
+    def _export_keys(self, label: str, scores: pd.DataFrame) -> IdentityKeys:
+        """A cleaned export's normalized identity keys, kept until it changes.
 
-        report = []
-        report.append("=" * 60)
-        report.append("GRADESCOPE PERFORMANCE ANALYSIS REPORT")
-        report.append("=" * 60)
-        report.append(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        report.append("")
+        Normalizing names and emails is most of the join's cost, so when only
+        one export changes (see update_exports) the others reuse theirs.
+        """
+        cached = self._identity_keys.get(label)
+        if cached is not None and cached[0] is scores:
+            return cached[1]
+        keys = export_keys(
+            scores["Name"], scores["Email"], scores["SID"] if "SID" in scores else None
+        )
+        self._identity_keys[label] = (scores, keys)
+        return keys
+
+    def _name_rank(self, label: str, scores: pd.DataFrame) -> np.ndarray:
+        """Each row's rank by (name, email) in a cleaned export, kept until it changes.
+
+        Rows with the same name and email share a rank, so sorting students
+        by it orders ties as lexsort on the strings would.
+        """
+        cached = self._name_ranks.get(label)
+        if cached is not None and cached[0] is scores:
+            return cached[1]
+        names = scores["Name"].to_numpy(dtype=object)
+        emails = scores["Email"].to_numpy(dtype=object)
+        order = np.lexsort((emails, names))
+        names, emails = names[order], emails[order]
+        changed = (names[1:] != names[:-1]) | (emails[1:] != emails[:-1])
+        ranks = np.empty(len(order), dtype=np.intp)
+        ranks[order] = np.concatenate([[0], np.cumsum(changed)])
+        self._name_ranks[label] = (scores, ranks)
+        return ranks
+
+    def analyze_student_performance(self) -> StudentResults:
+        """Analyze individual student performance and categorize them."""
+        self.clean_data()
+        merged_data = self.build_score_matrix()
+        self.warn_unknown_deadlines(self.rules.features_used())
 
-        # Summary statistics
-        total_students = sum(
-            len(students) for students in self.student_analysis.values()
+        with self.metrics.span("categorize"):
+            self.student_results = self.categorize_students(
+                merged_data, self.assessments, self.rules
+            )
+        self._cohort_stats = None
+        return self.student_results
+
+    def warn_unknown_deadlines(self, fields: Iterable[str]):
+        """Warn if `fields` (rule features or template fields) need a missing deadline.
+
+        Each assessment is warned about at most once per analyzer, and only
+        when hours before the deadline or last-minute counts are used.
+        """
+        if not any(
+            field in DEADLINE_FIELDS or field.endswith("_hours_before_deadline")
+            for field in fields
+        ):
+            return
+        labels = [label for label in self.unknown_deadlines if label not in self._warned_deadlines]
+        if not labels:
+            return
+        self._warned_deadlines.update(labels)
+        # On stderr, so a report written to stdout stays intact
+        print(
+            f"Warning: no deadline for {', '.join(labels)} (no late submissions "
+            "to infer it from), so hours before the deadline and last-minute "
+            "counts are unknown. Give it with --deadline LABEL=TIME or "
+            "set_deadline().",
+            file=sys.stderr,
         )
-        report.append(f"Total Students Analyzed: {total_students}")
-        report.append("")
-
-        # Category breakdown
-        for category, students in self.student_analysis.items():
-            if students:
-                report.append(
-                    f"{category.upper()} STUDENTS ({len(students)} students):"
+
+    @property
+    def cohort_stats(self) -> CohortStats:
+        """Per-assessment distribution statistics, computed on first use."""
+        if self._cohort_stats is None:
+            store = self._ensure_analyzed()
+            with self.metrics.span("cohort"):
+                self._cohort_stats = CohortStats.from_results(
+                    store,
+                    self.assessments,
+                    [f"{student_key(label)}_percentage" for label in self.assessments],
                 )
-                report.append("-" * 40)
+        return self._cohort_stats
 
-                for student in students:
-                    report.append(f"• {student['name']} ({student['email']})")
-                    if student["quiz2_percentage"] > 0:
-                        report.append(f"  Quiz 2: {student['quiz2_percentage']:.1f}%")
-                    if student["quiz3_percentage"] > 0:
-                        report.append(f"  Quiz 3: {student['quiz3_percentage']:.1f}%")
-                    if student["improvement"] != 0:
-                        report.append(f"  Improvement: {student['improvement']:+.1f}%")
-                    report.append("")
+    def _ensure_analyzed(self) -> StudentResults:
+        if self.student_results is None:
+            self.analyze_student_performance()
+        return self.student_results
+
+    @property
+    def student_analysis(self) -> Dict[str, List[Dict]]:
+        """Results as {category: [student dict, ...]}, built from student_results.
+
+        Kept for compatibility; new code should use student_results, which
+        doesn't allocate a dict per student.
+        """
+        if self.student_results is None:
+            return {}
+        return self.student_results.to_dict()
+
+    @student_analysis.setter
+    def student_analysis(self, value):
+        if value and not isinstance(value, StudentResults):
+            value = StudentResults.from_dict(value)
+        self.student_results = value or None
+        self._cohort_stats = None
+
+    @staticmethod
+    def categorize_students(
+        merged_data: pd.DataFrame,
+        assessments: List[str] = DEFAULT_ASSESSMENTS,
+        rules: RuleSet = DEFAULT_RULES,
+    ) -> StudentResults:
+        """Categorize students on their last two assessments with compiled rule masks."""
+        prefixes = [column_prefix(label) for label in assessments]
+        percentages = merged_data[
+            [f"{prefix}_Percentage" for prefix in prefixes]
+        ].to_numpy(dtype=float)
+
+        columns = {
+            "name": merged_data["Name"].to_numpy(),
+            "email": merged_data["Email"].to_numpy(),
+        }
+        for label, prefix, values in zip(assessments, prefixes, percentages.T):
+            key = student_key(label)
+            columns[f"{key}_score"] = merged_data[f"{prefix}_Score"].to_numpy(
+                dtype=float
+            )
+            columns[f"{key}_percentage"] = values
+        # Submission timing, when the score matrix has it
+        for label, prefix in zip(assessments, prefixes):
+            for field, suffix in SUBMISSION_FIELDS.items():
+                if f"{prefix}_{suffix}" in merged_data:
+                    columns[f"{student_key(label)}_{field}"] = merged_data[
+                        f"{prefix}_{suffix}"
+                    ].to_numpy(dtype=float)
+
+        timing = student_timing_features(columns, assessments)
+        features, valid = category_features(percentages, timing)
+        codes = rules.codes(features)
+        for field in ["improvement", *TREND_FEATURES]:
+            columns[field] = features[field]
+        for field in TIMING_FEATURES if timing else []:
+            columns[field] = timing[field]
+
+        return StudentResults(
+            rules.categories,
+            codes[valid],
+            {field: values[valid] for field, values in columns.items()},
+        )
+
+    def set_deadline(self, label: str, deadline: str):
+        """Give an assessment's deadline, e.g. '2025-10-15 23:59:00 -0400'.
+
+        Exports don't include deadlines, so by default one is inferred from
+        late submissions; without any, times before the deadline are unknown.
+        Applies from the next analyze_student_performance().
+        """
+        if label not in self.assessments:
+            raise ValueError(f"Unknown assessment {label!r}; expected one of {self.assessments}")
+        self.deadlines[label] = parse_deadline(deadline)
+
+    def submission_timing(self) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+        """Per-assessment submission timing and time-before-deadline histograms.
+
+        See submission_timing.timing_summary. None for results loaded from a
+        snapshot saved without submission details.
+        """
+        store = self._ensure_analyzed()
+        if not has_submission_fields(store.columns, self.assessments):
+            return None
+        fields = {
+            field: {
+                label: store.columns[f"{student_key(label)}_{field}"].astype(float, copy=False)
+                for label in self.assessments
+            }
+            for field in ("hours_late", "hours_before_deadline", "submissions")
+        }
+        return timing_summary(
+            self.assessments,
+            fields["hours_late"],
+            fields["hours_before_deadline"],
+            fields["submissions"],
+        )
 
-        return "\n".join(report)
+    def load_rules(self, filename: str) -> RuleSet:
+        """Categorize with a JSON rule spec (see category_rules.DEFAULT_SPEC)."""
+        self.rules = RuleSet.load(filename)
+        return self.rules
+
+    def sweep_thresholds(self, grid: Mapping[str, Iterable[float]]) -> pd.DataFrame:
+        """Category counts for every combination of the threshold values in `grid`.
+
+        Runs on the analyzed students (so it also works on a loaded snapshot)
+        without re-categorizing them; see RuleSet.sweep.
+        """
+        store = self._ensure_analyzed()
+        percentages = np.column_stack(
+            [store.columns[f"{student_key(label)}_percentage"] for label in self.assessments]
+        ).astype(float)
+        features, _ = category_features(
+            percentages, student_timing_features(store.columns, self.assessments)
+        )
+        return self.rules.sweep(features, {name: list(values) for name, values in grid.items()})
+
+    def analyze_items(
+        self, label: Optional[str] = None, weak_threshold: float = WEAK_THRESHOLD
+    ) -> ItemAnalysis:
+        """Run per-question item analysis on one export (the latest by default).
+
+        Afterwards the report lists each student's missed questions and
+        templates can use {missed_questions} and {weak_topics}.
+        """
+        label = label or self.assessments[-1]
+        path = self.export_paths[label]
+        with self.metrics.span("item_analysis"):
+            scores = read_export(path, CORE_COLUMNS + question_columns(path))
+            self.item_analysis = ItemAnalysis(scores, weak_threshold)
+        self.item_analysis.label = label
+        return self.item_analysis
+
+    def generate_analysis_report(self) -> str:
+        """Generate a comprehensive analysis report."""
+        buffer = io.StringIO()
+        self.write_report(TextReportWriter(buffer))
+        # The streamed report ends every line with a newline; the string does not
+        return buffer.getvalue()[:-1]
+
+    def write_report(self, *writers: ReportWriter, only: Optional[np.ndarray] = None):
+        """Stream the analysis report to one or more writers in a single pass.
+
+        Each writer formats the same events for its own sink (see
+        report_writer), so e.g. text to stdout and CSV to a file can be
+        produced together. Students are read from the column arrays
+        REPORT_BATCH_SIZE at a time, so memory doesn't grow with the roster.
+        Pass a boolean mask over student rows as `only` to report just those
+        students (e.g. AnalysisDelta.changed).
+        """
+        self._ensure_analyzed()
+
+        with self.metrics.span("report"):
+            self._stream_report(writers, only)
+
+    def _stream_report(
+        self, writers: Tuple[ReportWriter, ...], only: Optional[np.ndarray] = None
+    ):
+        store = self.student_results
+        generated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if only is None:
+            total, counts = len(store), store.counts()
+        else:
+            only = np.asarray(only, dtype=bool)
+            total = int(only.sum())
+            counts = np.bincount(store.codes[only], minlength=len(store.categories))
+            counts = dict(zip(store.categories, counts.tolist()))
+        for writer in writers:
+            writer.begin(generated, total, self.assessments)
+        cohort = self.cohort_stats
+        statistics, histograms = cohort.summary(), cohort.histograms()
+        for writer in writers:
+            writer.cohort_statistics(statistics, histograms)
+        timing = self.submission_timing()
+        if timing is not None:
+            for writer in writers:
+                writer.submission_timing(*timing)
+
+        percentage_columns = [
+            store.columns[f"{student_key(label)}_percentage"] for label in self.assessments
+        ]
+        latest = percentage_columns[-1]
+        for category, count in counts.items():
+            if not count:
+                continue
+            for writer in writers:
+                writer.category(category, count)
+            rows = store.rows(category)
+            if only is not None:
+                rows = rows[only[rows]]
+            # A slice of students at a time, so memory doesn't grow with the roster
+            for start in range(0, len(rows), REPORT_BATCH_SIZE):
+                batch = rows[start : start + REPORT_BATCH_SIZE]
+                batch_percentages = [values[batch].tolist() for values in percentage_columns]
+                # Where each student stands on the latest assessment, if they took it
+                standing = cohort.standing(self.assessments[-1], latest[batch])
+                ranks = standing["percentile_rank"].tolist()
+                z_scores = standing["z_score"].tolist()
+                took_latest = (latest[batch] > 0).tolist()
+                for student in store.students_at(batch):
+                    i = student.index
+                    percentages = [values[i] for values in batch_percentages]
+                    missed = (
+                        self.item_analysis.missed_items(student["email"])
+                        if self.item_analysis is not None
+                        else None
+                    )
+                    student_standing = (ranks[i], z_scores[i]) if took_latest[i] else None
+                    for writer in writers:
+                        writer.student(category, student, percentages, missed, student_standing)
+
+        if self.item_analysis is not None:
+            statistics = self.item_analysis.item_statistics()
+            for writer in writers:
+                writer.item_statistics(self.item_analysis.label, statistics)
+
+        for writer in writers:
+            writer.end()
+
+    def template_fields(self, student: Mapping) -> Dict:
+        """Get the placeholder values for a student's email template.
+
+        Templates compare the previous and latest assessments; every
+        per-assessment percentage is available as well (e.g. quiz2_percentage).
+        After analyze_items, {missed_questions} and {weak_topics} name the
+        questions and question groups the student did poorly on. Cohort
+        standing on the latest assessment is in {percentile_rank},
+        {percentile} ("72nd"), {z_score}, {cohort_mean}, {cohort_median} and
+        {cohort_std}, and per assessment in e.g. quiz2_percentile_rank.
+        Submission timing is in {hours_late}, {hours_before_deadline},
+        {late_count}, {last_minute_count} and e.g. {quiz2_hours_late}.
+        """
+        latest_label = self.assessments[-1]
+        previous_label = self.assessments[-2] if len(self.assessments) > 1 else ""
+        # Student dicts and StudentRow views both copy to a plain dict
+        fields = student.copy()
+        fields.update(
+            latest_label=latest_label,
+            latest_percentage=fields[f"{student_key(latest_label)}_percentage"],
+            previous_label=previous_label,
+            previous_percentage=(
+                fields[f"{student_key(previous_label)}_percentage"]
+                if previous_label
+                else 0.0
+            ),
+            missed_questions="",
+            weak_topics="",
+        )
+        # Cohort standing: per assessment, and unprefixed for the latest one
+        cohort = self.cohort_stats
+        for label in self.assessments:
+            key = student_key(label)
+            rank, z_score = cohort.stats[label].standing_of(fields[f"{key}_percentage"])
+            fields[f"{key}_percentile_rank"] = rank
+            fields[f"{key}_z_score"] = z_score
+        latest_stats = cohort.stats[latest_label]
+        fields.update(
+            percentile_rank=rank,
+            percentile=ordinal(rank),
+            z_score=z_score,
+            cohort_mean=latest_stats.mean,
+            cohort_median=latest_stats.median,
+            cohort_std=latest_stats.std,
+        )
+        if self.item_analysis is not None:
+            fields["missed_questions"] = ", ".join(
+                self.item_analysis.missed_items(fields["email"])
+            )
+            fields["weak_topics"] = ", ".join(
+                self.item_analysis.weak_topic_list(fields["email"])
+            )
+        return fields
 
     def get_email_templates(self) -> Dict[str, str]:
         """Get email templates for different student categories."""
@@ -164,7 +912,7 @@ Hi {name},
 
 I hope this email finds you well! I wanted to take a moment to recognize your outstanding performance in COMP 311.
 
-Your consistent high scores on both Quiz 2 ({quiz2_percentage:.1f}%) and Quiz 3 ({quiz3_percentage:.1f}%) demonstrate your strong understanding of the course material. Your dedication and hard work are truly commendable!
+Your consistent high scores on both {previous_label} ({previous_percentage:.1f}%) and {latest_label} ({latest_percentage:.1f}%) demonstrate your strong understanding of the course material. Your dedication and hard work are truly commendable!
 
 Keep up the excellent work, and don't hesitate to reach out if you have any questions or if you'd like to explore any topics in more depth.
 
@@ -178,7 +926,7 @@ Hi {name},
 
 I wanted to reach out and congratulate you on your significant improvement in COMP 311!
 
-I noticed that while you scored {quiz2_percentage:.1f}% on Quiz 2, you've made an impressive jump to {quiz3_percentage:.1f}% on Quiz 3 - that's a {improvement:+.1f} percentage point improvement! This shows real dedication and growth.
+I noticed that while you scored {previous_percentage:.1f}% on {previous_label}, you've made an impressive jump to {latest_percentage:.1f}% on {latest_label} - that's a {improvement:+.1f} percentage point improvement! This shows real dedication and growth.
 
 Your hard work is paying off, and I'm excited to see this positive trajectory continue. Keep up the great work!
 
@@ -194,7 +942,7 @@ Hi {name},
 
 I hope you're doing well. I wanted to reach out because I noticed you might be having some challenges with the course material.
 
-Your current scores (Quiz 2: {quiz2_percentage:.1f}%, Quiz 3: {quiz3_percentage:.1f}%) suggest there might be some concepts that need additional attention. Remember, it's completely normal to face challenges in computer science courses, and the important thing is how we address them.
+Your current scores ({previous_label}: {previous_percentage:.1f}%, {latest_label}: {latest_percentage:.1f}%) suggest there might be some concepts that need additional attention. Remember, it's completely normal to face challenges in computer science courses, and the important thing is how we address them.
 
 I'd like to offer some support:
 - Office hours are available for one-on-one help
@@ -213,12 +961,12 @@ Hi {name},
 
 I hope you're doing well. I wanted to reach out because I noticed a concerning trend in your recent quiz performance.
 
-While you did well on Quiz 2 ({quiz2_percentage:.1f}%), your Quiz 3 score ({quiz3_percentage:.1f}%) suggests there might be some challenges with the newer material.
+While you did well on {previous_label} ({previous_percentage:.1f}%), your {latest_label} score ({latest_percentage:.1f}%) suggests there might be some challenges with the newer material.
 
 This could be due to various factors - perhaps the concepts are getting more complex, or there might be external factors affecting your studies. Whatever the case, I'm here to help.
 
 I'd encourage you to:
-- Review the Quiz 3 material more thoroughly
+- Review the {latest_label} material more thoroughly
 - Attend office hours for clarification
 - Consider forming a study group
 - Reach out to me with any specific questions
@@ -235,7 +983,7 @@ Hi {name},
 
 I hope this email finds you well! I wanted to take a moment to acknowledge your consistent performance in COMP 311.
 
-Your scores show steady progress (Quiz 2: {quiz2_percentage:.1f}%, Quiz 3: {quiz3_percentage:.1f}%), which indicates a solid understanding of the course material. Consistency is a valuable trait in computer science, and you're demonstrating it well.
+Your scores show steady progress ({previous_label}: {previous_percentage:.1f}%, {latest_label}: {latest_percentage:.1f}%), which indicates a solid understanding of the course material. Consistency is a valuable trait in computer science, and you're demonstrating it well.
 
 Keep up the good work, and remember that I'm here if you have any questions or want to explore any topics further.
 
@@ -251,128 +999,312 @@ Your COMP 311 Instructor
         sender_email: str,
         sender_password: str,
         dry_run: bool = True,
+        max_messages_per_session: int = 100,
+        use_tls: bool = True,
+        workers: int = 1,
+        journal: Optional[SendJournal] = None,
+        scheduler: Optional[DeliveryScheduler] = None,
+        spool: Optional[MailSpool] = None,
+        previous: Optional[StudentResults] = None,
+        score_threshold: float = DEFAULT_SCORE_THRESHOLD,
     ) -> Dict[str, List[str]]:
-        """Send emails to students based on their performance category."""
-        if not self.student_analysis:
-            self.analyze_student_performance()
-
-        templates = self.get_email_templates()
-        results = {"sent": [], "failed": [], "skipped": []}
+        """Send emails to students based on their performance category.
+
+        With workers > 1, real sends are delivered concurrently over that many
+        pooled SMTP sessions. Results are always reported in roster order.
+        With a journal, messages it already records as sent are skipped and
+        every real delivery attempt is recorded, so a rerun resumes where an
+        interrupted one stopped.
+
+        A scheduler rate-limits real sends, retries transient failures with
+        backoff and sends priority categories first. Messages past its daily
+        quota are left unsent and listed under "deferred" for a later run.
+
+        With a spool, nothing is sent: every message is written to the spool
+        (Maildir, mbox or .eml files) in send order, to be reviewed and later
+        delivered with mail_spool.flush_spool. dry_run is ignored then.
+
+        Given the previous run's results (see analysis_delta.load_results),
+        only students who are new, changed category or whose percentages
+        moved by score_threshold points or more are emailed; the rest are
+        listed under "unchanged".
+        """
+        store = self._ensure_analyzed()
+
+        self.templates.reload_if_changed()
+        self.warn_unknown_deadlines(self.templates.fields_used())
+        results = {
+            "sent": [],
+            "failed": [],
+            "skipped": [],
+            "deferred": [],
+            "unchanged": [],
+        }
 
-        if dry_run:
+        if spool is not None:
+            print(f"SPOOL MODE - Emails will be written to {spool.path}")
+            print("=" * 50)
+            dry_run = False
+            pool = None
+        elif dry_run:
             print("DRY RUN MODE - No emails will actually be sent")
             print("=" * 50)
+            pool = None
+        else:
+            # Authenticated sessions are reused across the whole run
+            pool = SMTPConnectionPool(
+                smtp_server,
+                smtp_port,
+                sender_email,
+                sender_password,
+                size=workers,
+                max_messages_per_session=max_messages_per_session,
+                use_tls=use_tls,
+                metrics=self.metrics,
+            )
 
-        for category, students in self.student_analysis.items():
-            if not students:
-                continue
+        jobs = list(store.iter_rows())
+        names = store.field_values("name")
+        emails = store.field_values("email")
+
+        # In delta mode, students unchanged since the previous run are left out
+        changed = None
+        if previous is not None:
+            delta = AnalysisDelta(store, previous, score_threshold)
+            changed = delta.changed.tolist()
+            jobs = [(category, row) for category, row in jobs if changed[row]]
+            results["unchanged"] = [
+                f"{names[row]} ({emails[row]})"
+                for _, row in store.iter_rows()
+                if not changed[row]
+            ]
+            counts = delta.counts()
+            self.metrics.increment("emails_unchanged", counts[UNCHANGED])
+            print(
+                f"DELTA MODE - emailing {len(jobs)} of {len(store)} students; "
+                f"{counts[UNCHANGED]} sends avoided (unchanged since the previous analysis)"
+            )
+            print(
+                f"Emailing {counts[NEW]} new, {counts[CATEGORY_CHANGED]} with a new "
+                f"category and {counts[SCORE_CHANGED]} whose scores moved "
+                f"{score_threshold:g}+ points"
+            )
 
-            print(f"\nProcessing {category} students...")
+        # Render the whole roster up front from the compiled templates
+        with self.metrics.span("render"):
+            rendered = self.templates.render_all(
+                sender_email,
+                (
+                    (category, student["email"], self.template_fields(student))
+                    for category, student in store.iter_students()
+                    if changed is None or changed[student.row]
+                ),
+            )
 
-            for student in students:
+        # Messages the journal already has as delivered are not sent again
+        already_sent = [
+            journal is not None
+            and message is not None
+            and journal.is_delivered(message.recipient, message.template_hash)
+            for message, _ in rendered
+        ]
+
+        def deliver(outcome, skip):
+            message, error = outcome
+            if error is None and spool is not None and not skip:
+                spool.add(message)
+            elif error is None and not dry_run and not skip:
+                if scheduler is not None and not scheduler.reserve():
+                    return message, QuotaExceeded("daily quota reached")
+                if journal is not None:
+                    journal.record(message.recipient, message.template_hash, PENDING)
                 try:
-                    # Format the email template
-                    email_content = templates[category].format(
-                        name=student["name"],
-                        quiz2_percentage=student["quiz2_percentage"],
-                        quiz3_percentage=student["quiz3_percentage"],
-                        improvement=student["improvement"],
-                    )
-
-                    if dry_run:
-                        print(f"Would send to {student['name']} ({student['email']})")
-                        print(
-                            f"Subject: {email_content.split('Subject: ')[1].split('\\n')[0]}"
+                    # Actually send the email
+                    if scheduler is None:
+                        self._send_single_email(pool, message)
+                    else:
+                        scheduler.run(lambda: self._send_single_email(pool, message))
+                except Exception as e:
+                    if journal is not None:
+                        journal.record(
+                            message.recipient, message.template_hash, FAILED, str(e)
                         )
+                    return None, e
+                if journal is not None:
+                    journal.record(message.recipient, message.template_hash, SENT)
+            return outcome
+
+        # Priority categories go out first; results are still reported in roster order
+        if scheduler is None or dry_run or spool is not None:
+            order = None
+        else:
+            order = scheduler.order([category for category, _ in jobs])
+            if order == list(range(len(jobs))):
+                order = None
+
+        with self.metrics.span("send"):
+            executor = None
+            try:
+                if order is None:
+                    queued_rendered, queued_skip = rendered, already_sent
+                else:
+                    queued_rendered = [rendered[i] for i in order]
+                    queued_skip = [already_sent[i] for i in order]
+
+                if dry_run or workers <= 1 or spool is not None:
+                    outcomes = map(deliver, queued_rendered, queued_skip)
+                else:
+                    executor = ThreadPoolExecutor(max_workers=workers)
+                    # executor.map yields in submission order, keeping results deterministic
+                    outcomes = executor.map(deliver, queued_rendered, queued_skip)
+
+                if order is not None:
+                    by_row = [None] * len(order)
+                    for i, outcome in zip(order, outcomes):
+                        by_row[i] = outcome
+                    outcomes = by_row
+
+                current_category = None
+                for (category, row), (message, error), skip in zip(
+                    jobs, outcomes, already_sent
+                ):
+                    student = f"{names[row]} ({emails[row]})"
+                    if category != current_category:
+                        print(f"\nProcessing {category} students...")
+                        current_category = category
+
+                    if skip:
+                        self.metrics.increment("emails_skipped")
+                        results["skipped"].append(f"{student} - already sent")
+                    elif isinstance(error, QuotaExceeded):
+                        results["deferred"].append(f"{student} - {error}")
+                    elif error is not None:
+                        self.metrics.increment("emails_failed")
+                        error_msg = f"{student} - Error: {str(error)}"
+                        results["failed"].append(error_msg)
+                        print(f"Failed to send email to {names[row]}: {str(error)}")
+                    elif spool is not None:
+                        self.metrics.increment("emails_spooled")
+                        results["sent"].append(f"{student} - spooled")
+                    elif dry_run:
+                        print(f"Would send to {student}")
+                        print(f"Subject: {message.subject}")
                         print("-" * 30)
-                        results["sent"].append(
-                            f"{student['name']} ({student['email']}) - DRY RUN"
-                        )
+                        results["sent"].append(f"{student} - DRY RUN")
                     else:
-                        # Actually send the email
-                        self._send_single_email(
-                            smtp_server,
-                            smtp_port,
-                            sender_email,
-                            sender_password,
-                            student["email"],
-                            email_content,
-                        )
-                        results["sent"].append(
-                            f"{student['name']} ({student['email']})"
-                        )
-
-                except Exception as e:
-                    error_msg = (
-                        f"{student['name']} ({student['email']}) - Error: {str(e)}"
-                    )
-                    results["failed"].append(error_msg)
-                    print(f"Failed to send email to {student['name']}: {str(e)}")
+                        self.metrics.increment("emails_sent")
+                        results["sent"].append(student)
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+                if pool is not None:
+                    pool.close()
 
         return results
 
-    def _send_single_email(
-        self,
-        smtp_server: str,
-        smtp_port: int,
-        sender_email: str,
-        sender_password: str,
-        recipient_email: str,
-        email_content: str,
-    ):
-        """Send a single email."""
-        # Parse subject and body
-        lines = email_content.strip().split("\n")
-        subject = lines[0].replace("Subject: ", "")
-        body = "\n".join(lines[1:]).strip()
-
-        # Create message
-        message = MIMEMultipart()
-        message["From"] = sender_email
-        message["To"] = recipient_email
-        message["Subject"] = subject
-
-        message.attach(MIMEText(body, "plain"))
-
-        # Send email
-        context = ssl.create_default_context()
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls(context=context)
-            server.login(sender_email, sender_password)
-            server.sendmail(sender_email, recipient_email, message.as_string())
-
-    def save_analysis(self, filename: str = None):
-        """Save the analysis results to a JSON file."""
-        if not self.student_analysis:
-            self.analyze_student_performance()
+    def _send_single_email(self, pool: SMTPConnectionPool, message: RenderedMessage):
+        """Send a single pre-rendered email over a pooled SMTP session."""
+        with self.metrics.timer("email_send"):
+            pool.send(message.recipient, message.data)
+
+    def save_analysis(self, filename: str = None, format: Optional[str] = None):
+        """Save the analysis results to a file.
 
+        The format is 'json' (the default), 'snapshot' for a compact columnar
+        .npz file, or 'ndjson' for one JSON object per line. When not given,
+        it is picked from the file name's extension. Snapshot and NDJSON
+        files can be loaded back with from_snapshot.
+        """
+        store = self._ensure_analyzed()
+
+        if format is None:
+            format = snapshot_format(filename) if filename else "json"
         if filename is None:
+            extension = {"snapshot": ".npz", "ndjson": ".ndjson"}.get(format, ".json")
             filename = (
-                f"gradescope_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                f"gradescope_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                f"{extension}"
             )
 
-        with open(filename, "w") as f:
-            json.dump(self.student_analysis, f, indent=2)
+        if format == "snapshot":
+            save_snapshot(filename, store, self.assessments)
+        elif format == "ndjson":
+            with open(filename, "w") as f:
+                write_ndjson(f, store, self.assessments)
+        elif format == "json":
+            fields = nonfinite_fields(store)
+            students = store.to_dict()
+            if fields:
+                students = {
+                    category: [null_nonfinite(dict(student), fields) for student in rows]
+                    for category, rows in students.items()
+                }
+            with open(filename, "w") as f:
+                json.dump(students, f, indent=2, allow_nan=False)
+        else:
+            raise ValueError(f"Unknown analysis format: {format}")
 
         print(f"Analysis saved to {filename}")
         return filename
 
+    @classmethod
+    def from_snapshot(cls, filename: str) -> "GradescopeAnalyzer":
+        """Rebuild an analyzer's student results from a saved snapshot.
+
+        Accepts .npz snapshots and NDJSON files written by save_analysis. The
+        original exports are not read, so only the categorized results,
+        the report and emails are available; score-level analysis
+        (build_score_matrix, analyze_items) needs the CSVs.
+        """
+        if snapshot_format(filename) == "ndjson":
+            with open(filename) as f:
+                assessments, student_results = read_ndjson(f)
+        else:
+            assessments, student_results = load_snapshot(filename)
+
+        analyzer = cls.__new__(cls)
+        analyzer.assessments = assessments
+        analyzer.cache = None
+        analyzer.metrics = DISABLED
+        analyzer.export_paths = {}
+        analyzer.exports = {}
+        analyzer._cache_keys = {}
+        analyzer._cleaned = set()
+        analyzer._identity_keys = {}
+        analyzer._name_ranks = {}
+        analyzer.identity_issues = []
+        analyzer.unknown_deadlines = []
+        analyzer._warned_deadlines = set()
+        analyzer.score_matrix = None
+        analyzer.item_analysis = None
+        analyzer.student_results = student_results
+        analyzer._cohort_stats = None
+        analyzer.rules = DEFAULT_RULES
+        analyzer.deadlines = {}
+        analyzer.templates = TemplateSet(analyzer.get_email_templates())
+        return analyzer
+
 
 def main():
     """Main function to run the analysis with Gmail."""
     print("Gradescope Analysis and Email System (Gmail Version)")
     print("=" * 55)
 
-    # Initialize analyzer
-    analyzer = GradescopeAnalyzer("three-scores.csv", "two-scores.csv")
+    metrics_prefix = os.environ.get(METRICS_ENV_VAR)
+    metrics = Metrics() if metrics_prefix else None
+
+    # Initialize analyzer, reusing cleaned exports from earlier runs
+    analyzer = GradescopeAnalyzer(
+        "three-scores.csv", "two-scores.csv", cache=ExportCache(), metrics=metrics
+    )
 
     # Analyze student performance
     print("Analyzing student performance...")
-    categories = analyzer.analyze_student_performance()
+    student_results = analyzer.analyze_student_performance()
 
-    # Generate and display report
-    report = analyzer.generate_analysis_report()
-    print("\n" + report)
+    # Stream the report to the terminal as it is generated
+    print()
+    analyzer.write_report(TextReportWriter(sys.stdout))
 
     # Save analysis
     analyzer.save_analysis()
@@ -407,6 +1339,7 @@ def main():
 
         if not sender_email or not app_password:
             print("❌ Gmail address and app password are required.")
+            write_metrics(metrics, metrics_prefix)
             return
 
         # Gmail SMTP settings
@@ -415,19 +1348,39 @@ def main():
 
         confirm = (
             input(
-                f"\nSend emails to {sum(len(students) for students in categories.values())} students using Gmail? (y/N): "
+                f"\nSend emails to {len(student_results)} students using Gmail? (y/N): "
             )
             .strip()
             .lower()
         )
         if confirm == "y":
             print("\nSending emails via Gmail...")
-            results = analyzer.send_emails(
-                smtp_server, smtp_port, sender_email, app_password, dry_run=False
-            )
+            # Rerunning in the same week resumes instead of emailing students twice
+            with SendJournal(
+                SEND_JOURNAL_FILE, run_id=datetime.now().strftime("%G-W%V")
+            ) as journal:
+                results = analyzer.send_emails(
+                    smtp_server,
+                    smtp_port,
+                    sender_email,
+                    app_password,
+                    dry_run=False,
+                    journal=journal,
+                    scheduler=DeliveryScheduler(
+                        daily_quota=DailyQuota(GMAIL_DAILY_QUOTA, SEND_QUOTA_FILE),
+                        priority=URGENT_FIRST,
+                        metrics=analyzer.metrics,
+                    ),
+                )
             print(f"\nEmail sending complete!")
             print(f"Sent: {len(results['sent'])}")
             print(f"Failed: {len(results['failed'])}")
+            print(f"Skipped (already sent): {len(results['skipped'])}")
+            if results["deferred"]:
+                print(
+                    f"Deferred (daily quota reached): {len(results['deferred'])}"
+                    " - run again tomorrow to send the rest"
+                )
 
             if results["failed"]:
                 print("\nFailed emails:")
@@ -439,6 +1392,17 @@ def main():
     else:
         print("Skipping email sending.")
 
+    write_metrics(metrics, metrics_prefix)
+
+
+def write_metrics(metrics: Optional[Metrics], prefix: Optional[str]):
+    """Write collected metrics as <prefix>.json and <prefix>.prom."""
+    if metrics is None or not prefix:
+        return
+    metrics.write_json(f"{prefix}.json")
+    metrics.write_prometheus(f"{prefix}.prom")
+    print(f"Metrics saved to {prefix}.json and {prefix}.prom")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+"""
+Gradescope Analyzer CLI
+Non-interactive command line for the analysis and email system:
+
+    python gradescope_cli.py analyze [EXPORTS...] [--save FILE] [--identities]
+    python gradescope_cli.py sweep   [EXPORTS...] --vary high=80:90:1 [--rules FILE]
+    python gradescope_cli.py report  [EXPORTS...] [--format text|csv|html]
+    python gradescope_cli.py preview [EXPORTS...] [--limit N]
+    python gradescope_cli.py send    [EXPORTS...] --sender ADDRESS [--spool PATH]
+    python gradescope_cli.py flush   SPOOL --sender ADDRESS
+    python gradescope_cli.py watch   DIRECTORY [--report FILE] [--spool PATH]
+    python gradescope_cli.py smtp-test --sender ADDRESS
+
+EXPORTS are CSV paths, optionally labelled as LABEL=PATH, oldest first; they
+default to the bundled Quiz 2 and Quiz 3 files. Any command that reads
+exports can instead load a saved analysis with --snapshot.
+
+pandas, numpy and the analyzer are imported only by the subcommands that
+use them, so --help and smtp-test start in a fraction of the time.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+from smtp_credentials import USER_ENV_VAR, add_smtp_arguments, smtp_password
+
+DEFAULT_EXPORTS = ["Quiz 2=two-scores.csv", "Quiz 3=three-scores.csv"]
+
+
+def parse_export(value: str):
+    """Split 'Quiz 3=three-scores.csv' into a (label, path) pair.
+
+    Values without a label are returned unchanged and labelled by file name.
+    """
+    label, separator, path = value.partition("=")
+    return (label, path) if separator else value
+
+
+def load_analyzer(args):
+    """Build an analyzer from --snapshot or the export arguments and analyze it."""
+    from gradescope_analyzer import GradescopeAnalyzer
+
+    if args.snapshot:
+        analyzer = GradescopeAnalyzer.from_snapshot(args.snapshot)
+    else:
+        from export_cache import ExportCache
+
+        metrics = None
+        if getattr(args, "metrics", None):
+            from metrics import Metrics
+
+            metrics = Metrics()
+        analyzer = GradescopeAnalyzer.from_exports(
+            [parse_export(value) for value in args.exports or DEFAULT_EXPORTS],
+            cache=None if args.no_cache else ExportCache(),
+            metrics=metrics,
+        )
+        if args.rules:
+            analyzer.load_rules(args.rules)
+        for value in args.deadline:
+            label, _, deadline = value.partition("=")
+            analyzer.set_deadline(label, deadline)
+        analyzer.analyze_student_performance()
+        if args.items:
+            analyzer.analyze_items()
+    if args.snapshot and args.rules:
+        analyzer.load_rules(args.rules)
+    if args.templates:
+        analyzer.load_templates(args.templates)
+    return analyzer
+
+
+def write_metrics(analyzer, args):
+    if getattr(args, "metrics", None) and analyzer.metrics.enabled:
+        analyzer.metrics.write_json(f"{args.metrics}.json")
+        analyzer.metrics.write_prometheus(f"{args.metrics}.prom")
+        print(f"Metrics saved to {args.metrics}.json and {args.metrics}.prom")
+
+
+def cmd_analyze(args) -> int:
+    analyzer = load_analyzer(args)
+    store = analyzer.student_results
+    print(f"Analyzed {len(store)} students ({', '.join(analyzer.assessments)})")
+    for category, count in store.counts().items():
+        print(f"  {category:<12} {count:>6}")
+    if args.identities:
+        for issue in analyzer.identity_issues:
+            print(
+                f"  [{issue['kind']}] {issue['export']}: {issue['name']} "
+                f"<{issue['email']}> {issue['detail']}"
+            )
+    if args.save:
+        analyzer.save_analysis(args.save)
+    write_metrics(analyzer, args)
+    return 0
+
+
+def cmd_sweep(args) -> int:
+    from category_rules import parse_values
+
+    grid = {}
+    for value in args.vary:
+        name, separator, values = value.partition("=")
+        if not separator:
+            print(f"Expected NAME=VALUES, got {value!r}")
+            return 2
+        grid[name] = parse_values(values)
+    analyzer = load_analyzer(args)
+    start = time.perf_counter()
+    try:
+        results = analyzer.sweep_thresholds(grid)
+    except ValueError as e:
+        print(e)
+        return 2
+    elapsed = time.perf_counter() - start
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"Wrote {len(results)} combinations to {args.output}")
+    else:
+        print(results.to_string(index=False))
+    print(
+        f"Swept {len(results)} threshold combinations over "
+        f"{len(analyzer.student_results)} students in {elapsed * 1000:.0f} ms"
+    )
+    return 0
+
+
+def cmd_report(args) -> int:
+    from report_writer import report_writer
+
+    analyzer = load_analyzer(args)
+    if args.output:
+        newline = "" if args.format == "csv" else None
+        with open(args.output, "w", newline=newline) as f:
+            analyzer.write_report(report_writer(args.format, f))
+        print(f"Report saved to {args.output}", file=sys.stderr)
+    else:
+        analyzer.write_report(report_writer(args.format, sys.stdout))
+    return 0
+
+
+def cmd_preview(args) -> int:
+    analyzer = load_analyzer(args)
+    analyzer.templates.reload_if_changed()
+    analyzer.warn_unknown_deadlines(analyzer.templates.fields_used())
+    store = analyzer.student_results
+    rows = (
+        (category, row)
+        for category, row in store.iter_rows()
+        if not args.category or category == args.category
+    )
+    jobs = [
+        (category, store.student(row))
+        for category, row in itertools.islice(rows, args.limit)
+    ]
+    rendered = analyzer.templates.render_batch(
+        args.sender or "instructor@example.edu",
+        (
+            (category, student["email"], analyzer.template_fields(student))
+            for category, student in jobs
+        ),
+    )
+    for (category, student), (message, error) in zip(jobs, rendered):
+        print("=" * 60)
+        print(f"To: {student['name']} <{student['email']}> [{category}]")
+        if error is not None:
+            print(f"Error: {error}")
+            continue
+        print(f"Subject: {message.subject}")
+        print("-" * 60)
+        print(message.body)
+    print("=" * 60)
+    print(f"Previewed {len(jobs)} emails")
+    return 0
+
+
+def build_scheduler(args, metrics=None):
+    """A DeliveryScheduler from the pacing flags, or None when none were given."""
+    if not (args.rate or args.daily_quota or args.priority or args.max_attempts):
+        return None
+    from delivery_scheduler import DailyQuota, DeliveryScheduler
+
+    quota = None
+    if args.daily_quota:
+        quota = DailyQuota(args.daily_quota, args.quota_file)
+    return DeliveryScheduler(
+        rate=args.rate,
+        burst=args.burst,
+        daily_quota=quota,
+        priority=args.priority.split(",") if args.priority else None,
+        max_attempts=args.max_attempts or 5,
+        metrics=metrics,
+    )
+
+
+def open_journal(args):
+    """The send journal, unless --no-journal was given."""
+    if args.no_journal:
+        return None
+    from datetime import datetime
+
+    from gradescope_analyzer import SEND_JOURNAL_FILE
+    from send_journal import SendJournal
+
+    # Rerunning in the same week resumes instead of emailing students twice
+    return SendJournal(
+        args.journal or SEND_JOURNAL_FILE,
+        run_id=args.run_id or datetime.now().strftime("%G-W%V"),
+    )
+
+
+def print_results(results) -> int:
+    print(f"\nSent: {len(results['sent'])}")
+    print(f"Failed: {len(results['failed'])}")
+    print(f"Skipped (already sent): {len(results['skipped'])}")
+    if results.get("unchanged"):
+        print(f"Unchanged since last analysis (not sent): {len(results['unchanged'])}")
+    if results["deferred"]:
+        print(f"Deferred (daily quota reached): {len(results['deferred'])}")
+    for failure in results["failed"]:
+        print(f"  - {failure}")
+    return 1 if results["failed"] else 0
+
+
+def cmd_send(args) -> int:
+    if not args.sender:
+        print("A sender address is required (--sender or GRADESCOPE_SMTP_USER).")
+        return 2
+    password = smtp_password(args.password_file)
+    analyzer = load_analyzer(args)
+
+    previous = None
+    if args.since:
+        from analysis_delta import load_results
+
+        previous = load_results(args.since)
+
+    if args.spool:
+        from mail_spool import MailSpool
+
+        # Delivery (and journaling) happens later, in the flush command
+        with MailSpool(args.spool, args.spool_format) as spool:
+            results = analyzer.send_emails(
+                args.smtp_server,
+                args.smtp_port,
+                args.sender,
+                password,
+                spool=spool,
+                previous=previous,
+                score_threshold=args.score_threshold,
+            )
+        print(f"\nSpooled {spool.count} emails to {args.spool}")
+        write_metrics(analyzer, args)
+        return 1 if results["failed"] else 0
+
+    scheduler = build_scheduler(args, analyzer.metrics)
+    journal = None if args.dry_run else open_journal(args)
+    try:
+        results = analyzer.send_emails(
+            args.smtp_server,
+            args.smtp_port,
+            args.sender,
+            password,
+            dry_run=args.dry_run,
+            use_tls=not args.no_tls,
+            workers=args.workers,
+            journal=journal,
+            scheduler=scheduler,
+            previous=previous,
+            score_threshold=args.score_threshold,
+        )
+    finally:
+        if journal is not None:
+            journal.close()
+    status = print_results(results)
+    write_metrics(analyzer, args)
+    return status
+
+
+def cmd_flush(args) -> int:
+    """Send everything in a spool written by send --spool."""
+    if not args.sender:
+        print("A sender address is required (--sender or GRADESCOPE_SMTP_USER).")
+        return 2
+    from mail_spool import flush_spool
+    from smtp_pool import SMTPConnectionPool
+
+    pool = SMTPConnectionPool(
+        args.smtp_server,
+        args.smtp_port,
+        args.sender,
+        smtp_password(args.password_file),
+        size=args.workers,
+        use_tls=not args.no_tls,
+    )
+    journal = open_journal(args)
+    try:
+        results = flush_spool(
+            args.spool,
+            pool,
+            format=args.format,
+            workers=args.workers,
+            journal=journal,
+            scheduler=build_scheduler(args),
+        )
+    finally:
+        pool.close()
+        if journal is not None:
+            journal.close()
+    return print_results(results)
+
+
+def cmd_watch(args) -> int:
+    """Re-analyze whenever an export in the directory is added or changed."""
+    if args.spool and not args.sender:
+        print("--spool needs a sender address (--sender or GRADESCOPE_SMTP_USER).")
+        return 2
+    from export_cache import ExportCache
+    from export_watcher import ExportWatcher
+    from report_writer import report_writer
+
+    def on_update(analyzer, delta):
+        if args.report:
+            # Only the students this change affected
+            newline = "" if args.format == "csv" else None
+            with open(args.report, "w", newline=newline) as f:
+                analyzer.write_report(report_writer(args.format, f), only=delta.changed)
+        if args.spool:
+            from mail_spool import MailSpool
+
+            with MailSpool(args.spool) as spool:
+                analyzer.send_emails(
+                    "",
+                    0,
+                    args.sender,
+                    "",
+                    spool=spool,
+                    previous=delta.previous,
+                    score_threshold=args.score_threshold,
+                )
+        if args.save:
+            analyzer.save_analysis(args.save)
+
+    watcher = ExportWatcher(
+        args.directory,
+        on_update=on_update,
+        cache=None if args.no_cache else ExportCache(),
+        score_threshold=args.score_threshold,
+        poll_interval=args.interval,
+    )
+    print(f"Watching {args.directory} for exports (Ctrl+C to stop)")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    return 0
+
+
+def cmd_smtp_test(args) -> int:
+    """Connect, STARTTLS, log in and optionally send one message, timing each step."""
+    import smtplib
+    import ssl
+
+    password = smtp_password(args.password_file)
+    user = args.sender or "(no login)"
+    print(f"Testing {args.smtp_server}:{args.smtp_port} as {user}")
+
+    def step(name, func, *func_args, **kwargs):
+        start = time.perf_counter()
+        result = func(*func_args, **kwargs)
+        print(f"  {name:<10} ok  {1000 * (time.perf_counter() - start):8.1f} ms")
+        return result
+
+    try:
+        server = step(
+            "connect",
+            smtplib.SMTP,
+            args.smtp_server,
+            args.smtp_port,
+            timeout=args.timeout,
+        )
+        try:
+            if not args.no_tls:
+                step("starttls", server.starttls, context=ssl.create_default_context())
+            if password:
+                step("login", server.login, args.sender, password)
+            step("noop", server.noop)
+            if args.to:
+                message = (
+                    f"From: {args.sender}\nTo: {args.to}\n"
+                    "Subject: Test Email from Gradescope Analyzer\n\n"
+                    "If you're receiving this, the SMTP configuration is working.\n"
+                )
+                step("send", server.sendmail, args.sender, args.to, message)
+        finally:
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                server.close()
+    except smtplib.SMTPAuthenticationError:
+        print("❌ Authentication failed. Check the sender address and app password.")
+        return 1
+    except (smtplib.SMTPException, OSError) as e:
+        print(f"❌ Error: {e}")
+        return 1
+    print("✅ SMTP configuration is working.")
+    return 0
+
+
+def add_export_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "exports", nargs="*", help="Export CSVs (LABEL=PATH or PATH), oldest first"
+    )
+    parser.add_argument("--snapshot", help="Load a saved analysis instead of exports")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Don't use the export cache"
+    )
+    parser.add_argument(
+        "--items", action="store_true", help="Run per-question item analysis"
+    )
+    parser.add_argument("--templates", help="Directory of <category>.txt overrides")
+    parser.add_argument("--rules", help="JSON category rules (see category_rules.py)")
+    parser.add_argument(
+        "--deadline",
+        action="append",
+        default=[],
+        metavar="LABEL=TIME",
+        help="An export's deadline, e.g. 'Quiz 3=2025-10-15 23:59:00 -0400' (repeatable)",
+    )
+
+
+def add_delivery_arguments(parser: argparse.ArgumentParser):
+    """Worker, journal and pacing flags shared by send and flush."""
+    parser.add_argument("--workers", type=int, default=1, help="SMTP sessions")
+    parser.add_argument("--journal", help="Journal file (default: send_journal.jsonl)")
+    parser.add_argument("--run-id", help="Journal run id (default: ISO year and week)")
+    parser.add_argument("--no-journal", action="store_true", help="Don't record sends")
+    add_pacing_arguments(parser)
+
+
+def add_pacing_arguments(parser: argparse.ArgumentParser):
+    """Rate, quota, priority and retry flags for build_scheduler."""
+    parser.add_argument("--rate", type=float, help="Max messages per second")
+    parser.add_argument("--burst", type=int, default=1, help="Messages sent back to back")
+    parser.add_argument("--daily-quota", type=int, help="Max messages per day")
+    parser.add_argument("--quota-file", help="Remember the day's count across runs")
+    parser.add_argument(
+        "--priority",
+        help="Categories to send first, e.g. struggling,declining",
+    )
+    parser.add_argument(
+        "--max-attempts", type=int, help="Tries per message on 4xx replies (default 5)"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Analyze Gradescope exports and email students."
+    )
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    analyze = subcommands.add_parser("analyze", help="Categorize students")
+    add_export_arguments(analyze)
+    analyze.add_argument("--save", help="Save results (.json, .npz or .ndjson)")
+    analyze.add_argument(
+        "--identities",
+        action="store_true",
+        help="List duplicate rows, SID/email conflicts and name-only matches",
+    )
+    analyze.add_argument("--metrics", help="Write <prefix>.json and <prefix>.prom")
+    analyze.set_defaults(func=cmd_analyze)
+
+    sweep = subcommands.add_parser("sweep", help="Category counts across thresholds")
+    add_export_arguments(sweep)
+    sweep.add_argument(
+        "--vary",
+        action="append",
+        default=[],
+        metavar="NAME=VALUES",
+        help="Threshold values to try: 80,85,90 or start:stop:step (repeatable)",
+    )
+    sweep.add_argument("--output", help="Write the counts as CSV")
+    sweep.set_defaults(func=cmd_sweep)
+
+    report = subcommands.add_parser("report", help="Write the analysis report")
+    add_export_arguments(report)
+    report.add_argument("--format", choices=["text", "csv", "html"], default="text")
+    report.add_argument("--output", help="Report file (default: stdout)")
+    report.set_defaults(func=cmd_report)
+
+    preview = subcommands.add_parser("preview", help="Show rendered emails")
+    add_export_arguments(preview)
+    preview.add_argument("--limit", type=int, default=5, help="Emails to show")
+    preview.add_argument("--category", help="Only preview one category")
+    preview.add_argument("--sender", default=os.environ.get(USER_ENV_VAR, ""))
+    preview.set_defaults(func=cmd_preview)
+
+    send = subcommands.add_parser("send", help="Email every student")
+    add_export_arguments(send)
+    add_smtp_arguments(send)
+    add_delivery_arguments(send)
+    send.add_argument("--dry-run", action="store_true", help="Render without sending")
+    send.add_argument("--metrics", help="Write <prefix>.json and <prefix>.prom")
+    send.add_argument("--spool", help="Write emails to this Maildir/mbox instead")
+    send.add_argument("--spool-format", choices=["maildir", "mbox", "eml"])
+    send.add_argument(
+        "--since", help="Only email students changed since this saved analysis"
+    )
+    send.add_argument(
+        "--score-threshold",
+        type=float,
+        default=5.0,
+        help="Percentage points a score must move to count as changed (default 5)",
+    )
+    send.set_defaults(func=cmd_send)
+
+    flush = subcommands.add_parser("flush", help="Send the emails in a spool")
+    flush.add_argument("spool", help="Maildir, mbox file or .eml directory")
+    flush.add_argument("--format", choices=["maildir", "mbox", "eml"])
+    add_smtp_arguments(flush)
+    add_delivery_arguments(flush)
+    flush.set_defaults(func=cmd_flush)
+
+    watch = subcommands.add_parser("watch", help="Re-analyze as exports change")
+    watch.add_argument("directory", help="Directory the CSV exports are saved to")
+    watch.add_argument("--report", help="Write a report of affected students here")
+    watch.add_argument("--format", choices=["text", "csv", "html"], default="text")
+    watch.add_argument("--spool", help="Spool emails for affected students here")
+    watch.add_argument("--sender", default=os.environ.get(USER_ENV_VAR, ""))
+    watch.add_argument("--save", help="Save the analysis here after every update")
+    watch.add_argument("--no-cache", action="store_true", help="Don't use the export cache")
+    watch.add_argument(
+        "--score-threshold",
+        type=float,
+        default=5.0,
+        help="Percentage points a score must move to count as changed (default 5)",
+    )
+    watch.add_argument("--interval", type=float, default=0.2, help="Poll seconds")
+    watch.set_defaults(func=cmd_watch)
+
+    smtp_test = subcommands.add_parser("smtp-test", help="Check SMTP settings")
+    add_smtp_arguments(smtp_test)
+    smtp_test.add_argument("--to", help="Also send a test message to this address")
+    smtp_test.add_argument("--timeout", type=float, default=30.0)
+    smtp_test.set_defaults(func=cmd_smtp_test)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # Output piped into e.g. head; stop quietly like other Unix tools
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
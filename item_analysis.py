@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Item Analysis
+Per-question statistics for a Gradescope export: difficulty, discrimination
+and point-biserial correlation for every item, plus each student's weak
+questions and topics, all computed from one students x items matrix.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from gradescope_ingest import QUESTION_HEADER
+
+# A student "missed" an item or topic when they earned less than this fraction of it
+WEAK_THRESHOLD = 0.5
+
+# Share of students in each of the upper and lower groups for discrimination
+DISCRIMINATION_GROUP = 0.27
+
+
+def parse_item_header(column: str) -> Tuple[str, float]:
+    """Split a question header into its label and max points ("3.1 (5.0 pts)" -> ("3.1", 5.0))."""
+    match = QUESTION_HEADER.match(column)
+    if match is None:
+        raise ValueError(f"Not a question column: {column!r}")
+    return match.group("item"), float(match.group("points"))
+
+
+def item_topic(item: str) -> str:
+    """The question group an item belongs to ("2.1: C" -> "2")."""
+    return item.split(":")[0].split(".")[0].strip()
+
+
+class ItemAnalysis:
+    """Item statistics and weak-topic vectors for one export."""
+
+    def __init__(self, scores: pd.DataFrame, weak_threshold: float = WEAK_THRESHOLD):
+        """Analyze every question column of an export frame.
+
+        Rows without a name, email or total score (missing submissions) are
+        left out. Ungraded question cells count as zero points.
+        """
+        columns = [column for column in scores.columns if QUESTION_HEADER.match(column)]
+        if not columns:
+            raise ValueError("The export has no per-question point columns.")
+
+        submitted = scores.dropna(subset=["Name", "Email", "Total Score"])
+        parsed = [parse_item_header(column) for column in columns]
+
+        self.items = [item for item, _ in parsed]
+        self.max_points = np.array([points for _, points in parsed])
+        self.names = submitted["Name"].to_numpy()
+        # Trimmed like the analyzer's emails, which look students up here
+        self.emails = submitted["Email"].str.strip().to_numpy()
+        self.weak_threshold = weak_threshold
+        self.points = np.nan_to_num(submitted[columns].to_numpy(dtype=float))
+
+        self.topics = list(dict.fromkeys(item_topic(item) for item in self.items))
+        self._compute()
+        self._rows = None
+
+    def _compute(self):
+        points, max_points = self.points, self.max_points
+        num_students = len(points)
+
+        # Items worth zero points (e.g. bonus or placeholder questions) have no
+        # meaningful fraction, so they come out as NaN and are never "weak"
+        scorable = max_points > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fractions = np.where(scorable, points / max_points, np.nan)
+        totals = points[:, scorable].sum(axis=1)
+
+        # Difficulty: mean fraction of the available points earned
+        self.difficulty = fractions.mean(axis=0)
+
+        # Discrimination: upper group's difficulty minus the lower group's
+        group = max(1, int(round(num_students * DISCRIMINATION_GROUP)))
+        order = np.argsort(totals, kind="stable")
+        self.discrimination = (
+            fractions[order[-group:]].mean(axis=0) - fractions[order[:group]].mean(axis=0)
+        )
+
+        # Point-biserial: correlation between each item and the rest of the
+        # quiz (the total minus that item, so an item isn't correlated with itself)
+        rest = totals[:, None] - np.where(scorable, points, 0.0)
+        item_centered = points - points.mean(axis=0)
+        rest_centered = rest - rest.mean(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.point_biserial = (item_centered * rest_centered).sum(axis=0) / np.sqrt(
+                (item_centered**2).sum(axis=0) * (rest_centered**2).sum(axis=0)
+            )
+        self.point_biserial[~scorable] = np.nan
+
+        # Weak items and topics per student
+        self.weak_items = fractions < self.weak_threshold
+        topic_index = {topic: i for i, topic in enumerate(self.topics)}
+        membership = np.zeros((len(self.items), len(self.topics)))
+        membership[
+            np.arange(len(self.items)),
+            [topic_index[item_topic(item)] for item in self.items],
+        ] = 1.0
+        topic_max = max_points @ membership
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.topic_scores = (points @ membership) / topic_max
+        self.weak_topics = self.topic_scores < self.weak_threshold
+
+    def item_statistics(self) -> pd.DataFrame:
+        """One row per item with its max points, difficulty, discrimination and point-biserial."""
+        return pd.DataFrame(
+            {
+                "item": self.items,
+                "topic": [item_topic(item) for item in self.items],
+                "max_points": self.max_points,
+                "difficulty": self.difficulty,
+                "discrimination": self.discrimination,
+                "point_biserial": self.point_biserial,
+            }
+        )
+
+    def _row(self, email: str) -> int:
+        if self._rows is None:
+            self._rows = {email: row for row, email in enumerate(self.emails)}
+        return self._rows.get(email, -1)
+
+    def missed_items(self, email: str) -> List[str]:
+        """Items where the student earned less than the weak threshold."""
+        row = self._row(email)
+        if row < 0:
+            return []
+        return [self.items[i] for i in np.flatnonzero(self.weak_items[row])]
+
+    def weak_topic_list(self, email: str) -> List[str]:
+        """Question groups where the student earned less than the weak threshold overall."""
+        row = self._row(email)
+        if row < 0:
+            return []
+        return [self.topics[i] for i in np.flatnonzero(self.weak_topics[row])]
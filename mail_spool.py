@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Mail Spool
+Writes rendered messages to a Maildir, an mbox file or a directory of .eml
+files instead of sending them, and later flushes the spool over a pooled
+SMTP connection. The spool can be reviewed, or handed to a local MTA,
+before anything leaves the machine.
+"""
+
+import os
+import re
+import socket
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from delivery_scheduler import DeliveryScheduler
+from email_templates import RenderedMessage
+from send_journal import FAILED, PENDING, SENT, SendJournal
+from smtp_pool import SMTPConnectionPool
+
+SPOOL_FORMATS = ["maildir", "mbox", "eml"]
+
+# Bookkeeping headers written into the spool and stripped again before sending
+CATEGORY_HEADER = "X-Gradescope-Category"
+TEMPLATE_HEADER = "X-Gradescope-Template"
+RECIPIENT_HEADER = "X-Gradescope-Recipient"
+_SPOOL_HEADERS = ("X-Gradescope-",)
+
+# Writes are collected in this large a buffer before reaching the OS
+BUFFER_SIZE = 1 << 20
+
+_FROM_LINE = re.compile(r"^(>*From )", re.MULTILINE)
+_ESCAPED_FROM_LINE = re.compile(r"^>(>*From )", re.MULTILINE)
+
+
+def spool_format(path: str) -> str:
+    """Guess the spool format: *.mbox files are mbox, anything else a Maildir."""
+    return "mbox" if path.lower().endswith(".mbox") else "maildir"
+
+
+class SpooledMessage:
+    """A message read back from the spool, ready to send."""
+
+    __slots__ = ("key", "category", "template_hash", "recipient", "data")
+
+    def __init__(self, key, category: str, template_hash: str, recipient: str, data: str):
+        self.key = key
+        self.category = category
+        self.template_hash = template_hash
+        self.recipient = recipient
+        self.data = data
+
+
+def _spooled_text(message: RenderedMessage) -> str:
+    return (
+        f"{CATEGORY_HEADER}: {message.category}\n"
+        f"{TEMPLATE_HEADER}: {message.template_hash}\n"
+        f"{RECIPIENT_HEADER}: {message.recipient}\n"
+        f"{message.data}"
+    )
+
+
+def _parse(key, text: str) -> SpooledMessage:
+    """Split off the bookkeeping headers from a spooled message."""
+    spool_fields = {}
+    lines = text.split("\n")
+    start = 0
+    while start < len(lines) and lines[start].startswith(_SPOOL_HEADERS):
+        name, _, value = lines[start].partition(":")
+        spool_fields[name] = value.strip()
+        start += 1
+    return SpooledMessage(
+        key,
+        spool_fields.get(CATEGORY_HEADER, ""),
+        spool_fields.get(TEMPLATE_HEADER, ""),
+        spool_fields.get(RECIPIENT_HEADER, ""),
+        "\n".join(lines[start:]),
+    )
+
+
+class MailSpool:
+    """Appends rendered messages to a spool in one of SPOOL_FORMATS."""
+
+    def __init__(self, path: str, format: Optional[str] = None):
+        self.path = path
+        self.format = format or spool_format(path)
+        if self.format not in SPOOL_FORMATS:
+            raise ValueError(f"Unknown spool format: {self.format}")
+
+        self.count = 0
+        self._host = socket.gethostname().replace("/", "_").replace(":", "_")
+        self._stamp = time.time_ns()
+        self._file = None
+
+        if self.format == "mbox":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._file = open(
+                path, "a", encoding="utf-8", newline="\n", buffering=BUFFER_SIZE
+            )
+        elif self.format == "maildir":
+            for subdirectory in ("tmp", "new", "cur"):
+                os.makedirs(os.path.join(path, subdirectory), exist_ok=True)
+        else:
+            os.makedirs(path, exist_ok=True)
+
+    def _unique_name(self) -> str:
+        # Sortable, so a flush sends messages in the order they were spooled
+        return f"{self._stamp}.P{os.getpid()}Q{self.count:06d}.{self._host}"
+
+    def add(self, message: RenderedMessage):
+        """Spool one rendered message."""
+        text = _spooled_text(message)
+        if self.format == "mbox":
+            # mboxrd: quote body lines that would look like a message separator
+            text = _FROM_LINE.sub(r">\1", text)
+            self._file.write(f"From MAILER-DAEMON {time.asctime()}\n{text}\n\n")
+        elif self.format == "maildir":
+            name = self._unique_name()
+            temp_path = os.path.join(self.path, "tmp", name)
+            with open(temp_path, "w", encoding="utf-8", newline="\n") as f:
+                f.write(text)
+            os.replace(temp_path, os.path.join(self.path, "new", name))
+        else:
+            with open(
+                os.path.join(self.path, f"{self._unique_name()}.eml"),
+                "w",
+                encoding="utf-8",
+                newline="\n",
+            ) as f:
+                f.write(text)
+        self.count += 1
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _read_mbox(path: str) -> Iterator[SpooledMessage]:
+    with open(path, encoding="utf-8", newline="\n") as f:
+        chunks = re.split(r"^From .*\n", f.read(), flags=re.MULTILINE)
+    # Text before the first separator is empty; each message ends with a blank line
+    for index, chunk in enumerate(chunks[1:]):
+        text = chunk[:-2] if chunk.endswith("\n\n") else chunk.rstrip("\n")
+        yield _parse(index, _ESCAPED_FROM_LINE.sub(r"\1", text))
+
+
+def read_spool(path: str, format: Optional[str] = None) -> List[SpooledMessage]:
+    """Every message in a spool, in the order it was spooled."""
+    format = format or spool_format(path)
+    if format == "mbox":
+        return list(_read_mbox(path)) if os.path.exists(path) else []
+
+    if format == "maildir":
+        files = [
+            os.path.join(path, subdirectory, name)
+            for subdirectory in ("new", "cur")
+            for name in os.listdir(os.path.join(path, subdirectory))
+        ]
+    elif format == "eml":
+        files = [
+            os.path.join(path, name)
+            for name in os.listdir(path)
+            if name.endswith(".eml")
+        ]
+    else:
+        raise ValueError(f"Unknown spool format: {format}")
+
+    messages = []
+    for file_path in sorted(files, key=os.path.basename):
+        with open(file_path, encoding="utf-8", newline="\n") as f:
+            messages.append(_parse(file_path, f.read()))
+    return messages
+
+
+def _remove(path: str, format: str, messages: List[SpooledMessage], delivered: set):
+    """Drop delivered messages, leaving the rest for the next flush."""
+    if format != "mbox":
+        for message in messages:
+            if message.key in delivered:
+                os.remove(message.key)
+        return
+
+    if not messages:
+        return
+    remaining = [message for message in messages if message.key not in delivered]
+    if not remaining:
+        os.remove(path)
+        return
+    # A fresh temporary file each time: one left by a crashed flush would
+    # otherwise be appended to, bringing its delivered messages back
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp"
+    )
+    os.close(fd)
+    try:
+        with MailSpool(temp_path, "mbox") as spool:
+            for message in remaining:
+                spool.add(
+                    RenderedMessage(
+                        message.category,
+                        message.template_hash,
+                        message.recipient,
+                        "",
+                        "",
+                        message.data,
+                    )
+                )
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def flush_spool(
+    path: str,
+    pool: SMTPConnectionPool,
+    format: Optional[str] = None,
+    workers: int = 1,
+    journal: Optional[SendJournal] = None,
+    scheduler: Optional[DeliveryScheduler] = None,
+) -> Dict[str, List[str]]:
+    """Send every spooled message over the pool and remove the ones delivered.
+
+    Messages the journal already records as sent are removed without being
+    sent again. Failed messages (and any deferred by the scheduler's daily
+    quota) stay in the spool for the next flush.
+    """
+    format = format or spool_format(path)
+    messages = read_spool(path, format)
+    results = {"sent": [], "failed": [], "skipped": [], "deferred": []}
+
+    def deliver(message: SpooledMessage) -> Tuple[str, Optional[Exception]]:
+        if journal is not None and journal.is_delivered(
+            message.recipient, message.template_hash
+        ):
+            return "skipped", None
+        if scheduler is not None and not scheduler.reserve():
+            return "deferred", None
+        if journal is not None:
+            journal.record(message.recipient, message.template_hash, PENDING)
+        try:
+            if scheduler is None:
+                pool.send(message.recipient, message.data)
+            else:
+                scheduler.run(lambda: pool.send(message.recipient, message.data))
+        except Exception as e:
+            if journal is not None:
+                journal.record(message.recipient, message.template_hash, FAILED, str(e))
+            return "failed", e
+        if journal is not None:
+            journal.record(message.recipient, message.template_hash, SENT)
+        return "sent", None
+
+    if scheduler is not None:
+        messages = [
+            messages[i] for i in scheduler.order([m.category for m in messages])
+        ]
+
+    delivered = set()
+    executor = None
+    try:
+        if workers <= 1:
+            outcomes = map(deliver, messages)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+            outcomes = executor.map(deliver, messages)
+
+        for message, (status, error) in zip(messages, outcomes):
+            if status == "failed":
+                results["failed"].append(f"{message.recipient} - Error: {error}")
+            elif status == "deferred":
+                results["deferred"].append(f"{message.recipient} - daily quota reached")
+            else:
+                results[status].append(message.recipient)
+                delivered.add(message.key)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        _remove(path, format, messages, delivered)
+
+    return results
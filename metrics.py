@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Metrics
+Lightweight instrumentation for analysis runs: timing spans for each phase,
+latency histograms for SMTP stages and counters for retries and failures.
+Results can be written as JSON or in the Prometheus text exposition format.
+"""
+
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Tuple
+
+# Upper bounds in seconds, roughly logarithmic from 1 ms to 30 s
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+PROMETHEUS_PREFIX = "gradescope"
+
+# Returned by disabled Metrics so instrumented code pays for one call only
+_NULL_SPAN = nullcontext()
+
+
+class Histogram:
+    """Fixed-bucket latency histogram."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # One count per bucket plus a final overflow (+Inf) bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(upper bound, observations at or below it) pairs, ending with +Inf."""
+        total = 0
+        pairs = []
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            total += count
+            pairs.append((str(bound), total))
+        return pairs
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket containing it."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        for bound, total in self.cumulative():
+            if total >= target:
+                return float(bound)
+        return float("inf")
+
+
+class Metrics:
+    """Collects spans, histograms and counters; safe to share between threads.
+
+    A Metrics created with enabled=False records nothing, and its methods
+    return immediately, so instrumentation can stay in place permanently.
+    """
+
+    def __init__(self, enabled: bool = True, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.spans: List[Dict] = []
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def span(self, phase: str):
+        """Context manager timing one phase of the run."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(phase)
+
+    @contextmanager
+    def _span(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.spans.append(
+                    {
+                        "phase": phase,
+                        "start": start - self._origin,
+                        "seconds": end - start,
+                    }
+                )
+
+    def observe(self, name: str, seconds: float):
+        """Add one latency observation to a named histogram."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def timer(self, name: str):
+        """Context manager that observes its duration into a histogram."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._timer(name)
+
+    @contextmanager
+    def _timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def increment(self, name: str, amount: int = 1):
+        """Increase a named counter."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def phase_totals(self) -> Dict[str, float]:
+        """Total seconds spent in each phase, in first-seen order."""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span["phase"]] = totals.get(span["phase"], 0.0) + span["seconds"]
+        return totals
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "spans": list(self.spans),
+                "phases": self.phase_totals(),
+                "histograms": {
+                    name: {
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "p50": histogram.quantile(0.5),
+                        "p95": histogram.quantile(0.95),
+                        "p99": histogram.quantile(0.99),
+                        "buckets": dict(histogram.cumulative()),
+                    }
+                    for name, histogram in self.histograms.items()
+                },
+                "counters": dict(self.counters),
+            }
+
+    def write_json(self, filename: str):
+        with open(filename, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Render everything in the Prometheus text exposition format."""
+        p = PROMETHEUS_PREFIX
+        lines = [
+            f"# HELP {p}_phase_seconds Time spent in each analysis phase.",
+            f"# TYPE {p}_phase_seconds gauge",
+        ]
+        with self._lock:
+            for phase, seconds in self.phase_totals().items():
+                lines.append(f'{p}_phase_seconds{{phase="{phase}"}} {seconds:.6f}')
+
+            if self.histograms:
+                lines.append(f"# HELP {p}_latency_seconds Latency of each operation.")
+                lines.append(f"# TYPE {p}_latency_seconds histogram")
+            for name, histogram in self.histograms.items():
+                for bound, total in histogram.cumulative():
+                    lines.append(
+                        f'{p}_latency_seconds_bucket{{operation="{name}",le="{bound}"}} {total}'
+                    )
+                lines.append(
+                    f'{p}_latency_seconds_sum{{operation="{name}"}} {histogram.sum:.6f}'
+                )
+                lines.append(
+                    f'{p}_latency_seconds_count{{operation="{name}"}} {histogram.count}'
+                )
+
+            for name, value in self.counters.items():
+                lines.append(f"# TYPE {p}_{name}_total counter")
+                lines.append(f"{p}_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, filename: str):
+        with open(filename, "w") as f:
+            f.write(self.to_prometheus())
+
+
+# Shared no-op instance used when a caller doesn't ask for metrics
+DISABLED = Metrics(enabled=False)
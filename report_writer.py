@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Report Writers
+Stream the analysis report to any file-like sink as plain text, CSV or HTML.
+All writers are driven by the same single pass over the roster, so several
+formats can be produced at once without holding the report in memory.
+"""
+
+import csv
+import html
+import math
+from typing import Dict, List, Mapping, Optional, TextIO, Tuple
+
+import pandas as pd
+
+
+def submission_note(student: Mapping) -> Optional[str]:
+    """'3.2 h before the deadline' or '1.5 h late' on the latest assessment, if known."""
+    hours_late = student.get("hours_late")
+    if hours_late is None:
+        return None
+    if hours_late > 0:
+        return f"{hours_late:.1f} h late"
+    hours_before = student["hours_before_deadline"]
+    if math.isnan(hours_before):
+        return None
+    if hours_before < 0:
+        return f"{-hours_before:.1f} h after the deadline"
+    return f"{hours_before:.1f} h before the deadline"
+
+
+def _hours(value: float) -> str:
+    return "n/a" if math.isnan(value) else f"{value:.1f}"
+
+
+class ReportWriter:
+    """Receives report events in order and writes them to a sink.
+
+    The analyzer calls begin once, then cohort_statistics, then
+    submission_timing if the exports had submission details, then category
+    and student for each student in report order, item_statistics if item
+    analysis has run, and finally end. Subclasses override the events they
+    care about.
+    """
+
+    def __init__(self, sink: TextIO):
+        self.sink = sink
+        self.assessments: List[str] = []
+
+    def begin(self, generated: str, total_students: int, assessments: List[str]):
+        self.assessments = assessments
+
+    def cohort_statistics(self, statistics: pd.DataFrame, histograms: pd.DataFrame):
+        """Per-assessment summary (see CohortStats.summary) and histograms."""
+        pass
+
+    def submission_timing(self, timing: pd.DataFrame, histograms: pd.DataFrame):
+        """Per-assessment timing and time-before-deadline bins (see timing_summary)."""
+        pass
+
+    def category(self, category: str, count: int):
+        pass
+
+    def student(
+        self,
+        category: str,
+        student: Dict,
+        percentages: List[float],
+        missed: Optional[List[str]],
+        standing: Optional[Tuple[float, float]] = None,
+    ):
+        """One student; percentages are per assessment, oldest first.
+
+        standing is the (percentile rank, z-score) on the latest assessment,
+        or None if the student didn't take it.
+        """
+        pass
+
+    def item_statistics(self, label: str, statistics: pd.DataFrame):
+        pass
+
+    def end(self):
+        self._flush()
+
+    def _flush(self):
+        # Make the opening lines visible straight away on terminals and pipes
+        flush = getattr(self.sink, "flush", None)
+        if flush is not None:
+            flush()
+
+
+class TextReportWriter(ReportWriter):
+    """The plain-text report printed by the command line tools."""
+
+    def _line(self, text: str = ""):
+        self.sink.write(text + "\n")
+
+    def begin(self, generated: str, total_students: int, assessments: List[str]):
+        super().begin(generated, total_students, assessments)
+        self._line("=" * 60)
+        self._line("GRADESCOPE PERFORMANCE ANALYSIS REPORT")
+        self._line("=" * 60)
+        self._line(f"Generated on: {generated}")
+        self._line()
+        self._line(f"Total Students Analyzed: {total_students}")
+        self._line()
+        self._flush()
+
+    def cohort_statistics(self, statistics, histograms):
+        self._line("COHORT STATISTICS:")
+        self._line("-" * 40)
+        percentiles = [column for column in statistics.columns if column.startswith("p")]
+        self._line(
+            f"{'Assessment':<14} {'Students':>8} {'Mean':>6} {'Std':>6} "
+            + " ".join(f"{column.upper():>6}" for column in percentiles)
+        )
+        for row in statistics.itertuples(index=False):
+            values = row._asdict()
+            self._line(
+                f"{row.assessment:<14} {row.students:>8} {row.mean:>6.1f} {row.std:>6.1f} "
+                + " ".join(f"{values[column]:>6.1f}" for column in percentiles)
+            )
+        self._line()
+        widest = max(1, int(histograms.to_numpy().max(initial=0)))
+        for label, counts in histograms.iterrows():
+            self._line(f"{label} distribution:")
+            for bin_label, count in counts.items():
+                bar = "#" * round(count / widest * 30)
+                self._line(f"  {bin_label:>7} {bar:<30} {count}")
+            self._line()
+
+    def submission_timing(self, timing, histograms):
+        self._line("SUBMISSION TIMING:")
+        self._line("-" * 40)
+        self._line(
+            f"{'Assessment':<14} {'Submitted':>9} {'Late':>5} {'Last-minute':>11} "
+            f"{'Resubmitted':>11} {'Median h early':>14}"
+        )
+        for row in timing.itertuples(index=False):
+            self._line(
+                f"{row.assessment:<14} {row.submitted:>9} {row.late:>5} {row.last_minute:>11} "
+                f"{row.resubmitted:>11} {_hours(row.median_hours_before):>14}"
+            )
+        self._line()
+        widest = max(1, int(histograms.to_numpy().max(initial=0)))
+        for label, counts in histograms.iterrows():
+            if not counts.any():
+                continue
+            self._line(f"{label} time before deadline:")
+            for bin_label, count in counts.items():
+                bar = "#" * round(count / widest * 30)
+                self._line(f"  {bin_label:>7} {bar:<30} {count}")
+            self._line()
+
+    def category(self, category: str, count: int):
+        self._line(f"{category.upper()} STUDENTS ({count} students):")
+        self._line("-" * 40)
+
+    def student(self, category, student, percentages, missed, standing=None):
+        self._line(f"• {student['name']} ({student['email']})")
+        for label, percentage in zip(self.assessments, percentages):
+            if percentage > 0:
+                self._line(f"  {label}: {percentage:.1f}%")
+        if standing is not None:
+            rank, z_score = standing
+            self._line(f"  Percentile rank: {rank:.0f} (z = {z_score:+.2f})")
+        submitted = submission_note(student)
+        if submitted:
+            self._line(f"  Submitted: {submitted}")
+        if student["improvement"] != 0:
+            self._line(f"  Improvement: {student['improvement']:+.1f}%")
+        if len(self.assessments) > 2:
+            self._line(
+                f"  Trend: {student['slope']:+.1f}% per assessment, "
+                f"recent average {student['rolling_mean']:.1f}%"
+            )
+        if missed:
+            self._line(f"  Missed questions: {', '.join(missed)}")
+        self._line()
+
+    def item_statistics(self, label: str, statistics: pd.DataFrame):
+        self._line(f"ITEM ANALYSIS ({label}):")
+        self._line("-" * 40)
+        self._line(
+            f"{'Question':<12} {'Max':>5} {'Difficulty':>11} {'Discrim.':>9} {'Pt-Bis.':>8}"
+        )
+        for item in statistics.itertuples(index=False):
+            self._line(
+                f"{item.item:<12} {item.max_points:>5.1f} {item.difficulty:>11.2f} "
+                f"{item.discrimination:>9.2f} {item.point_biserial:>8.2f}"
+            )
+        self._line()
+
+
+class CSVReportWriter(ReportWriter):
+    """One row per student, for spreadsheets.
+
+    Cohort, timing and item statistics are not included.
+    """
+
+    def begin(self, generated: str, total_students: int, assessments: List[str]):
+        super().begin(generated, total_students, assessments)
+        self._writer = csv.writer(self.sink)
+        self._writer.writerow(
+            ["category", "name", "email"]
+            + [f"{label} (%)" for label in assessments]
+            + ["improvement", "slope", "last_delta", "rolling_mean"]
+            + ["percentile_rank", "z_score", "hours_late", "hours_before_deadline"]
+            + ["missed_questions"]
+        )
+        self._flush()
+
+    def student(self, category, student, percentages, missed, standing=None):
+        rank, z_score = (f"{value:.2f}" for value in standing) if standing else ("", "")
+        hours_late, hours_before = (
+            "" if value is None or math.isnan(value) else f"{value:.2f}"
+            for value in (student.get("hours_late"), student.get("hours_before_deadline"))
+        )
+        self._writer.writerow(
+            [category, student["name"], student["email"]]
+            + [f"{percentage:.2f}" for percentage in percentages]
+            + [
+                f"{student['improvement']:.2f}",
+                f"{student['slope']:.2f}",
+                f"{student['last_delta']:.2f}",
+                f"{student['rolling_mean']:.2f}",
+                rank,
+                z_score,
+                hours_late,
+                hours_before,
+                "; ".join(missed or []),
+            ]
+        )
+
+
+class HTMLReportWriter(ReportWriter):
+    """A standalone HTML page with one table per category."""
+
+    def _table_header(self, columns: List[str]):
+        cells = "".join(f"<th>{html.escape(column)}</th>" for column in columns)
+        self.sink.write(f"<table>\n<tr>{cells}</tr>\n")
+
+    def _row(self, values: List[str]):
+        cells = "".join(f"<td>{html.escape(value)}</td>" for value in values)
+        self.sink.write(f"<tr>{cells}</tr>\n")
+
+    def begin(self, generated: str, total_students: int, assessments: List[str]):
+        super().begin(generated, total_students, assessments)
+        self._open_table = False
+        self.sink.write(
+            "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+            "<title>Gradescope Performance Analysis Report</title>\n"
+            "<style>table{border-collapse:collapse;margin-bottom:1.5em}"
+            "th,td{border:1px solid #ccc;padding:2px 8px;text-align:left}</style>\n"
+            "</head>\n<body>\n"
+            "<h1>Gradescope Performance Analysis Report</h1>\n"
+            f"<p>Generated on: {html.escape(generated)}<br>\n"
+            f"Total Students Analyzed: {total_students}</p>\n"
+        )
+        self._flush()
+
+    def _close_table(self):
+        if self._open_table:
+            self.sink.write("</table>\n")
+            self._open_table = False
+
+    def category(self, category: str, count: int):
+        self._close_table()
+        self.sink.write(
+            f"<h2>{html.escape(category.title())} Students ({count} students)</h2>\n"
+        )
+        self._table_header(
+            ["Name", "Email"]
+            + self.assessments
+            + ["Improvement", "Percentile rank", "Submitted", "Missed questions"]
+        )
+        self._open_table = True
+
+    def cohort_statistics(self, statistics, histograms):
+        self.sink.write("<h2>Cohort Statistics</h2>\n")
+        percentiles = [column for column in statistics.columns if column.startswith("p")]
+        self._table_header(
+            ["Assessment", "Students", "Mean", "Std"]
+            + [column.upper() for column in percentiles]
+        )
+        for row in statistics.itertuples(index=False):
+            values = row._asdict()
+            self._row(
+                [row.assessment, str(row.students), f"{row.mean:.1f}", f"{row.std:.1f}"]
+                + [f"{values[column]:.1f}" for column in percentiles]
+            )
+        self.sink.write("</table>\n")
+        self._table_header(["Assessment"] + list(histograms.columns))
+        for label, counts in histograms.iterrows():
+            self._row([label] + [str(count) for count in counts.tolist()])
+        self.sink.write("</table>\n")
+
+    def submission_timing(self, timing, histograms):
+        self.sink.write("<h2>Submission Timing</h2>\n")
+        self._table_header(
+            ["Assessment", "Submitted", "Late", "Last-minute", "Resubmitted"]
+            + ["Median hours early", "Median hours late"]
+        )
+        for row in timing.itertuples(index=False):
+            self._row(
+                [row.assessment]
+                + [str(value) for value in (row.submitted, row.late, row.last_minute)]
+                + [str(row.resubmitted), _hours(row.median_hours_before)]
+                + [_hours(row.median_hours_late)]
+            )
+        self.sink.write("</table>\n")
+        self._table_header(["Time before deadline"] + list(histograms.columns))
+        for label, counts in histograms.iterrows():
+            self._row([label] + [str(count) for count in counts.tolist()])
+        self.sink.write("</table>\n")
+
+    def student(self, category, student, percentages, missed, standing=None):
+        self._row(
+            [student["name"], student["email"]]
+            + [f"{percentage:.1f}%" for percentage in percentages]
+            + [
+                f"{student['improvement']:+.1f}%",
+                f"{standing[0]:.0f}" if standing else "",
+                submission_note(student) or "",
+                ", ".join(missed or []),
+            ]
+        )
+
+    def item_statistics(self, label: str, statistics: pd.DataFrame):
+        self._close_table()
+        self.sink.write(f"<h2>Item Analysis ({html.escape(label)})</h2>\n")
+        self._table_header(
+            ["Question", "Max", "Difficulty", "Discrimination", "Point-biserial"]
+        )
+        for item in statistics.itertuples(index=False):
+            self._row(
+                [
+                    item.item,
+                    f"{item.max_points:.1f}",
+                    f"{item.difficulty:.2f}",
+                    f"{item.discrimination:.2f}",
+                    f"{item.point_biserial:.2f}",
+                ]
+            )
+        self.sink.write("</table>\n")
+
+    def end(self):
+        self._close_table()
+        self.sink.write("</body>\n</html>\n")
+        super().end()
+
+
+REPORT_FORMATS = {
+    "text": TextReportWriter,
+    "csv": CSVReportWriter,
+    "html": HTMLReportWriter,
+}
+
+
+def report_writer(format: str, sink: TextIO) -> ReportWriter:
+    """Create the writer for a format name ('text', 'csv' or 'html')."""
+    try:
+        return REPORT_FORMATS[format](sink)
+    except KeyError:
+        raise ValueError(
+            f"Unknown report format {format!r}; expected one of {', '.join(REPORT_FORMATS)}"
+        ) from None
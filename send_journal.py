@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Send Journal
+An append-only, on-disk outbox that records every delivery attempt so an
+interrupted send_emails run can be resumed without emailing anyone twice.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+
+
+class SendJournal:
+    """Journal of delivery states keyed by (run id, recipient, template hash).
+
+    Records are appended as JSON lines and replayed into an in-memory index
+    on open, so lookups are O(1) per recipient. Writes are flushed to the OS
+    immediately but fsynced in batches; after a crash at most the last
+    unsynced batch is forgotten, and those messages are simply retried.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        run_id: str,
+        fsync_every: int = 50,
+        fsync_interval: float = 1.0,
+    ):
+        self.path = path
+        self.run_id = run_id
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+
+        self._index: Dict[Tuple[str, str, str], str] = {}
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        self._replay()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        complete = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A torn final line from a crash mid-write
+                    break
+                complete += len(line)
+                try:
+                    record = json.loads(line)
+                    key = (record["run"], record["recipient"], record["template"])
+                    status = record["status"]
+                except (ValueError, TypeError, KeyError):
+                    # Garbled or foreign record; skip it like a torn line
+                    continue
+                self._index[key] = status
+        if complete < os.path.getsize(self.path):
+            # Cut the torn line off, or the next record would be appended to it
+            # and lost on the following replay
+            os.truncate(self.path, complete)
+
+    def status(self, recipient: str, template_hash: str) -> Optional[str]:
+        """The latest recorded state for a message in this run, if any."""
+        return self._index.get((self.run_id, recipient, template_hash))
+
+    def is_delivered(self, recipient: str, template_hash: str) -> bool:
+        return self.status(recipient, template_hash) == SENT
+
+    def record(
+        self, recipient: str, template_hash: str, status: str, error: str = ""
+    ):
+        """Append a state change for one message."""
+        entry = {
+            "run": self.run_id,
+            "recipient": recipient,
+            "template": template_hash,
+            "status": status,
+            "time": time.time(),
+        }
+        if error:
+            entry["error"] = error
+        line = json.dumps(entry) + "\n"
+
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._index[(self.run_id, recipient, template_hash)] = status
+            self._unsynced += 1
+            if (
+                self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def counts(self) -> Dict[str, int]:
+        """Number of messages in each state for this run."""
+        counts = {PENDING: 0, SENT: 0, FAILED: 0}
+        for (run_id, _, _), status in self._index.items():
+            if run_id == self.run_id:
+                counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def close(self):
+        """Sync any outstanding records and close the journal file."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                self._sync()
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
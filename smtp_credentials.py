@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+SMTP Credentials
+Resolves SMTP settings from command-line values, environment variables or
+a password file so scripts can run unattended (e.g. from cron). Only the
+standard library is imported here, keeping it cheap to load.
+"""
+
+import argparse
+import os
+from typing import Optional
+
+SERVER_ENV_VAR = "GRADESCOPE_SMTP_SERVER"
+PORT_ENV_VAR = "GRADESCOPE_SMTP_PORT"
+USER_ENV_VAR = "GRADESCOPE_SMTP_USER"
+PASSWORD_ENV_VAR = "GRADESCOPE_SMTP_PASSWORD"
+PASSWORD_FILE_ENV_VAR = "GRADESCOPE_SMTP_PASSWORD_FILE"
+
+DEFAULT_SMTP_SERVER = "smtp.gmail.com"
+DEFAULT_SMTP_PORT = 587
+
+
+def add_smtp_arguments(parser: argparse.ArgumentParser):
+    """Add --smtp-server, --smtp-port, --sender, --password-file and --no-tls."""
+    parser.add_argument(
+        "--smtp-server",
+        default=os.environ.get(SERVER_ENV_VAR, DEFAULT_SMTP_SERVER),
+        help=f"SMTP host (env {SERVER_ENV_VAR}, default {DEFAULT_SMTP_SERVER})",
+    )
+    parser.add_argument(
+        "--smtp-port",
+        type=int,
+        default=os.environ.get(PORT_ENV_VAR, str(DEFAULT_SMTP_PORT)),
+        help=f"SMTP port (env {PORT_ENV_VAR}, default {DEFAULT_SMTP_PORT})",
+    )
+    parser.add_argument(
+        "--sender",
+        default=os.environ.get(USER_ENV_VAR, ""),
+        help=f"Sender address and SMTP login (env {USER_ENV_VAR})",
+    )
+    parser.add_argument(
+        "--password-file",
+        default=os.environ.get(PASSWORD_FILE_ENV_VAR),
+        help=f"File holding the SMTP password (env {PASSWORD_FILE_ENV_VAR})",
+    )
+    parser.add_argument(
+        "--no-tls", action="store_true", help="Skip STARTTLS (local test servers)"
+    )
+
+
+def smtp_password(password_file: Optional[str] = None) -> str:
+    """The SMTP password from a file if given, else from the environment.
+
+    Returns an empty string when neither is set, which SMTPConnectionPool
+    treats as "don't log in".
+    """
+    if password_file:
+        with open(password_file, encoding="utf-8") as f:
+            return f.readline().strip()
+    return os.environ.get(PASSWORD_ENV_VAR, "")
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+SMTP Connection Pool
+Keeps authenticated SMTP sessions open so bulk sends skip the per-message
+TCP, STARTTLS and login round trips.
+"""
+
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from metrics import DISABLED, Metrics
+
+# Errors that mean the session itself is gone rather than the message being bad
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class _Session:
+    """A single authenticated SMTP connection and its usage counters."""
+
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+    def close(self):
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of long-lived, authenticated SMTP sessions."""
+
+    def __init__(
+        self,
+        smtp_server: str,
+        smtp_port: int,
+        sender_email: str,
+        sender_password: str,
+        size: int = 1,
+        max_messages_per_session: int = 100,
+        idle_timeout: float = 30.0,
+        timeout: float = 30.0,
+        use_tls: bool = True,
+        metrics: Optional[Metrics] = None,
+    ):
+        """Configure the pool; sessions are opened lazily on first use.
+
+        With a Metrics instance, connect, STARTTLS, login and DATA latencies
+        are recorded as histograms, along with reconnect and retry counts.
+        """
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.sender_email = sender_email
+        self.sender_password = sender_password
+        self.size = max(1, size)
+        self.max_messages_per_session = max_messages_per_session
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.use_tls = use_tls
+        self.metrics = metrics or DISABLED
+
+        self.connections_opened = 0
+        self._idle: "queue.LifoQueue[_Session]" = queue.LifoQueue()
+        self._all: List[_Session] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._context = ssl.create_default_context() if use_tls else None
+
+    def _connect(self) -> _Session:
+        """Open, secure and authenticate a new session."""
+        metrics = self.metrics
+        with metrics.timer("smtp_connect"):
+            server = smtplib.SMTP(
+                self.smtp_server, self.smtp_port, timeout=self.timeout
+            )
+        try:
+            if self.use_tls:
+                with metrics.timer("smtp_starttls"):
+                    server.starttls(context=self._context)
+            if self.sender_password:
+                with metrics.timer("smtp_login"):
+                    server.login(self.sender_email, self.sender_password)
+        except Exception:
+            server.close()
+            raise
+
+        session = _Session(server)
+        with self._lock:
+            self.connections_opened += 1
+            self._all.append(session)
+        self.metrics.increment("smtp_connections")
+        return session
+
+    def _discard(self, session: _Session):
+        with self._lock:
+            if session in self._all:
+                self._all.remove(session)
+        session.close()
+
+    def _is_healthy(self, session: _Session) -> bool:
+        """Check that a session is still usable, probing it if it sat idle."""
+        if session.messages_sent >= self.max_messages_per_session:
+            return False
+        if time.monotonic() - session.last_used < self.idle_timeout:
+            return True
+        try:
+            return session.server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _checkout(self) -> _Session:
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if self._is_healthy(session):
+                return session
+            self._discard(session)
+
+    @contextmanager
+    def session(self):
+        """Borrow a healthy session, returning it to the pool afterwards."""
+        self._slots.acquire()
+        session = None
+        try:
+            session = self._checkout()
+            yield session
+        except CONNECTION_ERRORS:
+            if session is not None:
+                self._discard(session)
+                session = None
+            raise
+        except smtplib.SMTPResponseException as e:
+            # 421 means the server is closing this session (often when throttling)
+            if e.smtp_code == 421 and session is not None:
+                self._discard(session)
+                session = None
+            raise
+        finally:
+            if session is not None:
+                session.last_used = time.monotonic()
+                self._idle.put(session)
+            self._slots.release()
+
+    def send(self, recipient_email: str, message: str, retries: int = 1):
+        """Send a serialized message, reconnecting if the session was dropped."""
+        attempt = 0
+        while True:
+            try:
+                with self.session() as session:
+                    with self.metrics.timer("smtp_data"):
+                        session.server.sendmail(
+                            self.sender_email, recipient_email, message
+                        )
+                    session.messages_sent += 1
+                    return
+            except CONNECTION_ERRORS:
+                if attempt >= retries:
+                    raise
+                attempt += 1
+                self.metrics.increment("smtp_retries")
+
+    def close(self):
+        """Close every open session."""
+        with self._lock:
+            sessions, self._all = self._all, []
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        for session in sessions:
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Local SMTP Sink
+A minimal SMTP server that accepts and stores every message it receives.
+Use it to exercise the email sending code without touching a real mail server.
+"""
+
+import socketserver
+import threading
+import time
+from typing import List, Tuple
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    """Speak just enough SMTP for smtplib to deliver messages."""
+
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+        self.wfile.flush()
+
+    def handle(self):
+        sink = self.server.sink
+        sink._record_connection()
+        sender, recipients = None, []
+        messages_this_session = 0
+
+        self.reply("220 localhost SMTP sink ready")
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            command = line[:4].upper()
+
+            if command == "EHLO":
+                self.reply("250-localhost")
+                self.reply("250-AUTH PLAIN LOGIN")
+                self.reply("250 8BITMIME")
+            elif command == "HELO":
+                self.reply("250 localhost")
+            elif command == "AUTH":
+                self.reply("235 Authentication successful")
+            elif command == "MAIL":
+                if not sink._admit():
+                    # Throttle like a provider would: come back later
+                    self.reply("451 4.7.1 Rate limit exceeded, try again later")
+                    continue
+                sender, recipients = line.split(":", 1)[1].strip(), []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                recipients.append(line.split(":", 1)[1].strip().strip("<>"))
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk in (b".\r\n", b".\n"):
+                        break
+                    data.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                if sink.latency:
+                    time.sleep(sink.latency)
+                sink._record_message(sender, recipients, b"".join(data))
+                messages_this_session += 1
+                self.reply("250 OK: queued")
+                if sink.drop_after and messages_this_session >= sink.drop_after:
+                    # Simulate the server hanging up on a long-lived session
+                    return
+            elif command == "RSET":
+                sender, recipients = None, []
+                self.reply("250 OK")
+            elif command == "NOOP":
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPSink:
+    """Threaded local SMTP server that records delivered messages."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        drop_after: int = 0,
+        latency: float = 0.0,
+        max_rate: float = 0.0,
+        burst: int = 1,
+    ):
+        """Bind the sink; port 0 picks a free port.
+
+        drop_after closes a session after N messages, and latency adds that
+        many seconds before each message is acknowledged. max_rate accepts
+        at most that many messages per second (after an initial burst) and
+        answers the rest with a transient 451, like a throttling provider.
+        """
+        self.drop_after = drop_after
+        self.latency = latency
+        self.max_rate = max_rate
+        self.burst = max(1, burst)
+        self.messages: List[Tuple[str, List[str], bytes]] = []
+        self.connections = 0
+        self.throttled = 0
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+
+        self._server = socketserver.ThreadingTCPServer((host, port), _SinkHandler)
+        self._server.daemon_threads = True
+        self._server.sink = self
+        self.host, self.port = self._server.server_address
+        self._thread = None
+
+    def _record_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def _admit(self) -> bool:
+        """Whether the rate limit lets another message in right now."""
+        if not self.max_rate:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._refilled) * self.max_rate
+            )
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.throttled += 1
+            return False
+
+    def _record_message(self, sender: str, recipients: List[str], data: bytes):
+        with self._lock:
+            self.messages.append((sender, recipients, data))
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down and release the port."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    sink = SMTPSink(port=1025).start()
+    print(f"SMTP sink listening on {sink.host}:{sink.port} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print(f"\nReceived {len(sink.messages)} messages.")
+        sink.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Student Identity Resolution
+Matches the rows of any number of exports to students by normalized SID,
+then email, then name, using hash indexes of 64-bit keys instead of an
+outer merge on (Name, Email). Reports duplicate rows, SID/email conflicts
+and name-only matches so they can be checked by hand.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Kinds of identity problems, as recorded in IdentityResolver.issues
+DUPLICATE = "duplicate"  # The same student appears twice in one export
+CONFLICT = "conflict"  # SID and email point to different students (SID wins)
+NAME_MATCH = "name match"  # Matched only by name; SID and email both differ
+
+# Hashed key standing for "no SID"
+NO_SID = np.uint64(0)
+
+# (name, email, SID) keys of one export's rows, as 64-bit hashes
+IdentityKeys = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+# Rows normalized at a time, so only one batch of key strings is alive at once
+KEY_BATCH_SIZE = 65536
+
+
+def _strings(values) -> np.ndarray:
+    # Iterating a plain object array is much faster than iterating a Series
+    return pd.Series(values, dtype=object).fillna("").to_numpy()
+
+
+def normalize_emails(values) -> np.ndarray:
+    return np.array([str(value).strip().lower() for value in _strings(values)], dtype=object)
+
+
+def normalize_names(values) -> np.ndarray:
+    """Casefold, collapse whitespace and turn 'Last, First' into 'first last'."""
+    normalized = []
+    for value in _strings(values):
+        name = " ".join(str(value).split()).casefold()
+        if "," in name:
+            last, _, first = name.partition(",")
+            name = f"{first.strip()} {last.strip()}"
+        normalized.append(name)
+    return np.array(normalized, dtype=object)
+
+
+def normalize_sids(values) -> np.ndarray:
+    """Stripped SIDs; missing ones become empty strings."""
+    return np.array([str(value).strip() for value in _strings(values)], dtype=object)
+
+
+def _hash(keys: np.ndarray) -> np.ndarray:
+    return pd.util.hash_array(keys, categorize=False)
+
+
+def _name_keys(values) -> np.ndarray:
+    return _hash(normalize_names(values))
+
+
+def _email_keys(values) -> np.ndarray:
+    return _hash(normalize_emails(values))
+
+
+def _sid_keys(values) -> np.ndarray:
+    sids = normalize_sids(values)
+    return np.where(sids != "", _hash(sids), NO_SID)
+
+
+def _batched(keys_of, values) -> np.ndarray:
+    """keys_of(values), a batch of rows at a time so the strings stay small."""
+    values = _strings(values)
+    keys = np.empty(len(values), dtype=np.uint64)
+    for start in range(0, len(values), KEY_BATCH_SIZE):
+        keys[start : start + KEY_BATCH_SIZE] = keys_of(values[start : start + KEY_BATCH_SIZE])
+    return keys
+
+
+def export_keys(names, emails, sids=None) -> IdentityKeys:
+    """Hashed, normalized identity keys for one export's rows.
+
+    Probing integer indexes is several times faster than probing strings,
+    and a 64-bit collision among a course's students is vanishingly unlikely.
+    Only the uint64 keys are kept; the normalized strings are dropped batch
+    by batch.
+    """
+    if sids is None:
+        sid_keys = np.full(len(names), NO_SID, dtype=np.uint64)
+    else:
+        sid_keys = _batched(_sid_keys, sids)
+    return _batched(_name_keys, names), _batched(_email_keys, emails), sid_keys
+
+
+class _KeyIndex:
+    """A hash index from one kind of key to student ids.
+
+    Keys and ids are kept in two typed arrays that new keys are appended to.
+    The hash table over the keys is built on the first probe after a change,
+    so exports of an unchanged roster are all probed against the same one.
+    """
+
+    def __init__(self):
+        self.keys = np.array([], dtype=np.uint64)
+        self.ids = np.array([], dtype=np.int64)
+        self._index: Optional[pd.Index] = None
+
+    def positions(self, keys: np.ndarray) -> np.ndarray:
+        """Where each key is in the index, or -1 for keys not seen before."""
+        if not len(self.keys):
+            return np.full(len(keys), -1, dtype=np.intp)
+        if self._index is None:
+            self._index = pd.Index(self.keys, copy=False)
+        return self._index.get_indexer(keys)
+
+    def lookup_keys(self, keys: np.ndarray) -> np.ndarray:
+        return self.lookup(self.positions(keys))
+
+    def lookup(self, positions: np.ndarray) -> np.ndarray:
+        """The student id at each position, or -1 when unknown or ambiguous."""
+        if not len(self.ids):
+            return np.full(len(positions), -1, dtype=np.int64)
+        return np.where(positions >= 0, self.ids[np.maximum(positions, 0)], -1)
+
+    def add(self, keys: np.ndarray, ids: np.ndarray, usable: np.ndarray, positions: np.ndarray):
+        """Index new keys; a key already pointing at another student becomes ambiguous."""
+        known = usable & (positions >= 0)
+        clash = known.copy()
+        clash[known] = self.ids[positions[known]] != ids[known]
+        self.ids[positions[clash]] = -1
+
+        new = usable & (positions < 0)
+        if not new.any():
+            return
+        new_keys, new_ids = keys[new], ids[new]
+        repeated = pd.Series(new_keys).duplicated(keep=False).to_numpy()
+        if repeated.any():
+            added = pd.DataFrame({"key": new_keys[repeated], "id": new_ids[repeated]})
+            added = added.drop_duplicates()
+            # Two students sharing a new key (e.g. a common name) can't be told apart by it
+            added.loc[added["key"].duplicated(keep=False), "id"] = -1
+            added = added.drop_duplicates("key")
+            new_keys = np.concatenate([new_keys[~repeated], added["key"].to_numpy()])
+            new_ids = np.concatenate([new_ids[~repeated], added["id"].to_numpy()])
+        self.keys = np.concatenate([self.keys, new_keys])
+        self.ids = np.concatenate([self.ids, new_ids])
+        self._index = None
+
+
+class IdentityResolver:
+    """Assigns every row of every export a student id, one export at a time.
+
+    A row is matched to a known student by SID when it has one, else by
+    email, else by name when the name is unambiguous and the SIDs don't
+    disagree. Each export is resolved with a few vectorized hash probes, so
+    joining k exports of n rows costs O(n * k) rather than an outer merge on
+    composite string keys.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.issues: List[Dict] = []
+        self._sids = _KeyIndex()
+        self._emails = _KeyIndex()
+        # Names are only indexed once some row needs the fallback
+        self._names: Optional[_KeyIndex] = None
+        self._name_history: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._student_sids = np.array([], dtype=np.uint64)
+
+    def resolve(
+        self,
+        label: str,
+        names: np.ndarray,
+        emails: np.ndarray,
+        sids: Optional[np.ndarray] = None,
+        keys: Optional[IdentityKeys] = None,
+    ) -> np.ndarray:
+        """Student ids for an export's rows; new students get new ids.
+
+        `names` and `emails` are the rows as exported, used in the issues
+        recorded. `keys` may pass in export_keys computed earlier.
+        """
+        if keys is None:
+            keys = export_keys(names, emails, sids)
+        name_keys, email_keys, sid_keys = keys
+        has_sid = sid_keys != NO_SID
+
+        sid_positions = self._sids.positions(sid_keys)
+        email_positions = self._emails.positions(email_keys)
+        by_sid = np.where(has_sid, self._sids.lookup(sid_positions), -1)
+        by_email = self._emails.lookup(email_positions)
+
+        # The SID wins: over an email known for someone else, and over an
+        # email whose student has a different SID
+        email_sids = self._student_sids[np.maximum(by_email, 0)] if self.count else sid_keys
+        sids_agree = ~has_sid | (email_sids == NO_SID) | (email_sids == sid_keys)
+        ids = np.where(by_sid >= 0, by_sid, np.where(sids_agree, by_email, -1))
+
+        matched_email = by_email >= 0
+        for row in np.flatnonzero(matched_email & (by_sid >= 0) & (by_sid != by_email)).tolist():
+            self._issue(
+                CONFLICT,
+                label,
+                names,
+                emails,
+                row,
+                "SID and email belong to different students; matched by SID",
+            )
+        for row in np.flatnonzero(matched_email & (by_sid < 0) & ~sids_agree).tolist():
+            self._issue(
+                CONFLICT,
+                label,
+                names,
+                emails,
+                row,
+                "email belongs to a student with a different SID; not matched by email",
+            )
+
+        # Fall back to the name, unless both sides have SIDs and they differ
+        candidate = np.zeros(len(ids), dtype=bool)
+        if (ids < 0).any() and self._name_history:
+            by_name = np.where(ids < 0, self._name_index().lookup_keys(name_keys), -1)
+            candidate = by_name >= 0
+        if candidate.any():
+            known_sids = self._student_sids[np.maximum(by_name, 0)]
+            candidate &= ~has_sid | (known_sids == NO_SID) | (known_sids == sid_keys)
+            for row in np.flatnonzero(candidate).tolist():
+                self._issue(
+                    NAME_MATCH,
+                    label,
+                    names,
+                    emails,
+                    row,
+                    "matched an earlier export by name only",
+                )
+            ids = np.where(candidate, by_name, ids)
+
+        # Everyone still unmatched is a new student, one per distinct SID or email
+        new = ids < 0
+        if new.any():
+            codes, uniques = pd.factorize(
+                np.where(has_sid[new], sid_keys[new], email_keys[new])
+            )
+            ids[new] = self.count + codes
+            self.count += len(uniques)
+            self._student_sids = np.concatenate(
+                [self._student_sids, np.full(len(uniques), NO_SID, dtype=np.uint64)]
+            )
+
+        duplicated = pd.Series(ids).duplicated(keep="last").to_numpy()
+        for row in np.flatnonzero(duplicated).tolist():
+            self._issue(
+                DUPLICATE,
+                label,
+                names,
+                emails,
+                row,
+                "appears more than once in this export; the last row is used",
+            )
+
+        self._student_sids[ids[has_sid]] = sid_keys[has_sid]
+        every_row = np.ones(len(ids), dtype=bool)
+        self._sids.add(sid_keys, ids, has_sid, sid_positions)
+        self._emails.add(email_keys, ids, every_row, email_positions)
+        if self._names is not None:
+            self._names.add(name_keys, ids, every_row, self._names.positions(name_keys))
+        else:
+            self._name_history.append((name_keys, ids))
+        return ids
+
+    def _name_index(self) -> _KeyIndex:
+        if self._names is None:
+            self._names = _KeyIndex()
+            for name_keys, ids in self._name_history:
+                self._names.add(
+                    name_keys,
+                    ids,
+                    np.ones(len(ids), dtype=bool),
+                    self._names.positions(name_keys),
+                )
+            self._name_history = []
+        return self._names
+
+    def _issue(self, kind: str, label: str, names, emails, row: int, detail: str):
+        self.issues.append(
+            {
+                "kind": kind,
+                "export": label,
+                "name": names[row],
+                "email": emails[row],
+                "detail": detail,
+            }
+        )
+
+    def issue_counts(self) -> Dict[str, int]:
+        counts = {DUPLICATE: 0, CONFLICT: 0, NAME_MATCH: 0}
+        for issue in self.issues:
+            counts[issue["kind"]] += 1
+        return counts
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Student Results
+A compact struct-of-arrays store for categorized students: one array per
+field plus a category code per student, with per-category and per-email
+views that don't build a dict for every student.
+"""
+
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+class StudentRow(Mapping):
+    """Read-only view of one student, shaped like the legacy student dict.
+
+    iter_students reuses a single StudentRow and moves it from row to row,
+    so copy it with dict(row) to keep a student beyond the current step.
+    `row` is the student's row in the store; `index` is its position in
+    `values`, which differ when the values hold only a slice of the rows.
+    """
+
+    __slots__ = ("_values", "row", "index")
+
+    def __init__(self, values: Dict[str, list], row: int = 0, index: Optional[int] = None):
+        self._values = values
+        self.row = row
+        self.index = row if index is None else index
+
+    def __getitem__(self, field: str):
+        return self._values[field][self.index]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def copy(self) -> Dict:
+        """This student as a standalone dict."""
+        index = self.index
+        return {field: values[index] for field, values in self._values.items()}
+
+    def __repr__(self) -> str:
+        return f"StudentRow({self.copy()!r})"
+
+
+class StudentResults:
+    """Column arrays for every analyzed student plus an int8 category code.
+
+    Rows keep the order they were categorized in, so each category lists
+    its students in the same order as the legacy per-category lists.
+    """
+
+    def __init__(self, categories: List[str], codes: np.ndarray, columns: Dict):
+        self.categories = list(categories)
+        self.codes = np.asarray(codes, dtype=np.int8)
+        self.columns = {field: np.asarray(values) for field, values in columns.items()}
+        self.fields = list(self.columns)
+
+        self._values: Optional[Dict[str, list]] = None
+        self._rows: Dict[str, np.ndarray] = {}
+        self._email_index: Optional[Dict[str, int]] = None
+        self._legacy: Optional[Dict[str, List[Dict]]] = None
+
+    @classmethod
+    def from_dict(cls, student_analysis: Dict[str, List[Dict]]) -> "StudentResults":
+        """Build a store from the legacy {category: [student dict, ...]} shape."""
+        categories = list(student_analysis)
+        students = [
+            student
+            for category in categories
+            for student in student_analysis[category]
+        ]
+        codes = np.repeat(
+            np.arange(len(categories), dtype=np.int8),
+            [len(student_analysis[category]) for category in categories],
+        )
+        fields = list(students[0]) if students else []
+        columns = {}
+        for field in fields:
+            values = [student[field] for student in students]
+            columns[field] = np.array(
+                values, dtype=object if isinstance(values[0], str) else np.float64
+            )
+        return cls(categories, codes, columns)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _field_lists(self) -> Dict[str, list]:
+        if self._values is None:
+            self._values = {
+                field: values.tolist() for field, values in self.columns.items()
+            }
+        return self._values
+
+    def field_values(self, field: str) -> list:
+        """A field as a Python list, converted once and then reused."""
+        return self._field_lists()[field]
+
+    def rows(self, category: str) -> np.ndarray:
+        """Row numbers of a category's students, in order."""
+        rows = self._rows.get(category)
+        if rows is None:
+            code = self.categories.index(category)
+            rows = self._rows[category] = np.flatnonzero(self.codes == code)
+        return rows
+
+    def counts(self) -> Dict[str, int]:
+        """Number of students in each category, including empty ones."""
+        counts = np.bincount(self.codes, minlength=len(self.categories))
+        return dict(zip(self.categories, counts.tolist()))
+
+    def iter_rows(self) -> Iterator[Tuple[str, int]]:
+        """(category, row) for every student, category by category."""
+        for category in self.categories:
+            for row in self.rows(category).tolist():
+                yield category, row
+
+    def iter_students(
+        self, category: Optional[str] = None
+    ) -> Iterator[Tuple[str, StudentRow]]:
+        """(category, student view) pairs, reusing one StudentRow throughout."""
+        view = StudentRow(self._field_lists())
+        for current in [category] if category else self.categories:
+            for row in self.rows(current).tolist():
+                view.row = view.index = row
+                yield current, view
+
+    def students_at(self, rows: np.ndarray) -> Iterator[StudentRow]:
+        """Views of just these rows, converting only their fields to Python values.
+
+        Unlike iter_students, which converts every column once and keeps it,
+        walking a large roster a slice at a time this way keeps memory bounded.
+        """
+        rows = np.asarray(rows)
+        view = StudentRow({field: values[rows].tolist() for field, values in self.columns.items()})
+        for index, row in enumerate(rows.tolist()):
+            view.row, view.index = row, index
+            yield view
+
+    def student(self, row: int) -> Dict:
+        """One student as a standalone dict."""
+        return StudentRow(self._field_lists(), row).copy()
+
+    def row_for_email(self, email: str) -> Optional[int]:
+        """Row number of the student with this email, if analyzed."""
+        if self._email_index is None:
+            self._email_index = {
+                email: row for row, email in enumerate(self.field_values("email"))
+            }
+        return self._email_index.get(email)
+
+    def category_of(self, row: int) -> str:
+        return self.categories[self.codes[row]]
+
+    def to_dict(self) -> Dict[str, List[Dict]]:
+        """The legacy {category: [student dict, ...]} shape, built once on demand."""
+        if self._legacy is None:
+            self._legacy = {}
+            for category in self.categories:
+                rows = self.rows(category)
+                values = [self.columns[field][rows].tolist() for field in self.fields]
+                self._legacy[category] = [
+                    dict(zip(self.fields, row)) for row in zip(*values)
+                ]
+        return self._legacy
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Submission Timing
+Parses Gradescope's Submission Time and Lateness (H:M:S) columns, then
+derives hours late, hours before the deadline and last-minute flags per
+student, for the category rules, the report and templates.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Submitting less than this many hours before the deadline counts as last-minute
+LAST_MINUTE_HOURS = 2.0
+
+# Time-before-deadline bins for the report: (label, lower bound in hours)
+DEADLINE_BINS = [
+    ("late", -np.inf),
+    ("<2h", 0),
+    ("2-12h", 2),
+    ("12-24h", 12),
+    ("1-3d", 24),
+    ("3d+", 72),
+]
+
+# Gradescope writes times as "2025-10-08 17:12:42 -0400"
+LOCAL_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+_LOCAL_TIME_WIDTH = 19
+_UTC_OFFSET = re.compile(r" ([+-])(\d\d)(\d\d)")
+
+_EPOCH = pd.Timestamp(0)
+
+
+def _strings(values) -> pd.Series:
+    return pd.Series(values, dtype=object).fillna("")
+
+
+def _offset_seconds(offset: str) -> float:
+    match = _UTC_OFFSET.fullmatch(offset)
+    if match is None:
+        return np.nan
+    sign, hours, minutes = match.groups()
+    seconds = int(hours) * 3600 + int(minutes) * 60
+    return -seconds if sign == "-" else seconds
+
+
+def parse_submission_times(values) -> np.ndarray:
+    """Seconds since the epoch (UTC) for each 'YYYY-MM-DD HH:MM:SS +ZZZZ' value.
+
+    The local time is parsed with a fixed format and the UTC offset apart
+    from it, since pandas' %z path is many times slower. An export has only
+    a few distinct offsets, so each is parsed once; a value whose offset
+    isn't where the format puts it is rejected. Blank values become NaN;
+    the rare value in another format falls back to pd.to_datetime.
+    """
+    strings = _strings(values)
+    # exact=False matches the format at the start and leaves the offset alone
+    local = pd.to_datetime(strings, format=LOCAL_TIME_FORMAT, exact=False, errors="coerce")
+    codes, offsets = pd.factorize(strings.str[_LOCAL_TIME_WIDTH:])
+    offset_seconds = np.array([_offset_seconds(offset) for offset in offsets] + [np.nan])
+    seconds = (local - _EPOCH).dt.total_seconds().to_numpy() - offset_seconds[codes]
+
+    other = np.flatnonzero(np.isnan(seconds) & (strings != "").to_numpy())
+    if len(other):
+        parsed = pd.to_datetime(strings.iloc[other], errors="coerce", utc=True, format="mixed")
+        seconds[other] = (parsed - _EPOCH.tz_localize("UTC")).dt.total_seconds().to_numpy()
+    return seconds
+
+
+def parse_durations(values) -> np.ndarray:
+    """Seconds for each 'H:MM:SS' value (any number of hour digits); blanks become NaN.
+
+    Most rows share a few values (all zeros for everyone on time), so each
+    distinct value is parsed once.
+    """
+    codes, durations = pd.factorize(_strings(values))
+    seconds = pd.to_timedelta(
+        pd.Series(durations, dtype=object).replace("", None), errors="coerce"
+    ).dt.total_seconds()
+    return seconds.to_numpy(dtype=float)[codes]
+
+
+def parse_deadline(text: str) -> float:
+    """A deadline given by hand, e.g. '2025-10-15 23:59:00 -0400', as epoch seconds."""
+    parsed = parse_submission_times([text])[0]
+    if np.isnan(parsed):
+        raise ValueError(f"Cannot parse deadline: {text!r}")
+    return float(parsed)
+
+
+def infer_deadline(submitted: np.ndarray, lateness: np.ndarray) -> float:
+    """The deadline implied by late submissions (submission time minus lateness).
+
+    Gradescope exports don't include the deadline itself. The median over
+    late rows ignores individual extensions; without any late rows the
+    deadline is unknown (NaN) unless given by hand.
+    """
+    late = (lateness > 0) & ~np.isnan(submitted)
+    if not late.any():
+        return np.nan
+    return float(np.median(submitted[late] - lateness[late]))
+
+
+def timing_features(
+    hours_late: np.ndarray,
+    hours_before_deadline: np.ndarray,
+    views: np.ndarray,
+    submissions: np.ndarray,
+    last_minute_hours: float = LAST_MINUTE_HOURS,
+) -> Dict[str, np.ndarray]:
+    """Per-student timing features from students x assessments matrices.
+
+    hours_late, hours_before_deadline, views and submissions are the latest
+    assessment's; late_count and last_minute_count count assessments
+    submitted after, or within last_minute_hours before, the deadline.
+    Unknown times are NaN, so rules comparing them never match.
+    """
+    late = hours_late > 0
+    with np.errstate(invalid="ignore"):
+        last_minute = ~late & (hours_before_deadline >= 0) & (
+            hours_before_deadline < last_minute_hours
+        )
+    return {
+        "hours_late": hours_late[:, -1],
+        "hours_before_deadline": hours_before_deadline[:, -1],
+        "views": views[:, -1],
+        "submissions": submissions[:, -1],
+        "late_count": late.sum(axis=1),
+        "last_minute_count": last_minute.sum(axis=1),
+    }
+
+
+def timing_summary(
+    assessments: List[str],
+    hours_late: Dict[str, np.ndarray],
+    hours_before_deadline: Dict[str, np.ndarray],
+    submissions: Dict[str, np.ndarray],
+    last_minute_hours: float = LAST_MINUTE_HOURS,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Per-assessment submission timing, and a time-before-deadline histogram.
+
+    Each dict maps an assessment label to one value per student; only
+    students who submitted are counted. The summary has one row per
+    assessment; the histogram is indexed by assessment with one column
+    per DEADLINE_BINS label. Submissions after the deadline, including
+    ones Gradescope didn't mark late (extensions), go in the first bin.
+    """
+    bounds = np.array([bound for _, bound in DEADLINE_BINS[1:]], dtype=float)
+    rows, histograms = [], []
+    for label in assessments:
+        before = hours_before_deadline[label]
+        late = hours_late[label]
+        submitted = (submissions[label] > 0) | ~np.isnan(before) | (late > 0)
+        before, late = before[submitted], late[submitted]
+        is_late = late > 0
+        on_time = before[~is_late & (before >= 0)]
+        rows.append(
+            {
+                "assessment": label,
+                "submitted": int(submitted.sum()),
+                "late": int(is_late.sum()),
+                "last_minute": int((on_time < last_minute_hours).sum()),
+                "resubmitted": int((submissions[label][submitted] > 1).sum()),
+                "median_hours_before": float(np.median(on_time)) if len(on_time) else np.nan,
+                "median_hours_late": float(np.median(late[is_late])) if is_late.any() else 0.0,
+            }
+        )
+        known = ~np.isnan(before)
+        counts = np.bincount(
+            np.searchsorted(bounds, before[known], side="right"), minlength=len(DEADLINE_BINS)
+        )
+        counts[0] += (is_late & ~known).sum()
+        histograms.append(counts)
+    return pd.DataFrame(rows), pd.DataFrame(
+        histograms, index=assessments, columns=[label for label, _ in DEADLINE_BINS]
+    )
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Synthetic Gradescope Exports
+Generates realistic fake Gradescope CSV exports with the same header layout
+as real ones, for benchmarks and for trying the tools without student data.
+"""
+
+import argparse
+import os
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+FIRST_NAMES = [
+    "Alex", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Avery", "Quinn",
+    "Jamie", "Dakota", "Priya", "Wei", "Sofia", "Mateo", "Aisha", "Kenji",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Lee", "Garcia", "Patel", "Nguyen", "Kim", "Brown",
+    "Davis", "Martinez", "Chen", "Wilson", "Lopez", "Clark", "Singh", "Young",
+]
+POINT_VALUES = np.array([0.5, 1.0, 2.0, 5.0])
+
+# Share of students with no submission, and of submissions turned in late
+MISSING_RATE = 0.02
+LATE_RATE = 0.05
+
+
+def question_headers(
+    num_questions: int, rng: np.random.Generator
+) -> List[Tuple[str, float]]:
+    """Build (header, max points) pairs like '1.1 (1.0 pts)' or '2.1: C (2.0 pts)'."""
+    headers = []
+    for q in range(num_questions):
+        section, part = q // 5 + 1, q % 5 + 1
+        points = float(rng.choice(POINT_VALUES))
+        label = f"{section}.{part}"
+        if section % 4 == 2:
+            # Some sections are named sub-questions, as in real exports
+            label += f": {chr(ord('A') + part - 1)}"
+        headers.append((f"{label} ({points} pts)", points))
+    return headers
+
+
+def generate_export(
+    num_students: int,
+    num_questions: int = 25,
+    quiz_index: int = 0,
+    seed: int = 311,
+) -> pd.DataFrame:
+    """Generate one quiz export for a roster shared across quizzes.
+
+    A student's underlying ability depends only on the seed, so scores are
+    correlated across quizzes from the same roster, with some drift per quiz.
+    """
+    roster_rng = np.random.default_rng(seed)
+    ability = roster_rng.beta(5, 1.5, num_students)
+    first = roster_rng.choice(FIRST_NAMES, num_students)
+    last = roster_rng.choice(LAST_NAMES, num_students)
+    sids = roster_rng.permutation(num_students) + 730_000_000
+
+    rng = np.random.default_rng([seed, quiz_index + 1])
+    headers = question_headers(num_questions, rng)
+    max_points = np.array([points for _, points in headers])
+
+    # Per-quiz drift lets some students improve or decline between quizzes
+    skill = np.clip(ability + rng.normal(0, 0.12, num_students), 0.02, 1.0)
+    earned_fraction = rng.random((num_students, num_questions)) < skill[:, None]
+    partial = rng.random((num_students, num_questions)) < 0.1
+    points = np.where(
+        earned_fraction, max_points, np.where(partial, max_points / 2, 0.0)
+    )
+
+    missing = rng.random(num_students) < MISSING_RATE
+    total = points.sum(axis=1)
+
+    deadline = pd.Timestamp("2025-09-23 23:59:00") + pd.Timedelta(weeks=quiz_index)
+    before_deadline = pd.to_timedelta(
+        rng.exponential(36 * 3600, num_students), unit="s"
+    )
+    late = rng.random(num_students) < LATE_RATE
+    lateness = pd.to_timedelta(
+        np.where(late, rng.exponential(3 * 3600, num_students), 0), unit="s"
+    )
+    submitted_at = deadline - before_deadline.where(~late, pd.Timedelta(0)) + lateness
+
+    def blank_if_missing(values):
+        return pd.Series(values).astype(object).where(~missing, "")
+
+    frame = pd.DataFrame(
+        {
+            "Name": [f"{f} {l}" for f, l in zip(first, last)],
+            "SID": sids,
+            "Email": [f"student{i}@unc.edu" for i in range(num_students)],
+            "Total Score": blank_if_missing(total),
+            "Max Points": max_points.sum(),
+            "Status": np.where(missing, "Missing", "Graded"),
+            "Submission ID": blank_if_missing(
+                350_000_000 + quiz_index * num_students + np.arange(num_students)
+            ),
+            "Submission Time": blank_if_missing(
+                submitted_at.strftime("%Y-%m-%d %H:%M:%S -0400")
+            ),
+            "Lateness (H:M:S)": blank_if_missing(
+                [
+                    f"{int(s) // 3600:02d}:{int(s) % 3600 // 60:02d}:{int(s) % 60:02d}"
+                    for s in lateness.total_seconds()
+                ]
+            ),
+            "View Count": blank_if_missing(rng.integers(0, 5, num_students)),
+            "Submission Count": blank_if_missing(rng.integers(1, 3, num_students)),
+        }
+    )
+    question_frame = pd.DataFrame(points, columns=[header for header, _ in headers])
+    question_frame[missing] = np.nan
+    return pd.concat([frame, question_frame], axis=1)
+
+
+def write_exports(
+    directory: str,
+    num_students: int,
+    num_quizzes: int = 2,
+    num_questions: int = 25,
+    seed: int = 311,
+) -> List[Tuple[str, str]]:
+    """Write one CSV per quiz and return (label, path) pairs, oldest first."""
+    os.makedirs(directory, exist_ok=True)
+    exports = []
+    for quiz in range(num_quizzes):
+        label = f"Quiz {quiz + 1}"
+        path = os.path.join(directory, f"quiz{quiz + 1}-scores.csv")
+        frame = generate_export(num_students, num_questions, quiz, seed)
+        frame.to_csv(path, index=False)
+        exports.append((label, path))
+    return exports
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic Gradescope exports."
+    )
+    parser.add_argument("directory", help="Where to write the CSV files")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--quizzes", type=int, default=2)
+    parser.add_argument("--questions", type=int, default=25)
+    parser.add_argument("--seed", type=int, default=311)
+    args = parser.parse_args()
+
+    for label, path in write_exports(
+        args.directory, args.students, args.quizzes, args.questions, args.seed
+    ):
+        print(f"{label}: {path}")
+
+
+if __name__ == "__main__":
+    main()
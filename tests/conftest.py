@@ -0,0 +1,37 @@
+"""Shared fixtures: the bundled exports and a local SMTP sink."""
+
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from gradescope_analyzer import GradescopeAnalyzer  # noqa: E402
+from smtp_sink import SMTPSink  # noqa: E402
+
+SENDER = "instructor@unc.edu"
+
+
+@pytest.fixture
+def analyzer():
+    analyzer = GradescopeAnalyzer(
+        os.path.join(ROOT, "three-scores.csv"), os.path.join(ROOT, "two-scores.csv")
+    )
+    analyzer.analyze_student_performance()
+    return analyzer
+
+
+@pytest.fixture
+def sink():
+    with SMTPSink() as sink:
+        yield sink
+
+
+def send_to(analyzer, sink, **options):
+    """Really send the roster to the sink, without TLS."""
+    return analyzer.send_emails(
+        sink.host, sink.port, SENDER, "password", dry_run=False, use_tls=False, **options
+    )
@@ -0,0 +1,63 @@
+"""Delta mode: only students who changed since the previous analysis are emailed."""
+
+import numpy as np
+
+from analysis_delta import CATEGORY_CHANGED, NEW, SCORE_CHANGED, UNCHANGED, AnalysisDelta
+from conftest import send_to
+from student_results import StudentResults
+
+
+def previous_run(store, keep):
+    """A copy of the results, as if saved by an earlier run, for rows in `keep`."""
+    return StudentResults(
+        store.categories,
+        store.codes[keep].copy(),
+        {field: values[keep].copy() for field, values in store.columns.items()},
+    )
+
+
+def latest_percentage(store):
+    return [field for field in store.fields if field.endswith("_percentage")][-1]
+
+
+def test_only_new_recategorized_and_moved_students_are_changed(analyzer):
+    store = analyzer.student_results
+    keep = np.arange(1, len(store))  # The first student is new this run
+    previous = previous_run(store, keep)
+    field = latest_percentage(store)
+    # Previous rows are shifted by one: previous row r is current row r + 1
+    previous.codes[0] = (previous.codes[0] + 1) % len(store.categories)
+    previous.columns[field][1] -= 10
+    previous.columns[field][2] -= 4.9
+
+    delta = AnalysisDelta(store, previous, score_threshold=5.0)
+    assert [delta.reason(row) for row in range(4)] == [
+        NEW,
+        CATEGORY_CHANGED,
+        SCORE_CHANGED,
+        UNCHANGED,
+    ]
+    assert delta.counts()[UNCHANGED] == len(store) - 3
+    assert delta.changed.sum() == 3
+
+
+def test_send_emails_skips_unchanged_students(analyzer, sink):
+    store = analyzer.student_results
+    previous = previous_run(store, np.arange(len(store)))
+    previous.columns[latest_percentage(store)][[0, 5]] += 20
+
+    results = send_to(analyzer, sink, previous=previous)
+    emails = store.field_values("email")
+    # Messages go out category by category, so compare without order
+    assert sorted(recipients[0] for _, recipients, _ in sink.messages) == sorted(
+        [emails[0], emails[5]]
+    )
+    assert len(results["sent"]) == 2
+    assert len(results["unchanged"]) == len(store) - 2
+
+
+def test_nothing_changed_sends_nothing(analyzer, sink):
+    store = analyzer.student_results
+    results = send_to(analyzer, sink, previous=previous_run(store, np.arange(len(store))))
+    assert sink.messages == [] and results["sent"] == []
+    assert len(results["unchanged"]) == len(store)
@@ -0,0 +1,65 @@
+"""Saved analyses are valid JSON and load back unchanged."""
+
+import json
+
+import numpy as np
+import pytest
+
+from analysis_delta import load_results
+from analysis_snapshot import SNAPSHOT_VERSION
+from student_results import StudentResults
+
+
+def reject_constant(name):
+    raise ValueError(f"{name} is not valid JSON")
+
+
+@pytest.mark.parametrize("extension", ["json", "ndjson"])
+def test_unknown_times_are_written_as_null(analyzer, tmp_path, extension):
+    store = analyzer.student_results
+    # The bundled exports have no late rows, so the deadline is unknown
+    assert np.isnan(store.columns["hours_before_deadline"]).all()
+
+    path = analyzer.save_analysis(str(tmp_path / f"analysis.{extension}"))
+    with open(path) as f:
+        text = f.read()
+    documents = [text] if extension == "json" else text.splitlines()
+    for document in documents:
+        json.loads(document, parse_constant=reject_constant)
+
+    loaded = load_results(path)
+    expected = StudentResults.from_dict(store.to_dict())
+    for field in store.fields:
+        assert np.array_equal(
+            loaded.columns[field],
+            expected.columns[field],
+            equal_nan=loaded.columns[field].dtype.kind == "f",
+        ), field
+
+
+def test_newer_snapshot_versions_are_rejected(analyzer, tmp_path):
+    path = analyzer.save_analysis(str(tmp_path / "analysis.npz"))
+    with np.load(path) as data:
+        arrays = dict(data)
+    arrays["version"] = np.array(SNAPSHOT_VERSION + 1)
+    np.savez_compressed(path, **arrays)
+    with pytest.raises(ValueError, match="snapshot version"):
+        load_results(path)
+
+    path = analyzer.save_analysis(str(tmp_path / "analysis.ndjson"))
+    with open(path) as f:
+        header, *students = f.readlines()
+    with open(path, "w") as f:
+        f.write(json.dumps({**json.loads(header), "snapshot": SNAPSHOT_VERSION + 1}) + "\n")
+        f.writelines(students)
+    with pytest.raises(ValueError, match="snapshot version"):
+        load_results(path)
+
+
+def test_older_snapshot_versions_still_load(analyzer, tmp_path):
+    path = analyzer.save_analysis(str(tmp_path / "analysis.npz"))
+    with np.load(path) as data:
+        arrays = dict(data)
+    arrays["version"] = np.array(1)
+    np.savez_compressed(path, **arrays)
+    assert len(load_results(path)) == len(analyzer.student_results)
@@ -0,0 +1,40 @@
+"""Vectorized categorization against the original per-student loop."""
+
+import numpy as np
+
+from benchmark_categorization import categorize_with_iterrows, make_merged_data
+from gradescope_analyzer import CATEGORIES, GradescopeAnalyzer
+
+NUMERIC_FIELDS = [
+    "quiz2_score",
+    "quiz2_percentage",
+    "quiz3_score",
+    "quiz3_percentage",
+    "improvement",
+]
+
+
+def assert_same_categories(expected, actual):
+    for category in CATEGORIES:
+        want, got = expected[category], actual[category]
+        assert [(s["name"], s["email"]) for s in got] == [
+            (s["name"], s["email"]) for s in want
+        ], category
+        for field in NUMERIC_FIELDS:
+            assert np.allclose([s[field] for s in got], [s[field] for s in want]), field
+
+
+def test_bundled_exports_match_the_per_student_loop(analyzer):
+    expected = categorize_with_iterrows(analyzer.score_matrix)
+    assert_same_categories(expected, analyzer.student_results.to_dict())
+    assert sum(map(len, expected.values())) == len(analyzer.student_results)
+
+
+def test_synthetic_roster_matches_the_per_student_loop():
+    merged_data = make_merged_data(2000)
+    expected = categorize_with_iterrows(merged_data)
+    actual = GradescopeAnalyzer.categorize_students(merged_data).to_dict()
+    assert_same_categories(expected, actual)
+    # Students who missed both quizzes are left out
+    skipped = (merged_data["Quiz2_Percentage"] == 0) & (merged_data["Quiz3_Percentage"] == 0)
+    assert sum(map(len, actual.values())) == len(merged_data) - skipped.sum()
@@ -0,0 +1,40 @@
+"""Threshold sweeps against categorizing with each threshold combination."""
+
+import itertools
+
+import pytest
+
+from benchmark_categorization import make_merged_data
+from category_rules import DEFAULT_RULES, DEFAULT_SPEC, RuleSet
+from gradescope_analyzer import GradescopeAnalyzer
+
+GRID = {"high": [80, 85, 90], "low": [55, 60, 65], "jump": [10, 15]}
+
+
+def categorized_counts(merged_data, thresholds):
+    rules = RuleSet({**DEFAULT_SPEC, "thresholds": DEFAULT_RULES.with_thresholds(**thresholds)})
+    return GradescopeAnalyzer.categorize_students(merged_data, rules=rules).counts()
+
+
+def assert_sweep_matches(sweep, merged_data):
+    assert len(sweep) == len(list(itertools.product(*GRID.values())))
+    for row in sweep.to_dict("records"):
+        thresholds = {name: row[name] for name in GRID}
+        expected = categorized_counts(merged_data, thresholds)
+        assert {category: row[category] for category in expected} == expected, thresholds
+
+
+def test_bundled_sweep_matches_categorizing_each_combination(analyzer):
+    assert_sweep_matches(analyzer.sweep_thresholds(GRID), analyzer.score_matrix)
+
+
+def test_synthetic_sweep_matches_categorizing_each_combination(analyzer):
+    merged_data = make_merged_data(3000)
+    # Sweep a larger roster of the same two assessments
+    analyzer.student_results = GradescopeAnalyzer.categorize_students(merged_data)
+    assert_sweep_matches(analyzer.sweep_thresholds(GRID), merged_data)
+
+
+def test_unknown_threshold_is_rejected(analyzer):
+    with pytest.raises(ValueError, match="Unknown thresholds"):
+        analyzer.sweep_thresholds({"lenient": [1, 2]})
@@ -0,0 +1,58 @@
+"""Incremental cohort statistics against a full recompute."""
+
+import os
+
+import pandas as pd
+import pytest
+
+from gradescope_analyzer import GradescopeAnalyzer
+from synthetic_exports import generate_export, write_exports
+
+NUM_STUDENTS = 400
+
+
+def assert_same_stats(analyzer, stats, fresh):
+    # The statistics were updated in place, not recomputed from scratch
+    assert analyzer.cohort_stats is stats
+    pd.testing.assert_frame_equal(stats.summary(), fresh.summary(), rtol=1e-9)
+    pd.testing.assert_frame_equal(stats.histograms(), fresh.histograms())
+
+
+@pytest.fixture
+def course(tmp_path):
+    """Two quizzes, analyzed with cohort statistics computed."""
+    exports = write_exports(str(tmp_path), NUM_STUDENTS, num_quizzes=2)
+    analyzer = GradescopeAnalyzer.from_exports(exports)
+    analyzer.analyze_student_performance()
+    return analyzer, analyzer.cohort_stats, exports
+
+
+def test_regrade_and_dropped_students_match_a_full_recompute(course):
+    analyzer, stats, exports = course
+    label, path = exports[1]
+    regraded = pd.read_csv(path)
+    regraded.loc[:40, "Total Score"] = regraded.loc[:40, "Total Score"] * 0.5
+    regraded.drop(index=[100, 101]).to_csv(path, index=False)
+
+    analyzer.update_exports(exports, changed=[label])
+    assert_same_stats(analyzer, stats, GradescopeAnalyzer.from_exports(exports).cohort_stats)
+
+
+def test_new_export_matches_a_full_recompute(course, tmp_path):
+    analyzer, stats, exports = course
+    path = os.path.join(str(tmp_path), "quiz3-scores.csv")
+    generate_export(NUM_STUDENTS, quiz_index=2).to_csv(path, index=False)
+    exports = exports + [("Quiz 3", path)]
+
+    analyzer.update_exports(exports)
+    fresh = GradescopeAnalyzer.from_exports(exports).cohort_stats
+    assert analyzer.cohort_stats.assessments == ["Quiz 1", "Quiz 2", "Quiz 3"]
+    assert_same_stats(analyzer, stats, fresh)
+
+
+def test_removed_export_matches_a_full_recompute(course):
+    analyzer, stats, exports = course
+    analyzer.update_exports(exports[1:])
+    assert_same_stats(
+        analyzer, stats, GradescopeAnalyzer.from_exports(exports[1:]).cohort_stats
+    )
@@ -0,0 +1,81 @@
+"""Multi-course batch delivery: shared quota, retries and manifest checks."""
+
+import json
+import os
+import shutil
+
+import pytest
+
+from conftest import ROOT, SENDER
+from course_batch import load_manifest, run_batch
+from delivery_scheduler import DailyQuota, DeliveryScheduler
+from smtp_sink import SMTPSink
+
+
+def write_manifest(tmp_path, names):
+    courses = []
+    for i, name in enumerate(names):
+        directory = tmp_path / f"course{i}"
+        directory.mkdir()
+        for export in ("two-scores.csv", "three-scores.csv"):
+            shutil.copy(os.path.join(ROOT, export), directory / export)
+        courses.append(
+            {
+                "name": name,
+                "directory": directory.name,
+                "exports": [["Quiz 2", "two-scores.csv"], ["Quiz 3", "three-scores.csv"]],
+            }
+        )
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"courses": courses}))
+    return str(path)
+
+
+def send_batch(courses, sink, scheduler):
+    return run_batch(
+        courses,
+        sender_email=SENDER,
+        processes=2,
+        send=True,
+        smtp_server=sink.host,
+        smtp_port=sink.port,
+        sender_password="password",
+        workers=2,
+        use_tls=False,
+        scheduler=scheduler,
+    )
+
+
+def test_duplicate_course_names_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Duplicate course name"):
+        load_manifest(write_manifest(tmp_path, ["COMP 311", "COMP 311"]))
+
+
+def test_daily_quota_defers_across_courses(tmp_path, sink):
+    courses = load_manifest(write_manifest(tmp_path, ["COMP 311-001", "COMP 311-002"]))
+    quota_file = str(tmp_path / "quota.json")
+
+    batch = send_batch(courses, sink, DeliveryScheduler(daily_quota=DailyQuota(50, quota_file)))
+    outcomes = batch["outcomes"].values()
+    sent = sum(len(outcome["sent"]) for outcome in outcomes)
+    deferred = sum(len(outcome["deferred"]) for outcome in outcomes)
+    total = sum(len(result.messages) for result in batch["results"])
+    assert sent == len(sink.messages) == 50
+    assert deferred == total - 50
+    assert not any(outcome["failed"] for outcome in outcomes)
+
+    # With more quota the next run sends exactly the deferred messages
+    with SMTPSink() as later:
+        batch = send_batch(courses, later, DeliveryScheduler(daily_quota=DailyQuota(10_000)))
+    assert len(later.messages) == deferred
+    assert sum(len(outcome["skipped"]) for outcome in batch["outcomes"].values()) == 50
+
+
+def test_throttled_sends_are_retried(tmp_path):
+    courses = load_manifest(write_manifest(tmp_path, ["COMP 311-001", "COMP 311-002"]))
+    scheduler = DeliveryScheduler(max_attempts=20, base_backoff=0.01, max_backoff=0.1)
+    with SMTPSink(max_rate=400, burst=10) as sink:
+        batch = send_batch(courses, sink, scheduler)
+    assert sink.throttled
+    assert not any(outcome["failed"] for outcome in batch["outcomes"].values())
+    assert len(sink.messages) == sum(len(result.messages) for result in batch["results"])
@@ -0,0 +1,95 @@
+"""Delivery scheduler: daily quota, retry backoff and send priority."""
+
+import smtplib
+
+import pytest
+
+from conftest import send_to
+from delivery_scheduler import URGENT_FIRST, DailyQuota, DeliveryScheduler
+
+
+def throttled():
+    return smtplib.SMTPResponseException(451, b"Rate limit exceeded")
+
+
+def test_daily_quota_is_remembered_across_runs(tmp_path):
+    state = str(tmp_path / "quota.json")
+    quota = DailyQuota(3, state)
+    assert [quota.reserve() for _ in range(2)] == [True, True]
+
+    quota = DailyQuota(3, state)
+    assert quota.remaining == 1
+    assert [quota.reserve(), quota.reserve()] == [True, False]
+    quota.release()
+    assert DailyQuota(3, state).remaining == 1
+
+
+def test_backoff_doubles_with_jitter_up_to_the_cap():
+    scheduler = DeliveryScheduler(base_backoff=1.0, max_backoff=8.0)
+    for attempt, delay in [(1, 1), (2, 2), (3, 4), (4, 8), (6, 8)]:
+        for _ in range(20):
+            assert delay / 2 <= scheduler.backoff(attempt) <= delay
+
+
+def test_transient_failures_are_retried_with_backoff():
+    sleeps, attempts = [], []
+
+    def send():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise throttled()
+
+    scheduler = DeliveryScheduler(max_attempts=5, sleep=sleeps.append)
+    scheduler.run(send)
+    assert len(attempts) == 3
+    assert len(sleeps) == 2 and sleeps[0] <= 1 <= sleeps[1]
+
+
+def test_gives_up_and_returns_the_quota_after_max_attempts():
+    quota = DailyQuota(10)
+    scheduler = DeliveryScheduler(daily_quota=quota, max_attempts=3, sleep=lambda _: None)
+    assert scheduler.reserve()
+
+    def send():
+        raise throttled()
+
+    with pytest.raises(smtplib.SMTPResponseException):
+        scheduler.run(send)
+    assert quota.used == 0
+
+
+def test_permanent_failures_are_not_retried():
+    attempts = []
+
+    def send():
+        attempts.append(1)
+        raise smtplib.SMTPRecipientsRefused({"a@x.edu": (550, b"No such user")})
+
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        DeliveryScheduler(sleep=lambda _: None).run(send)
+    assert len(attempts) == 1
+
+
+def test_priority_categories_go_first_in_roster_order():
+    categories = ["consistent", "declining", "excelling", "struggling", "declining"]
+    order = DeliveryScheduler(priority=URGENT_FIRST).order(categories)
+    assert order == [3, 1, 4, 0, 2]
+    assert DeliveryScheduler().order(categories) == [0, 1, 2, 3, 4]
+
+
+def test_send_emails_defers_past_the_quota_in_priority_order(analyzer, sink):
+    store = analyzer.student_results
+    counts = store.counts()
+    urgent = counts["struggling"] + counts["declining"]
+    scheduler = DeliveryScheduler(daily_quota=DailyQuota(urgent + 5), priority=URGENT_FIRST)
+
+    results = send_to(analyzer, sink, scheduler=scheduler)
+    assert len(results["sent"]) == len(sink.messages) == urgent + 5
+    assert len(results["deferred"]) == len(store) - urgent - 5
+
+    emails = store.field_values("email")
+    category_of = {emails[row]: store.category_of(row) for row in range(len(store))}
+    sent = [category_of[recipients[0]] for _, recipients, _ in sink.messages]
+    assert sent[:urgent] == ["struggling"] * counts["struggling"] + ["declining"] * counts[
+        "declining"
+    ]
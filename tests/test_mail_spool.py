@@ -0,0 +1,53 @@
+"""Spool flushes: only undelivered messages stay behind."""
+
+import shutil
+
+from conftest import SENDER
+from delivery_scheduler import DailyQuota, DeliveryScheduler
+from mail_spool import MailSpool, flush_spool, read_spool
+from smtp_pool import SMTPConnectionPool
+
+
+def spool_roster(analyzer, path, format):
+    with MailSpool(path, format) as spool:
+        analyzer.send_emails("", 0, SENDER, "", spool=spool)
+    return read_spool(path, format)
+
+
+def flush(path, format, sink, limit):
+    with SMTPConnectionPool(sink.host, sink.port, SENDER, "password", use_tls=False) as pool:
+        return flush_spool(
+            path, pool, format, scheduler=DeliveryScheduler(daily_quota=DailyQuota(limit))
+        )
+
+
+def test_mbox_flush_ignores_stale_temp_file(analyzer, sink, tmp_path):
+    path = str(tmp_path / "outbox.mbox")
+    spooled = spool_roster(analyzer, path, "mbox")
+    # Left behind by a flush that crashed before replacing the mbox
+    shutil.copy(path, f"{path}.tmp")
+
+    results = flush(path, "mbox", sink, 20)
+    assert len(results["sent"]) == len(sink.messages) == 20
+    assert len(results["deferred"]) == len(spooled) - 20
+
+    remaining = read_spool(path, "mbox")
+    assert [m.recipient for m in remaining] == [m.recipient for m in spooled[20:]]
+    assert [m.data for m in remaining] == [m.data for m in spooled[20:]]
+
+    results = flush(path, "mbox", sink, 10_000)
+    assert len(results["sent"]) == len(spooled) - 20
+    assert sorted(recipients[0] for _, recipients, _ in sink.messages) == sorted(
+        m.recipient for m in spooled
+    )
+    assert read_spool(path, "mbox") == []
+
+
+def test_maildir_flush_keeps_deferred_messages(analyzer, sink, tmp_path):
+    path = str(tmp_path / "outbox")
+    spooled = spool_roster(analyzer, path, "maildir")
+
+    flush(path, "maildir", sink, 25)
+    assert [m.recipient for m in read_spool(path, "maildir")] == [
+        m.recipient for m in spooled[25:]
+    ]
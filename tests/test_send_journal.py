@@ -0,0 +1,63 @@
+"""Send journal replay and crash recovery."""
+
+import json
+
+from conftest import send_to
+from send_journal import SENT, SendJournal
+from smtp_sink import SMTPSink
+
+
+def test_record_after_torn_line_survives_replay(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with SendJournal(path, "week") as journal:
+        journal.record("ann@x.edu", "abc", SENT)
+    with open(path, "a") as f:
+        f.write('{"run": "week", "recipient": "bo')
+
+    with SendJournal(path, "week") as journal:
+        assert journal.is_delivered("ann@x.edu", "abc")
+        journal.record("bob@x.edu", "abc", SENT)
+
+    with SendJournal(path, "week") as journal:
+        assert journal.is_delivered("ann@x.edu", "abc")
+        assert journal.is_delivered("bob@x.edu", "abc")
+    with open(path) as f:
+        assert [json.loads(line)["recipient"] for line in f] == ["ann@x.edu", "bob@x.edu"]
+
+
+def test_resume_after_crash_mid_write(analyzer, sink, tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with SendJournal(path, "week") as journal:
+        send_to(analyzer, sink, journal=journal)
+    total = len(sink.messages)
+
+    # Keep the first ten deliveries (a pending and a sent record each), and
+    # tear the record that was being written when the process died
+    with open(path) as f:
+        lines = f.readlines()
+    with open(path, "w") as f:
+        f.writelines(lines[:20])
+        f.write(lines[20][:25])
+
+    with SMTPSink() as resumed, SendJournal(path, "week") as journal:
+        results = send_to(analyzer, resumed, journal=journal)
+    assert len(results["skipped"]) == 10
+    assert len(resumed.messages) == total - 10
+
+    with SMTPSink() as rerun, SendJournal(path, "week") as journal:
+        results = send_to(analyzer, rerun, journal=journal)
+    assert len(rerun.messages) == 0
+    assert len(results["skipped"]) == total
+
+
+def test_record_without_expected_keys_is_skipped(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with open(path, "w") as f:
+        f.write('{"run": "week", "recipient": "ann@x.edu"}\n')
+        f.write('["not", "a", "record"]\n')
+        f.write(json.dumps({"run": "week", "recipient": "bob@x.edu",
+                            "template": "abc", "status": SENT}) + "\n")
+
+    with SendJournal(path, "week") as journal:
+        assert journal.is_delivered("bob@x.edu", "abc")
+        assert journal.counts()[SENT] == 1
@@ -0,0 +1,43 @@
+"""SMTP connection pool: session reuse and reconnecting after a hang-up."""
+
+from conftest import SENDER, send_to
+from smtp_pool import SMTPConnectionPool
+from smtp_sink import SMTPSink
+
+
+def message(i):
+    return f"From: {SENDER}\nTo: s{i}@x.edu\nSubject: Test {i}\n\nBody {i}\n"
+
+
+def send_all(pool, count):
+    for i in range(count):
+        pool.send(f"s{i}@x.edu", message(i))
+
+
+def test_reconnects_after_server_drops_session():
+    with SMTPSink(drop_after=3) as sink:
+        with SMTPConnectionPool(sink.host, sink.port, SENDER, "", use_tls=False) as pool:
+            send_all(pool, 10)
+            assert pool.connections_opened == 4
+    assert [recipients for _, recipients, _ in sink.messages] == [
+        [f"s{i}@x.edu"] for i in range(10)
+    ]
+    assert sink.connections == 4
+
+
+def test_sessions_are_reused_up_to_the_per_session_limit():
+    with SMTPSink() as sink:
+        with SMTPConnectionPool(
+            sink.host, sink.port, SENDER, "", max_messages_per_session=5, use_tls=False
+        ) as pool:
+            send_all(pool, 12)
+    assert len(sink.messages) == 12
+    assert sink.connections == 3
+
+
+def test_roster_is_delivered_through_dropped_sessions(analyzer):
+    with SMTPSink(drop_after=7) as sink:
+        results = send_to(analyzer, sink, workers=2)
+    assert results["failed"] == []
+    assert len(sink.messages) == len(results["sent"]) == len(analyzer.student_results)
+    assert sink.connections > len(sink.messages) // 7
@@ -0,0 +1,89 @@
+"""Identity resolution: SID first, then email, then name, with issues flagged."""
+
+import numpy as np
+
+from student_identity import CONFLICT, DUPLICATE, NAME_MATCH, IdentityResolver
+
+
+def resolve(resolver, label, rows):
+    names, emails, sids = (np.array(column, dtype=object) for column in zip(*rows))
+    return resolver.resolve(label, names, emails, sids).tolist()
+
+
+def kinds(resolver):
+    return [(issue["kind"], issue["name"]) for issue in resolver.issues]
+
+
+def first_export():
+    resolver = IdentityResolver()
+    ids = resolve(
+        resolver,
+        "Quiz 1",
+        [
+            ("Ada Lovelace", "ada@unc.edu", "1001"),
+            ("Alan Turing", "alan@unc.edu", "1002"),
+            ("Dana Lee", "dana@unc.edu", ""),
+        ],
+    )
+    assert ids == [0, 1, 2]
+    return resolver
+
+
+def test_sid_then_email_then_name():
+    resolver = first_export()
+    ids = resolve(
+        resolver,
+        "Quiz 2",
+        [
+            ("Ada King", "ada.king@gmail.com", " 1001 "),  # Same SID, new email and name
+            ("alan turing", " ALAN@unc.edu ", ""),  # No SID; email differs only in case
+            ("Lee,  Dana", "dlee@gmail.com", ""),  # Only the name matches
+            ("Grace Hopper", "grace@unc.edu", "1004"),
+        ],
+    )
+    assert ids == [0, 1, 2, 3]
+    assert resolver.count == 4
+    assert kinds(resolver) == [(NAME_MATCH, "Lee,  Dana")]
+
+
+def test_sid_wins_over_an_email_of_another_student():
+    resolver = first_export()
+    ids = resolve(resolver, "Quiz 2", [("Ada Lovelace", "alan@unc.edu", "1001")])
+    assert ids == [0]
+    assert kinds(resolver) == [(CONFLICT, "Ada Lovelace")]
+
+
+def test_email_of_a_student_with_another_sid_is_a_new_student():
+    resolver = first_export()
+    ids = resolve(resolver, "Quiz 2", [("Alan Turing", "alan@unc.edu", "2002")])
+    # Neither the email nor the name is trusted against a disagreeing SID
+    assert ids == [3]
+    assert kinds(resolver) == [(CONFLICT, "Alan Turing")]
+
+
+def test_name_shared_by_two_students_is_not_matched():
+    resolver = IdentityResolver()
+    resolve(
+        resolver,
+        "Quiz 1",
+        [("Sam Smith", "sam1@unc.edu", ""), ("Sam Smith", "sam2@unc.edu", "")],
+    )
+    ids = resolve(resolver, "Quiz 2", [("Sam Smith", "sam@gmail.com", "")])
+    assert ids == [2]
+    assert resolver.issues == []
+
+
+def test_duplicate_rows_keep_the_last():
+    resolver = first_export()
+    ids = resolve(
+        resolver,
+        "Quiz 2",
+        [
+            ("Ada Lovelace", "ada@unc.edu", "1001"),
+            ("Alan Turing", "alan@unc.edu", "1002"),
+            ("Ada Lovelace", "ada@unc.edu", "1001"),
+        ],
+    )
+    assert ids == [0, 1, 0]
+    assert kinds(resolver) == [(DUPLICATE, "Ada Lovelace")]
+    assert resolver.issue_counts() == {DUPLICATE: 1, CONFLICT: 0, NAME_MATCH: 0}
@@ -0,0 +1,100 @@
+"""Submission time parsing and the unknown-deadline warning."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from submission_timing import (
+    infer_deadline,
+    parse_deadline,
+    parse_durations,
+    parse_submission_times,
+)
+
+SAME_INSTANT = [
+    "2025-10-08 17:12:42 -0400",
+    "2025-10-08 21:12:42 +0000",
+    "2025-10-09 02:42:42 +0530",
+    "2025-10-08 12:12:42 -0900",
+]
+
+def write_rules(tmp_path, condition):
+    spec = {
+        "thresholds": {},
+        "rules": [{"category": "crammers", "when": [[condition]]}],
+        "default": "consistent",
+    }
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(spec))
+    return str(path)
+
+
+def test_times_in_any_utc_offset_give_the_same_instant():
+    expected = pd.Timestamp("2025-10-08 21:12:42", tz="UTC").timestamp()
+    assert parse_submission_times(SAME_INSTANT).tolist() == [expected] * len(SAME_INSTANT)
+
+
+def test_blank_and_missing_times_are_nan():
+    seconds = parse_submission_times(["", None, np.nan, SAME_INSTANT[0], "not a time"])
+    assert np.isnan(seconds[[0, 1, 2, 4]]).all()
+    assert seconds[3] == parse_deadline(SAME_INSTANT[1])
+
+
+def test_other_formats_fall_back_to_to_datetime():
+    seconds = parse_submission_times(["2025-10-08T21:12:42Z", "2025-10-08 17:12:42-04:00"])
+    assert seconds.tolist() == [parse_deadline(SAME_INSTANT[0])] * 2
+
+
+def test_unparseable_deadline_is_rejected():
+    with pytest.raises(ValueError, match="Cannot parse deadline"):
+        parse_deadline("next Friday")
+
+
+def test_durations_with_long_hours_and_blanks():
+    seconds = parse_durations(["00:00:00", "125:03:07", "", None, "00:00:00"])
+    assert seconds[[0, 1, 4]].tolist() == [0.0, 125 * 3600 + 3 * 60 + 7, 0.0]
+    assert np.isnan(seconds[[2, 3]]).all()
+
+
+def test_deadline_inferred_from_late_rows_only():
+    submitted = parse_submission_times(
+        ["2025-10-09 01:00:00 +0000", "2025-10-08 20:30:00 -0400", "", "2025-10-01 00:00:00 +0000"]
+    )
+    lateness = parse_durations(["01:00:00", "00:30:00", "05:00:00", "00:00:00"])
+    assert infer_deadline(submitted, lateness) == parse_deadline("2025-10-09 00:00:00 +0000")
+    assert np.isnan(infer_deadline(submitted[3:], lateness[3:]))
+
+
+def test_no_deadline_warning_when_nothing_uses_it(analyzer, capsys):
+    # The bundled exports have no late rows, so no deadline can be inferred
+    assert analyzer.unknown_deadlines == ["Quiz 2", "Quiz 3"]
+    analyzer.analyze_student_performance()
+    analyzer.send_emails("localhost", 25, "a@b.edu", "", dry_run=True)
+    assert "no deadline" not in capsys.readouterr().err
+
+
+def test_deadline_warning_once_when_rules_use_it(analyzer, tmp_path, capsys):
+    analyzer.load_rules(write_rules(tmp_path, "last_minute_count >= 1"))
+    analyzer.analyze_student_performance()
+    analyzer.analyze_student_performance()
+    assert capsys.readouterr().err.count("Warning: no deadline for Quiz 2, Quiz 3") == 1
+
+
+def test_deadline_warning_when_templates_use_it(analyzer, tmp_path, capsys):
+    (tmp_path / "excelling.txt").write_text(
+        "Subject: Hi\n\nYou submitted {hours_before_deadline:.1f} h early."
+    )
+    analyzer.load_templates(str(tmp_path))
+    analyzer.send_emails("localhost", 25, "a@b.edu", "", dry_run=True)
+    assert "Warning: no deadline" in capsys.readouterr().err
+
+
+def test_set_deadline_silences_the_warning(analyzer, tmp_path, capsys):
+    for label in analyzer.assessments:
+        analyzer.set_deadline(label, "2025-10-15 23:59:00 -0400")
+    analyzer.load_rules(write_rules(tmp_path, "last_minute_count >= 1"))
+    analyzer.analyze_student_performance()
+    assert analyzer.unknown_deadlines == []
+    assert "no deadline" not in capsys.readouterr().err